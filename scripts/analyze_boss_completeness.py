@@ -1,15 +1,19 @@
-from PIL import Image
-import numpy as np
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tools'))
+from spritekit.meta import MetadataIndex
+
+# 元数据索引: 尺寸只读文件头，像素统计按文件缓存，重复检查时只解码变化的文件
+index = MetadataIndex()
 
-# 读取原图
-original = Image.open(r"F:\VsCodeproject\roge game\PNG\BOSS.png").convert("RGBA")
-orig_array = np.array(original)
+# 原图尺寸（只读文件头）
+header = index.header(r"F:\VsCodeproject\roge game\PNG\BOSS.png")
 
-print("原图尺寸:", original.size)
+print("原图尺寸:", (header['width'], header['height']))
 print()
 
 # 读取所有提取的Boss
-import os
 boss_dir = r"F:\VsCodeproject\roge game\extracted_sprites\bosses_v2"
 
 for i in range(10):
@@ -17,30 +21,24 @@ for i in range(10):
     if not os.path.exists(boss_path):
         break
 
-    boss_img = Image.open(boss_path).convert("RGBA")
-    boss_array = np.array(boss_img)
+    boss_header = index.header(boss_path)
+    facts = index.alpha(boss_path, threshold=0)
 
     # 统计非透明像素
-    non_transparent = np.sum(boss_array[:, :, 3] > 0)
+    non_transparent = facts['pixels']
 
     print(f"boss_{i}.png:")
-    print(f"  尺寸: {boss_img.size[0]}x{boss_img.size[1]}")
+    print(f"  尺寸: {boss_header['width']}x{boss_header['height']}")
     print(f"  非透明像素: {non_transparent}")
 
     # 检查是否有边缘像素（可能被截断）
     # 检查四条边是否有非透明像素
-    top_edge = np.any(boss_array[0, :, 3] > 0)
-    bottom_edge = np.any(boss_array[-1, :, 3] > 0)
-    left_edge = np.any(boss_array[:, 0, 3] > 0)
-    right_edge = np.any(boss_array[:, -1, 3] > 0)
-
-    edges = []
-    if top_edge: edges.append("上")
-    if bottom_edge: edges.append("下")
-    if left_edge: edges.append("左")
-    if right_edge: edges.append("右")
+    edge_names = [('top', "上"), ('bottom', "下"), ('left', "左"), ('right', "右")]
+    edges = [name for key, name in edge_names if facts['edges'][key]]
 
     if edges:
         print(f"  警告：{','.join(edges)}边缘有内容，可能被截断")
 
     print()
+
+index.save()
@@ -1,108 +1,117 @@
 from PIL import Image, ImageDraw
 import numpy as np
 import os
-
-# 读取原图
-original = Image.open(r"F:\VsCodeproject\roge game\PNG\BOSS.png").convert("RGBA")
-orig_array = np.array(original)
-
-print("原图尺寸:", original.size)
-print()
-
-# 读取所有提取的Boss并在原图上标记
-vis_img = original.copy()
-draw = ImageDraw.Draw(vis_img)
-
-boss_dir = r"F:\VsCodeproject\roge game\extracted_sprites\bosses"
-boss_files = sorted([f for f in os.listdir(boss_dir) if f.startswith("boss_") and f.endswith(".png")])
-
-# 手动定义的区域（用于对比）
-boss_regions = [
-    ("熊", (10, 5, 90, 80)),
-    ("青蛙", (135, 10, 195, 75)),
-    ("眼球怪", (85, 75, 145, 150)),
-    ("火焰怪", (145, 75, 200, 150)),
-    ("大龙", (200, 5, 340, 100)),
-    ("甲虫", (200, 100, 290, 150)),
-    ("蜘蛛", (10, 85, 85, 150)),
-]
-
-colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255), (255, 128, 0)]
-
-print("检查每个Boss的完整性：\n")
-
-for idx, (name, (min_col, min_row, max_col, max_row)) in enumerate(boss_regions):
-    # 绘制定义的区域
-    draw.rectangle([min_col, min_row, max_col, max_row], outline=colors[idx], width=2)
-    draw.text((min_col + 2, min_row + 2), f"{idx}: {name}", fill=colors[idx])
-
-    # 检查这个区域内的非背景像素
-    bg_color = np.array([104, 101, 87])
-    region = orig_array[min_row:max_row+1, min_col:max_col+1]
-
-    non_bg_pixels = 0
-    for r in range(region.shape[0]):
-        for c in range(region.shape[1]):
-            diff = np.sum(np.abs(region[r, c, :3].astype(int) - bg_color.astype(int)))
-            if diff >= 15:
-                non_bg_pixels += 1
-
-    region_width = max_col - min_col + 1
-    region_height = max_row - min_row + 1
-
-    print(f"Boss {idx} - {name}:")
-    print(f"  定义区域: ({min_col}, {min_row}) - ({max_col}, {max_row})")
-    print(f"  区域尺寸: {region_width}x{region_height}")
-    print(f"  非背景像素: {non_bg_pixels}")
-
-    # 检查边缘是否有内容（可能需要扩大区域）
-    # 检查上边缘
-    top_edge_pixels = 0
-    for c in range(region.shape[1]):
-        diff = np.sum(np.abs(region[0, c, :3].astype(int) - bg_color.astype(int)))
-        if diff >= 15:
-            top_edge_pixels += 1
-
-    # 检查下边缘
-    bottom_edge_pixels = 0
-    for c in range(region.shape[1]):
-        diff = np.sum(np.abs(region[-1, c, :3].astype(int) - bg_color.astype(int)))
-        if diff >= 15:
-            bottom_edge_pixels += 1
-
-    # 检查左边缘
-    left_edge_pixels = 0
-    for r in range(region.shape[0]):
-        diff = np.sum(np.abs(region[r, 0, :3].astype(int) - bg_color.astype(int)))
-        if diff >= 15:
-            left_edge_pixels += 1
-
-    # 检查右边缘
-    right_edge_pixels = 0
-    for r in range(region.shape[0]):
-        diff = np.sum(np.abs(region[r, -1, :3].astype(int) - bg_color.astype(int)))
-        if diff >= 15:
-            right_edge_pixels += 1
-
-    warnings = []
-    if top_edge_pixels > 5:
-        warnings.append(f"上边缘有{top_edge_pixels}个非背景像素，可能被截断")
-    if bottom_edge_pixels > 5:
-        warnings.append(f"下边缘有{bottom_edge_pixels}个非背景像素，可能被截断")
-    if left_edge_pixels > 5:
-        warnings.append(f"左边缘有{left_edge_pixels}个非背景像素，可能被截断")
-    if right_edge_pixels > 5:
-        warnings.append(f"右边缘有{right_edge_pixels}个非背景像素，可能被截断")
-
-    if warnings:
-        print(f"  [!] 警告:")
-        for w in warnings:
-            print(f"    - {w}")
-    else:
-        print(f"  [OK] 区域完整")
-
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tools'))
+from spritekit.mask import get_background_color
+from spritekit.integral import EDGES, IntegralMask
+from extract_bosses_manual_regions import BOSS_REGIONS
+
+EDGE_NAMES = {'top': "上", 'bottom': "下", 'left': "左", 'right': "右"}
+
+
+def check_regions(img_array, regions, bg_color=None, threshold=15, edge_tolerance=5, max_grow=24):
+    """
+    检查每个区域是否完整，并给出不再截断内容的外扩区域
+
+    前景遮罩和积分图只建一次，每个区域的像素数、四条边计数都是 O(1)。
+
+    Args:
+        regions: [(名称, (min_col, min_row, max_col, max_row)), ...]
+        bg_color: 背景色，None 则取四角平均
+        threshold: 与背景色的 L1 距离 >= threshold 为前景
+        edge_tolerance: 一条边上超过这么多前景像素视为截断
+        max_grow: 建议区域每条边最多外扩的像素数（Boss 紧挨着，不限制会扩到相邻 Boss）
+
+    Returns:
+        [{'name', 'bounds', 'pixels', 'edges', 'truncated', 'suggested', 'stuck'}, ...]
+    """
+    if bg_color is None:
+        bg_color = get_background_color(img_array)
+    integral = IntegralMask.from_image(img_array, bg_color, threshold)
+
+    reports = []
+    for name, bounds in regions:
+        edges = integral.edges(bounds)
+        truncated = [edge for edge in EDGES if edges[edge] > edge_tolerance]
+        suggested, stuck = bounds, []
+        if truncated:
+            suggested, stuck = integral.expand(bounds, edge_tolerance, max_grow)
+        reports.append({
+            'name': name,
+            'bounds': bounds,
+            'pixels': integral.count(bounds),
+            'edges': edges,
+            'truncated': truncated,
+            'suggested': suggested,
+            'stuck': stuck,
+        })
+    return reports
+
+
+def fix_regions(img_array, regions, **kwargs):
+    """返回把截断区域替换为外扩区域后的区域列表（参数见 check_regions）"""
+    return [(report['name'], report['suggested'])
+            for report in check_regions(img_array, regions, **kwargs)]
+
+
+def draw_reports(image, reports, output_path):
+    """在原图上画出定义区域（实线）和建议区域（细线）"""
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255),
+              (0, 255, 255), (255, 128, 0)]
+    vis_img = image.copy()
+    draw = ImageDraw.Draw(vis_img)
+    for idx, report in enumerate(reports):
+        color = colors[idx % len(colors)]
+        min_col, min_row, max_col, max_row = report['bounds']
+        draw.rectangle([min_col, min_row, max_col, max_row], outline=color, width=2)
+        draw.text((min_col + 2, min_row + 2), f"{idx}: {report['name']}", fill=color)
+        if report['truncated']:
+            draw.rectangle(list(report['suggested']), outline=color, width=1)
+    vis_img.save(output_path)
+
+
+if __name__ == "__main__":
+    image_path = r"F:\VsCodeproject\roge game\PNG\BOSS.png"
+    vis_path = r"F:\VsCodeproject\roge game\boss_regions_check.png"
+
+    original = Image.open(image_path).convert("RGBA")
+    orig_array = np.array(original)
+
+    print("原图尺寸:", original.size)
     print()
-
-# 保存可视化结果
-vis_img.save(r"F:\VsCodeproject\roge game\boss_regions_check.png")
-print("可视化结果已保存到: boss_regions_check.png")
+    print("检查每个Boss的完整性：\n")
+
+    reports = check_regions(orig_array, BOSS_REGIONS)
+
+    for idx, report in enumerate(reports):
+        min_col, min_row, max_col, max_row = report['bounds']
+        print(f"Boss {idx} - {report['name']}:")
+        print(f"  定义区域: ({min_col}, {min_row}) - ({max_col}, {max_row})")
+        print(f"  区域尺寸: {max_col - min_col + 1}x{max_row - min_row + 1}")
+        print(f"  非背景像素: {report['pixels']}")
+
+        if report['truncated']:
+            print(f"  [!] 警告:")
+            for edge in report['truncated']:
+                print(f"    - {EDGE_NAMES[edge]}边缘有{report['edges'][edge]}个非背景像素，可能被截断")
+            print(f"  建议区域: {report['suggested']}")
+            if report['stuck']:
+                print(f"    (仍有内容，可能与相邻Boss相连: {','.join(EDGE_NAMES[e] for e in report['stuck'])})")
+        else:
+            print(f"  [OK] 区域完整")
+
+        print()
+
+    if any(report['truncated'] for report in reports):
+        print("修正后的区域（rect 可粘贴到 layouts/bosses_manual.json）:")
+        for report in reports:
+            min_col, min_row, max_col, max_row = report['suggested']
+            rect = [min_col, min_row, max_col - min_col + 1, max_row - min_row + 1]
+            print(f"    {report['name']}: \"rect\": {rect}")
+        print()
+
+    # 保存可视化结果
+    draw_reports(original, reports, vis_path)
+    print("可视化结果已保存到: boss_regions_check.png")
@@ -1,59 +1,17 @@
 from PIL import Image
 import os
+import sys
 import numpy as np
 from scipy import ndimage
 from scipy.spatial.distance import cdist
 
-def get_background_color(img_array):
-    """检测背景色（使用图片四角的颜色）"""
-    corners = [
-        img_array[0, 0],
-        img_array[0, -1],
-        img_array[-1, 0],
-        img_array[-1, -1]
-    ]
-    bg_color = np.mean(corners, axis=0).astype(np.uint8)
-    return bg_color
-
-def is_background_pixel(pixel, bg_color, threshold=30):
-    """判断像素是否为背景色"""
-    diff = np.sum(np.abs(pixel.astype(int) - bg_color.astype(int)))
-    return diff < threshold
-
-def get_region_info(labeled_array, label_idx):
-    """获取区域的信息"""
-    positions = np.where(labeled_array == label_idx)
-    if len(positions[0]) == 0:
-        return None
-
-    min_row = np.min(positions[0])
-    max_row = np.max(positions[0])
-    min_col = np.min(positions[1])
-    max_col = np.max(positions[1])
-
-    center_row = (min_row + max_row) / 2
-    center_col = (min_col + max_col) / 2
-    width = max_col - min_col + 1
-    height = max_row - min_row + 1
-    area = len(positions[0])
-
-    return {
-        'label': label_idx,
-        'min_row': min_row,
-        'max_row': max_row,
-        'min_col': min_col,
-        'max_col': max_col,
-        'center': np.array([center_row, center_col]),
-        'width': width,
-        'height': height,
-        'area': area
-    }
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tools'))
+from spritekit.mask import get_background_color, foreground_mask, knockout_alpha
+from spritekit.regions import region_stats
+from spritekit.pipeline import cut_sprite
 
 def group_regions_into_bosses(regions, max_distance=15):
     """将靠近的区域分组成Boss"""
-    # 过滤掉太小的噪点区域
-    regions = [r for r in regions if r['width'] >= 10 and r['height'] >= 10 or r['area'] >= 100]
-
     if len(regions) == 0:
         return []
 
@@ -91,11 +49,7 @@ def extract_bosses_smart(image_path, output_dir):
     print(f"检测到背景色: RGB({bg_color[0]}, {bg_color[1]}, {bg_color[2]})")
 
     # 创建二值掩码
-    mask = np.zeros((height, width), dtype=bool)
-    for r in range(height):
-        for c in range(width):
-            if not is_background_pixel(img_array[r, c], bg_color):
-                mask[r, c] = True
+    mask = foreground_mask(img_array, bg_color, threshold=30, channels=4)
 
     print(f"检测到 {np.sum(mask)} 个非背景像素")
 
@@ -103,12 +57,12 @@ def extract_bosses_smart(image_path, output_dir):
     labeled_array, num_features = ndimage.label(mask)
     print(f"找到 {num_features} 个连通区域")
 
-    # 获取所有区域的信息
-    regions = []
-    for label_idx in range(1, num_features + 1):
-        info = get_region_info(labeled_array, label_idx)
-        if info:
-            regions.append(info)
+    # 一次统计所有区域的边界框和面积
+    stats = region_stats(labeled_array, num_features)
+
+    # 过滤掉太小的噪点区域
+    keep = (stats.w >= 10) & (stats.h >= 10) | (stats.area >= 100)
+    regions = stats.select(keep).to_regions()
 
     print(f"过滤后剩余 {len(regions)} 个有效区域")
 
@@ -118,31 +72,20 @@ def extract_bosses_smart(image_path, output_dir):
 
     os.makedirs(output_dir, exist_ok=True)
 
+    # 将背景色替换为透明
+    alpha = knockout_alpha(img_array, bg_color, threshold=30, channels=4)
+
     all_sprites = []
     for boss_idx, group in enumerate(boss_groups):
         # 计算组的总边界
-        min_row = min(r['min_row'] for r in group)
-        max_row = max(r['max_row'] for r in group)
-        min_col = min(r['min_col'] for r in group)
-        max_col = max(r['max_col'] for r in group)
-
-        # 添加padding
-        min_row = max(0, min_row - 2)
-        max_row = min(height - 1, max_row + 2)
-        min_col = max(0, min_col - 2)
-        max_col = min(width - 1, max_col + 2)
-
-        sprite_height = max_row - min_row + 1
-        sprite_width = max_col - min_col + 1
-
-        # 提取精灵区域
-        sprite_region = img_array[min_row:max_row+1, min_col:max_col+1].copy()
-
-        # 将背景色替换为透明
-        for r in range(sprite_region.shape[0]):
-            for c in range(sprite_region.shape[1]):
-                if is_background_pixel(sprite_region[r, c], bg_color):
-                    sprite_region[r, c, 3] = 0
+        x0 = min(r['bbox'][0] for r in group)
+        y0 = min(r['bbox'][1] for r in group)
+        x1 = max(r['bbox'][0] + r['bbox'][2] for r in group)
+        y1 = max(r['bbox'][1] + r['bbox'][3] for r in group)
+
+        # 添加padding并提取精灵区域
+        sprite_region, (_, _, sprite_width, sprite_height) = cut_sprite(
+            img_array, {'bbox': (x0, y0, x1 - x0, y1 - y0)}, padding=2, alpha=alpha)
 
         sprite_img = Image.fromarray(sprite_region, 'RGBA')
 
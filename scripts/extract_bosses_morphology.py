@@ -1,23 +1,13 @@
 from PIL import Image
 import os
+import sys
 import numpy as np
 from scipy import ndimage
 
-def get_background_color(img_array):
-    """检测背景色"""
-    corners = [
-        img_array[0, 0],
-        img_array[0, -1],
-        img_array[-1, 0],
-        img_array[-1, -1]
-    ]
-    bg_color = np.mean(corners, axis=0).astype(np.uint8)
-    return bg_color
-
-def is_background_pixel(pixel, bg_color, threshold=20):
-    """判断像素是否为背景色"""
-    diff = np.sum(np.abs(pixel[:3].astype(int) - bg_color[:3].astype(int)))
-    return diff < threshold
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tools'))
+from spritekit.mask import get_background_color, foreground_mask, knockout_alpha
+from spritekit.regions import region_stats
+from spritekit.pipeline import cut_sprite
 
 def extract_bosses_with_morphology(image_path, output_dir):
     """使用形态学操作提取完整的Boss精灵"""
@@ -34,11 +24,7 @@ def extract_bosses_with_morphology(image_path, output_dir):
     print(f"检测到背景色: RGB({bg_color[0]}, {bg_color[1]}, {bg_color[2]})")
 
     # 创建二值掩码 - 使用中等阈值
-    mask = np.zeros((height, width), dtype=bool)
-    for r in range(height):
-        for c in range(width):
-            if not is_background_pixel(img_array[r, c], bg_color, threshold=20):
-                mask[r, c] = True
+    mask = foreground_mask(img_array, bg_color, threshold=20)
 
     print(f"初始检测到 {np.sum(mask)} 个非背景像素")
 
@@ -53,36 +39,8 @@ def extract_bosses_with_morphology(image_path, output_dir):
     labeled_array, num_features = ndimage.label(mask_closed)
     print(f"找到 {num_features} 个连通区域")
 
-    # 获取所有区域的信息
-    regions = []
-    for label_idx in range(1, num_features + 1):
-        positions = np.where(labeled_array == label_idx)
-        if len(positions[0]) == 0:
-            continue
-
-        min_row = np.min(positions[0])
-        max_row = np.max(positions[0])
-        min_col = np.min(positions[1])
-        max_col = np.max(positions[1])
-
-        width_r = max_col - min_col + 1
-        height_r = max_row - min_row + 1
-        area = len(positions[0])
-
-        # 过滤掉小噪点
-        if width_r < 10 or height_r < 10:
-            continue
-
-        regions.append({
-            'label': label_idx,
-            'min_row': min_row,
-            'max_row': max_row,
-            'min_col': min_col,
-            'max_col': max_col,
-            'width': width_r,
-            'height': height_r,
-            'area': area
-        })
+    # 一次统计所有区域的边界框和面积，过滤掉小噪点
+    regions = region_stats(labeled_array, num_features).filter(min_size=10).to_regions()
 
     print(f"过滤后剩余 {len(regions)} 个有效区域")
 
@@ -91,31 +49,14 @@ def extract_bosses_with_morphology(image_path, output_dir):
 
     os.makedirs(output_dir, exist_ok=True)
 
+    # 将背景色设为透明（使用较严格的阈值）
+    alpha = knockout_alpha(img_array, bg_color, threshold=10)
+
     all_sprites = []
     for boss_idx, region in enumerate(regions):
-        min_row = region['min_row']
-        max_row = region['max_row']
-        min_col = region['min_col']
-        max_col = region['max_col']
-
         # 添加padding
-        padding = 3
-        min_row = max(0, min_row - padding)
-        max_row = min(img_array.shape[0] - 1, max_row + padding)
-        min_col = max(0, min_col - padding)
-        max_col = min(img_array.shape[1] - 1, max_col + padding)
-
-        sprite_height = max_row - min_row + 1
-        sprite_width = max_col - min_col + 1
-
-        # 提取精灵区域
-        sprite_region = img_array[min_row:max_row+1, min_col:max_col+1].copy()
-
-        # 将背景色设为透明（使用较严格的阈值）
-        for r in range(sprite_region.shape[0]):
-            for c in range(sprite_region.shape[1]):
-                if is_background_pixel(sprite_region[r, c], bg_color, threshold=10):
-                    sprite_region[r, c, 3] = 0
+        sprite_region, (_, _, sprite_width, sprite_height) = cut_sprite(
+            img_array, region, padding=3, alpha=alpha)
 
         sprite_img = Image.fromarray(sprite_region, 'RGBA')
 
@@ -1,91 +1,35 @@
 from PIL import Image
 import os
+import sys
 import numpy as np
 
-def get_background_color(img_array):
-    """检测背景色（使用图片四角的颜色）"""
-    # 取四个角的颜色的平均值作为背景色
-    corners = [
-        img_array[0, 0],
-        img_array[0, -1],
-        img_array[-1, 0],
-        img_array[-1, -1]
-    ]
-    bg_color = np.mean(corners, axis=0).astype(np.uint8)
-    return bg_color
-
-def is_background_pixel(pixel, bg_color, threshold=30):
-    """判断像素是否为背景色"""
-    # 计算颜色差异
-    diff = np.sum(np.abs(pixel.astype(int) - bg_color.astype(int)))
-    return diff < threshold
-
-def find_sprite_rows(img_array, bg_color):
-    """找到所有精灵行的位置"""
-    height = img_array.shape[0]
-
-    # 对每一行，检查是否有非背景像素
-    row_has_content = []
-    for row in range(height):
-        has_content = False
-        for col in range(img_array.shape[1]):
-            if not is_background_pixel(img_array[row, col], bg_color):
-                has_content = True
-                break
-        row_has_content.append(has_content)
-
-    # 找到精灵的行范围
-    rows = []
-    in_row = False
-    start_row = 0
-
-    for row in range(height):
-        if row_has_content[row] and not in_row:
-            in_row = True
-            start_row = row
-        elif not row_has_content[row] and in_row:
-            in_row = False
-            rows.append((start_row, row - 1))
-
-    if in_row:
-        rows.append((start_row, height - 1))
-
-    return rows
-
-def find_sprite_columns(img_array, row_start, row_end, bg_color):
-    """在指定行范围内找到所有精灵的列位置"""
-    width = img_array.shape[1]
-
-    # 对每一列，检查是否有非背景像素
-    col_has_content = []
-    for col in range(width):
-        has_content = False
-        for row in range(row_start, row_end + 1):
-            if not is_background_pixel(img_array[row, col], bg_color):
-                has_content = True
-                break
-        col_has_content.append(has_content)
-
-    # 找到精灵的列范围
-    sprites = []
-    in_sprite = False
-    start_col = 0
-
-    for col in range(width):
-        if col_has_content[col] and not in_sprite:
-            in_sprite = True
-            start_col = col
-        elif not col_has_content[col] and in_sprite:
-            in_sprite = False
-            sprites.append((start_col, col - 1))
-
-    if in_sprite:
-        sprites.append((start_col, width - 1))
-
-    return sprites
-
-def extract_sprites_smart(image_path):
-    """智能提取精灵"""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tools'))
+from spritekit.mask import get_background_color, foreground_mask
+from spritekit.trim import trim_sprite, trim_info, write_trim_sidecar
+from spritekit.xycut import row_runs, column_runs, xy_cut
+
+def find_sprite_rows(img_array, bg_color, mask=None):
+    """找到所有精灵行的位置 [(起始行, 结束行), ...]（mask 为已算好的前景遮罩）"""
+    if mask is None:
+        mask = foreground_mask(img_array, bg_color, threshold=30, channels=4)
+    return row_runs(mask)
+
+def find_sprite_columns(img_array, row_start, row_end, bg_color, mask=None):
+    """在指定行范围内找到所有精灵的列位置 [(起始列, 结束列), ...]"""
+    if mask is None:
+        mask = foreground_mask(img_array, bg_color, threshold=30, channels=4)
+    return column_runs(mask[row_start:row_end + 1])
+
+def extract_sprites_smart(image_path, depth=2):
+    """
+    智能提取精灵
+
+    前景遮罩只算一次，行/列投影和背景透明化都基于它。
+
+    Args:
+        depth: XY-cut 切分层数；2 为先按行、再按列（精灵高度为行高），
+               None 继续交替切分到不能再切（每个精灵紧贴内容）
+    """
     print(f"正在处理: {image_path}")
 
     img = Image.open(image_path).convert("RGBA")
@@ -98,48 +42,42 @@ def extract_sprites_smart(image_path):
     bg_color = get_background_color(img_array)
     print(f"检测到背景色: RGB({bg_color[0]}, {bg_color[1]}, {bg_color[2]})")
 
-    # 找到所有行
-    rows = find_sprite_rows(img_array, bg_color)
+    mask = foreground_mask(img_array, bg_color, threshold=30, channels=4)
+
+    # 按行分组的切分结果（path[0] 为行号）
+    rows = {}
+    for leaf in xy_cut(mask, max_depth=depth):
+        rows.setdefault(leaf['path'][0], []).append(leaf['bbox'])
     print(f"找到 {len(rows)} 行精灵")
 
-    # 提取每一行中的精灵
     all_sprites = []
-    for row_idx, (row_start, row_end) in enumerate(rows):
-        row_height = row_end - row_start + 1
-        print(f"\n处理第 {row_idx + 1} 行 (像素行 {row_start}-{row_end}，高度 {row_height})")
-
-        # 找到这一行中的所有精灵列
-        sprite_cols = find_sprite_columns(img_array, row_start, row_end, bg_color)
-        print(f"  找到 {len(sprite_cols)} 个精灵")
-
-        for sprite_idx, (col_start, col_end) in enumerate(sprite_cols):
-            sprite_width = col_end - col_start + 1
-
-            # 提取精灵（去除背景，转为透明）
-            sprite_region = img_array[row_start:row_end+1, col_start:col_end+1].copy()
+    for row_idx, boxes in rows.items():
+        row_start = min(y for _, y, _, _ in boxes)
+        row_end = max(y + h - 1 for _, y, _, h in boxes)
+        print(f"\n处理第 {row_idx + 1} 行 (像素行 {row_start}-{row_end}，高度 {row_end - row_start + 1})")
+        print(f"  找到 {len(boxes)} 个精灵")
 
-            # 将背景色替换为透明
-            for r in range(sprite_region.shape[0]):
-                for c in range(sprite_region.shape[1]):
-                    if is_background_pixel(sprite_region[r, c], bg_color):
-                        sprite_region[r, c, 3] = 0  # 设置为透明
+        for sprite_idx, (x, y, w, h) in enumerate(boxes):
+            # 提取精灵（背景像素的 Alpha 置 0）
+            sprite_region = img_array[y:y+h, x:x+w].copy()
+            sprite_region[:, :, 3][~mask[y:y+h, x:x+w]] = 0
 
             sprite_img = Image.fromarray(sprite_region, 'RGBA')
 
             all_sprites.append({
                 'image': sprite_img,
-                'width': sprite_width,
-                'height': row_height,
+                'width': w,
+                'height': h,
                 'row': row_idx,
                 'sprite_in_row': sprite_idx
             })
 
-            print(f"    精灵 {sprite_idx + 1}: {sprite_width}x{row_height} 像素")
+            print(f"    精灵 {sprite_idx + 1}: {w}x{h} 像素")
 
     return all_sprites
 
-def classify_and_save_sprites(sprites, base_output_dir):
-    """根据大小和位置分类精灵并保存"""
+def classify_and_save_sprites(sprites, base_output_dir, trim=False):
+    """根据大小和位置分类精灵并保存（trim: 裁掉行高带来的透明边，偏移写入 trim.json）"""
     if not sprites:
         print("没有找到精灵")
         return
@@ -188,23 +126,35 @@ def classify_and_save_sprites(sprites, base_output_dir):
         output_dir = os.path.join(base_output_dir, category)
         os.makedirs(output_dir, exist_ok=True)
 
+        trimmed = {}
         for i, sprite in enumerate(row_sprites):
             filename = f"row{row_idx}_sprite{i}.png"
             output_path = os.path.join(output_dir, filename)
-            sprite['image'].save(output_path)
-            print(f"    保存: {filename} ({sprite['width']}x{sprite['height']})")
+            if trim:
+                cropped, rect = trim_sprite(np.asarray(sprite['image']))
+                trimmed[filename] = trim_info(rect, (sprite['width'], sprite['height']))
+                Image.fromarray(cropped, 'RGBA').save(output_path)
+                print(f"    保存: {filename} ({sprite['width']}x{sprite['height']} -> {rect[2]}x{rect[3]})")
+            else:
+                sprite['image'].save(output_path)
+                print(f"    保存: {filename} ({sprite['width']}x{sprite['height']})")
+
+        if trimmed:
+            write_trim_sidecar(output_dir, trimmed)
 
 if __name__ == "__main__":
     # 处理角色，怪物.png
     image_path = r"F:\VsCodeproject\roge game\PNG\角色，怪物.png"
     output_dir = r"F:\VsCodeproject\roge game\extracted_sprites"
+    # 默认保持行高尺寸（游戏按此尺寸和锚点绘制）；--trim 裁掉透明边并写 trim.json
+    trim = '--trim' in sys.argv[1:]
 
     print("=" * 60)
     print("智能精灵提取工具")
     print("=" * 60)
 
     sprites = extract_sprites_smart(image_path)
-    classify_and_save_sprites(sprites, output_dir)
+    classify_and_save_sprites(sprites, output_dir, trim=trim)
 
     print("\n" + "=" * 60)
     print("提取完成！")
@@ -1,21 +1,13 @@
 from PIL import Image, ImageDraw
+import os
+import sys
 import numpy as np
 from scipy import ndimage
 import random
 
-def get_background_color(img_array):
-    corners = [
-        img_array[0, 0],
-        img_array[0, -1],
-        img_array[-1, 0],
-        img_array[-1, -1]
-    ]
-    bg_color = np.mean(corners, axis=0).astype(np.uint8)
-    return bg_color
-
-def is_background_pixel(pixel, bg_color, threshold=15):
-    diff = np.sum(np.abs(pixel[:3].astype(int) - bg_color[:3].astype(int)))
-    return diff < threshold
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tools'))
+from spritekit.mask import get_background_color, foreground_mask
+from spritekit.regions import region_stats
 
 # 读取BOSS图片
 img = Image.open(r"F:\VsCodeproject\roge game\PNG\BOSS.png").convert("RGBA")
@@ -29,11 +21,7 @@ bg_color = get_background_color(img_array)
 print(f"背景色: RGB({bg_color[0]}, {bg_color[1]}, {bg_color[2]})")
 
 # 创建二值掩码
-mask = np.zeros((height, width), dtype=bool)
-for r in range(height):
-    for c in range(width):
-        if not is_background_pixel(img_array[r, c], bg_color, threshold=15):
-            mask[r, c] = True
+mask = foreground_mask(img_array, bg_color, threshold=15)
 
 print(f"非背景像素: {np.sum(mask)}")
 
@@ -48,23 +36,16 @@ draw = ImageDraw.Draw(vis_img)
 # 为每个区域绘制边界框
 colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0), (255, 0, 255), (0, 255, 255), (255, 128, 0)]
 
-for label_idx in range(1, min(num_features + 1, 20)):  # 最多显示20个区域
-    positions = np.where(labeled_array == label_idx)
-    if len(positions[0]) == 0:
-        continue
-
-    min_row = np.min(positions[0])
-    max_row = np.max(positions[0])
-    min_col = np.min(positions[1])
-    max_col = np.max(positions[1])
-
-    width_r = max_col - min_col + 1
-    height_r = max_row - min_row + 1
-    area = len(positions[0])
+# 一次统计所有区域，只显示前19个标签中较大的区域
+stats = region_stats(labeled_array, num_features)
+stats = stats.select(stats.label < 20).filter(min_size=10)
 
-    # 只显示较大的区域
-    if width_r < 10 or height_r < 10:
-        continue
+for region in stats.to_regions():
+    label_idx = region['label']
+    min_col, min_row, width_r, height_r = region['bbox']
+    max_col = min_col + width_r - 1
+    max_row = min_row + height_r - 1
+    area = region['area']
 
     color = colors[(label_idx - 1) % len(colors)]
 
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'tools'))
+from spritekit.localmask import mask_region
+
+
+def native_sam2_mask(mask):
+    """原生 SAM2 AutomaticMaskGenerator 的输出: XYWH 由闭区间 xyxy 直接相减得到"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    x0, y0, x1, y1 = cols[0], rows[0], cols[-1], rows[-1]
+    return {'segmentation': mask, 'bbox': [x0, y0, x1 - x0, y1 - y0], 'area': int(mask.sum())}
+
+
+def test_native_bbox_keeps_last_row_and_column():
+    mask = np.zeros((20, 30), dtype=bool)
+    mask[4:10, 5:12] = True
+    data = native_sam2_mask(mask)
+
+    region = mask_region(data['segmentation'], 0, data['bbox'], data['area'])
+
+    assert region['bbox'] == (5, 4, 7, 6)
+    assert region['area'] == 42
+    assert region['mask'].shape == (6, 7)
+    assert region['mask'].all()
+
+
+def test_covering_bbox_is_used():
+    mask = np.zeros((20, 30), dtype=bool)
+    mask[4:10, 5:12] = True
+
+    region = mask_region(mask, 1, (5, 4, 7, 6))
+
+    assert region['bbox'] == (5, 4, 7, 6)
+    assert np.count_nonzero(region['mask']) == 42
+
+
+def test_empty_mask():
+    assert mask_region(np.zeros((5, 5), dtype=bool), 0, (0, 0, 2, 2)) is None
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提取流水线基准测试
+==================================
+
+功能:
+- 生成可配置尺寸和对象数的合成精灵表（纯色背景 / 透明背景 / 网格）
+- 分阶段计时: 遮罩、连通区域标记、区域统计、去重、裁剪、保存、分类
+- 端到端计时: SimpleSpriteExtractor、SAM2AutoExtractor.auto_segment_by_contours、
+  scripts/ 下的 Boss 提取脚本、SpriteClassifier
+- 结果写为 JSON，可与之前的结果比较，超过阈值的变慢项视为回归（退出码 1）
+
+每项重复运行多次，记录最小值、中位数和平均值；比较时使用中位数。
+被测函数的打印输出会被屏蔽。
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import importlib.util
+import statistics
+import subprocess
+import tempfile
+import contextlib
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+from scipy import ndimage
+
+from spritekit import (
+    AlphaBackend, ColorKeyBackend, cut_sprite, dedupe_regions, foreground_mask,
+    get_background_color, region_stats, save_sprites, synth_sheet,
+)
+from spritekit.regions import STRUCTURES
+
+
+RESULTS_VERSION = 1
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = REPO_ROOT / 'scripts'
+
+# scripts/ 下的 Boss 提取脚本: 名称 -> (文件, 函数)
+BOSS_SCRIPTS = {
+    'boss_smart': ('extract_bosses.py', 'extract_bosses_smart'),
+    'boss_grid': ('extract_bosses_v2.py', 'extract_bosses_by_grid'),
+    'boss_morphology': ('extract_bosses_morphology.py', 'extract_bosses_with_morphology'),
+    'boss_final': ('extract_bosses_final.py', 'extract_bosses_complete'),
+}
+
+
+def load_script(filename):
+    """按路径导入 scripts/ 下的脚本模块（不会执行 __main__ 部分）"""
+    path = SCRIPTS_DIR / filename
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def time_call(func, repeat):
+    """
+    重复调用 func 并计时（屏蔽打印输出）
+
+    Returns:
+        (耗时列表（秒）, 最后一次的返回值)
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            times.append(time.perf_counter() - start)
+    return times, result
+
+
+def _count(result):
+    """默认的数量统计: 列表长度"""
+    return len(result) if isinstance(result, list) else None
+
+
+class Benchmark:
+    """
+    基准测试集合
+
+    Args:
+        width, height: 合成精灵表尺寸
+        objects: 对象数
+        cell: 网格表的单元尺寸
+        repeat: 每项重复次数
+        seed: 随机种子
+        only: 只运行名称包含其中任一子串的项
+    """
+
+    def __init__(self, width=1024, height=1024, objects=64, cell=(64, 64), repeat=5, seed=0,
+                 only=None):
+        self.width = width
+        self.height = height
+        self.objects = objects
+        self.cell = tuple(cell)
+        self.repeat = repeat
+        self.seed = seed
+        self.only = only
+        self.results = []
+
+    def selected(self, name):
+        return not self.only or any(part in name for part in self.only)
+
+    def record(self, group, name, sheet, func, count=_count):
+        """
+        计时一项并记录结果
+
+        Args:
+            count: 返回值 -> 处理的对象/像素数，写入结果的 items
+        """
+        if not self.selected(name):
+            return None
+        try:
+            times, result = time_call(func, self.repeat)
+        except ImportError as e:
+            print(f"  跳过 {name}: {e}")
+            self.results.append({'group': group, 'name': name, 'sheet': sheet,
+                                 'skipped': str(e)})
+            return None
+
+        megapixels = self.width * self.height / 1e6
+        median = statistics.median(times)
+        entry = {
+            'group': group,
+            'name': name,
+            'sheet': sheet,
+            'repeat': len(times),
+            'min_s': min(times),
+            'median_s': median,
+            'mean_s': statistics.fmean(times),
+            'items': count(result),
+            'mpix_per_s': megapixels / median if median > 0 else None,
+        }
+        self.results.append(entry)
+        print(f"  {name:<28} {sheet:<9} 中位数 {median * 1000:9.2f} ms  "
+              f"最小 {min(times) * 1000:9.2f} ms  数量 {entry['items']}")
+        return result
+
+    def sheets(self, workdir):
+        """生成并保存三种合成精灵表，返回 {类型: (路径, 数组, 边界框)}"""
+        sheets = {}
+        for kind in ('colorkey', 'alpha', 'grid'):
+            rgba, boxes = synth_sheet(self.width, self.height, self.objects, kind,
+                                      cell=self.cell, seed=self.seed)
+            path = Path(workdir) / f"synth_{kind}.png"
+            Image.fromarray(rgba, 'RGBA').save(path)
+            sheets[kind] = (path, rgba, boxes)
+        return sheets
+
+    def run_stages(self, sheets, workdir):
+        """分阶段计时"""
+        print("\n[阶段]")
+        for kind in ('colorkey', 'alpha'):
+            _, rgba, _ = sheets[kind]
+
+            if kind == 'colorkey':
+                bg_color = get_background_color(rgba)
+                mask_func = lambda: foreground_mask(rgba, bg_color, threshold=30, channels=4)
+                backend = ColorKeyBackend(threshold=30, channels=4)
+            else:
+                mask_func = lambda: rgba[:, :, 3] > 10
+                backend = AlphaBackend(threshold=10)
+
+            self.record('stage', 'mask', kind, mask_func, lambda m: int(np.count_nonzero(m)))
+            mask = mask_func()
+            self.record('stage', 'label', kind,
+                        lambda: ndimage.label(mask, structure=STRUCTURES[8]), lambda r: int(r[1]))
+            labeled, num = ndimage.label(mask, structure=STRUCTURES[8])
+            self.record('stage', 'region_stats', kind, lambda: region_stats(labeled, num), len)
+            self.record('stage', 'segment', kind, lambda: backend.segment(rgba, min_area=50),
+                        lambda r: len(r[0]))
+
+            regions, alpha = backend.segment(rgba, min_area=50)
+            for region in regions:
+                x, y, w, h = region['bbox']
+                region['mask'] = labeled[y:y + h, x:x + w] == region['label']
+
+            # 每个区域加一份腐蚀后的副本，模拟 SAM2 重复遮罩
+            doubled = []
+            for region in regions:
+                doubled.append(region)
+                eroded = ndimage.binary_erosion(region['mask'])
+                if eroded.any():
+                    doubled.append(dict(region, mask=eroded, area=int(eroded.sum())))
+            doubled.sort(key=lambda r: r['area'], reverse=True)
+            self.record('stage', 'dedup', kind, lambda: dedupe_regions(doubled, 0.5))
+
+            crop = lambda: [cut_sprite(rgba, r, 2, alpha) for r in regions]
+            self.record('stage', 'crop', kind, crop)
+            sprites = [{'region': r, 'image': img, 'bbox': bbox}
+                       for r, (img, bbox) in zip(regions, crop())]
+
+            out_dir = Path(workdir) / f"stage_{kind}"
+            save = lambda: save_sprites(sprites, out_dir, "sprite_{index:03d}.png")
+            if self.record('stage', 'save', kind, save) is None:
+                save()  # 分类阶段需要保存的文件
+            self.record('stage', 'save_optimized', kind,
+                        lambda: save_sprites(sprites, Path(workdir) / f"stage_{kind}_opt",
+                                             "sprite_{index:03d}.png", optimize=True))
+
+            from sprite_classifier import SpriteClassifier
+            classifier = SpriteClassifier()
+            files = sorted(str(p) for p in out_dir.glob('*.png'))
+            self.record('stage', 'classify', kind,
+                        lambda: [classifier.classify_sprite(classifier.analyze_sprite(p))
+                                 for p in files])
+
+    def run_pipelines(self, sheets, workdir):
+        """端到端计时"""
+        print("\n[流水线]")
+        from extract_objects_sam2 import SimpleSpriteExtractor
+
+        colorkey, alpha, grid = (str(sheets[k][0]) for k in ('colorkey', 'alpha', 'grid'))
+        out = Path(workdir) / 'pipelines'
+
+        self.record('pipeline', 'simple_color', 'colorkey',
+                    lambda: SimpleSpriteExtractor.extract_by_color(colorkey, out / 'color'))
+        simple_alpha = lambda: SimpleSpriteExtractor.extract_by_transparency(alpha, out / 'alpha')
+        if self.record('pipeline', 'simple_alpha', 'alpha', simple_alpha) is None:
+            time_call(simple_alpha, 1)  # 分类器需要提取结果
+        self.record('pipeline', 'simple_grid', 'grid',
+                    lambda: SimpleSpriteExtractor.extract_grid_sprites(
+                        grid, out / 'grid', self.cell[0], self.cell[1]))
+
+        def sam2_contours():
+            from sam2_auto_extract import SAM2AutoExtractor
+            return SAM2AutoExtractor().auto_segment_by_contours(alpha, min_area=100)
+        self.record('pipeline', 'sam2_contours', 'alpha', sam2_contours)
+
+        for name, (filename, func_name) in BOSS_SCRIPTS.items():
+            if not self.selected(name):
+                continue
+            func = getattr(load_script(filename), func_name)
+            self.record('pipeline', name, 'colorkey',
+                        lambda func=func, name=name: func(colorkey, str(out / name)))
+
+        from sprite_classifier import SpriteClassifier
+
+        def classifier():
+            classifier = SpriteClassifier()
+            classifier.process_directory(out / 'alpha')
+            return [info for infos in classifier.categories.values() for info in infos]
+        self.record('pipeline', 'classifier', 'alpha', classifier)
+
+    def run(self):
+        with tempfile.TemporaryDirectory(prefix='spritekit-bench-') as workdir:
+            sheets = self.sheets(workdir)
+            print(f"合成精灵表: {self.width}x{self.height}，{self.objects} 个对象，"
+                  f"每项重复 {self.repeat} 次")
+            self.run_stages(sheets, workdir)
+            self.run_pipelines(sheets, workdir)
+        return self.results
+
+    def metadata(self):
+        try:
+            commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                    capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            commit = ''
+        return {
+            'version': RESULTS_VERSION,
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit or None,
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'params': {
+                'width': self.width,
+                'height': self.height,
+                'objects': self.objects,
+                'cell': list(self.cell),
+                'repeat': self.repeat,
+                'seed': self.seed,
+            },
+        }
+
+
+def compare(results, baseline, threshold=1.25):
+    """
+    与之前的结果比较中位数
+
+    Returns:
+        变慢超过 threshold 倍的项 [(名称, 表类型, 倍数), ...]
+    """
+    old = {(r['group'], r['name'], r['sheet']): r for r in baseline['results'] if 'median_s' in r}
+    regressions = []
+    print(f"\n与基线比较 (提交 {baseline['meta'].get('commit')}):")
+    for r in results:
+        key = (r['group'], r['name'], r['sheet'])
+        if 'median_s' not in r or key not in old:
+            continue
+        ratio = r['median_s'] / old[key]['median_s'] if old[key]['median_s'] > 0 else 1.0
+        flag = ''
+        if ratio > threshold:
+            flag = '  <- 回归'
+            regressions.append((r['name'], r['sheet'], ratio))
+        print(f"  {r['name']:<28} {r['sheet']:<9} {old[key]['median_s'] * 1000:9.2f} -> "
+              f"{r['median_s'] * 1000:9.2f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='提取流水线基准测试 - 合成精灵表 + 分阶段/端到端计时',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 默认 1024x1024、64 个对象
+  python benchmark.py -o bench.json
+
+  # 大表、多对象，只测去重和分类
+  python benchmark.py --size 4096 4096 --objects 1024 --only dedup classify
+
+  # 与之前的结果比较，变慢超过 1.5 倍时退出码为 1
+  python benchmark.py -o new.json --compare bench.json --threshold 1.5
+        """
+    )
+
+    parser.add_argument('-o', '--output', help='结果 JSON 文件')
+    parser.add_argument('--size', nargs=2, type=int, default=[1024, 1024], metavar=('W', 'H'),
+                        help='合成精灵表尺寸 (默认: 1024 1024)')
+    parser.add_argument('--objects', type=int, default=64, help='对象数 (默认: 64)')
+    parser.add_argument('--cell', nargs=2, type=int, default=[64, 64], metavar=('W', 'H'),
+                        help='网格表单元尺寸 (默认: 64 64)')
+    parser.add_argument('--repeat', type=int, default=5, help='每项重复次数 (默认: 5)')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子 (默认: 0)')
+    parser.add_argument('--only', nargs='+', help='只运行名称包含这些子串的项')
+    parser.add_argument('--compare', help='基线结果 JSON，比较中位数')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='中位数变慢超过该倍数视为回归 (默认: 1.25)')
+
+    args = parser.parse_args()
+
+    bench = Benchmark(args.size[0], args.size[1], args.objects, args.cell, args.repeat,
+                      args.seed, args.only)
+    results = bench.run()
+    data = {'meta': bench.metadata(), 'results': results}
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+        print(f"\n结果已保存: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 项变慢超过 {args.threshold} 倍")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+纹理图集构建
+==================================
+
+功能:
+- 读取 js/assets.js 中 PLAYER_ASSETS / ENEMY_ASSETS / BOSS_ASSETS /
+  WEAPON_ASSETS / ITEM_ASSETS 的配置，收集对应的素材文件
+- 也可以直接加入提取脚本的输出目录（分类名为目录名，帧名为文件名）
+- 裁掉透明边后用 MaxRects 装箱到一张或多张 2 的幂图集
+- 输出图集 PNG 和帧信息 JSON，游戏只需加载几张图集而不是逐个请求 PNG
+
+帧信息按分类分组（敌人和 Boss 都有 spider），格式:
+
+    {
+      "meta": {"version": 1, "padding": 1,
+               "sheets": [{"image": "atlas_0.png", "size": {"w": 1024, "h": 512}}]},
+      "frames": {
+        "players": {
+          "warrior": {"sheet": 0, "frame": {"x", "y", "w", "h"}, "trimmed": true,
+                      "spriteSourceSize": {"x", "y", "w", "h"}, "sourceSize": {"w", "h"}}
+        }
+      }
+    }
+"""
+
+import os
+import re
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from spritekit import build_atlas, encode_png
+from spritekit import instrument
+
+
+ATLAS_VERSION = 1
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# assets.js 中的配置常量 -> 分类（与 ASSET_PATHS 的键一致）
+ASSET_TABLES = {
+    'PLAYER_ASSETS': 'players',
+    'ENEMY_ASSETS': 'enemies',
+    'BOSS_ASSETS': 'bosses',
+    'WEAPON_ASSETS': 'weapons',
+    'ITEM_ASSETS': 'items',
+}
+
+TABLE_RE = re.compile(r"const\s+(\w+_ASSETS)\s*=\s*\{(.*?)\n\};", re.S)
+# warrior: { file: 'warrior.png', ... }
+KEYED_RE = re.compile(r"(\w+)\s*:\s*\{\s*file\s*:\s*'([^']+)'")
+# { id: 'skeleton', file: 'skeleton.png', ... }
+LISTED_RE = re.compile(r"\{\s*id\s*:\s*'([^']+)'\s*,\s*file\s*:\s*'([^']+)'")
+PATHS_RE = re.compile(r"const\s+ASSET_PATHS\s*=\s*\{(.*?)\};", re.S)
+PATH_RE = re.compile(r"(\w+)\s*:\s*'([^']+)'")
+
+
+def parse_asset_config(js_path):
+    """
+    解析 assets.js 中的素材配置
+
+    Returns:
+        [(分类, id, 相对路径), ...]，按配置中的顺序
+    """
+    text = Path(js_path).read_text(encoding='utf-8')
+
+    paths = {}
+    match = PATHS_RE.search(text)
+    if match:
+        paths = dict(PATH_RE.findall(match.group(1)))
+
+    entries = []
+    for table, body in TABLE_RE.findall(text):
+        category = ASSET_TABLES.get(table)
+        if category is None:
+            continue
+        base = paths.get(category, f'assets/{category}/')
+        items = KEYED_RE.findall(body) + LISTED_RE.findall(body)
+        # 保持配置中的顺序
+        items.sort(key=lambda item: body.find(f"'{item[1]}'"))
+        for asset_id, filename in items:
+            entries.append((category, asset_id, base + filename))
+    return entries
+
+
+def collect_dir(input_dir):
+    """提取脚本的输出目录: 分类名为目录名，帧名为文件名"""
+    input_dir = Path(input_dir)
+    category = input_dir.name
+    return [(category, path.stem, str(path)) for path in sorted(input_dir.glob('*.png'))]
+
+
+def build(entries, output_dir, name='atlas', max_size=2048, padding=1, trim=True, root=REPO_ROOT):
+    """
+    构建图集
+
+    Args:
+        entries: [(分类, id, 路径), ...]，相对路径相对于 root
+        output_dir: 输出目录
+        name: 输出文件名前缀
+        max_size: 单张图集最大边长
+        padding: 精灵之间的间距
+        trim: 是否裁掉透明边
+
+    Returns:
+        帧信息字典（同时写入 {name}.json）
+    """
+    sprites = []
+    missing = []
+    for category, asset_id, path in entries:
+        path = Path(root) / path
+        if not path.exists():
+            missing.append(str(path))
+            continue
+        with instrument.stage('load'), Image.open(path) as img:
+            sprites.append(((category, asset_id), np.asarray(img.convert('RGBA'))))
+
+    if missing:
+        print(f"警告: {len(missing)} 个素材文件不存在，已跳过")
+        for path in missing:
+            print(f"  {path}")
+    if not sprites:
+        print("没有可打包的素材")
+        return None
+
+    with instrument.stage('pack'):
+        sheets, frames = build_atlas(sprites, max_size=max_size, padding=padding, trim=trim)
+
+    os.makedirs(output_dir, exist_ok=True)
+    meta_sheets = []
+    for i, sheet in enumerate(sheets):
+        filename = f"{name}_{i}.png"
+        with instrument.stage('encode'):
+            data = encode_png(sheet)
+        with instrument.stage('write'):
+            with open(os.path.join(output_dir, filename), 'wb') as f:
+                f.write(data)
+        meta_sheets.append({'image': filename, 'size': {'w': sheet.shape[1], 'h': sheet.shape[0]}})
+
+    grouped = {}
+    for (category, asset_id), frame in frames.items():
+        grouped.setdefault(category, {})[asset_id] = frame
+
+    atlas = {
+        'meta': {'version': ATLAS_VERSION, 'padding': padding, 'sheets': meta_sheets},
+        'frames': grouped,
+    }
+    with open(os.path.join(output_dir, f"{name}.json"), 'w', encoding='utf-8') as f:
+        json.dump(atlas, f, ensure_ascii=False, indent=1)
+
+    source_pixels = sum(f['sourceSize']['w'] * f['sourceSize']['h'] for f in frames.values())
+    sheet_pixels = sum(s.shape[0] * s.shape[1] for s in sheets)
+    used_pixels = sum(f['frame']['w'] * f['frame']['h'] for f in frames.values())
+    print(f"打包 {len(frames)} 个精灵 -> {len(sheets)} 张图集")
+    for meta in meta_sheets:
+        print(f"  {meta['image']}: {meta['size']['w']}x{meta['size']['h']}")
+    print(f"原图总像素: {source_pixels}，裁剪后: {used_pixels}，"
+          f"图集: {sheet_pixels} (利用率 {used_pixels / sheet_pixels:.1%})")
+    print(f"帧信息: {os.path.join(output_dir, name + '.json')}")
+    return atlas
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='纹理图集构建 - 把素材打包为少量图集 + 帧信息 JSON',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 按 js/assets.js 打包全部素材
+  python build_atlas.py -o assets/atlas
+
+  # 只打包敌人和 Boss，单张图集最大 1024
+  python build_atlas.py -o assets/atlas --categories enemies bosses --max-size 1024
+
+  # 加入提取脚本的输出目录
+  python build_atlas.py -o assets/atlas --categories -i extracted/trees_sam2
+        """
+    )
+
+    parser.add_argument('-o', '--output', required=True, help='输出目录')
+    parser.add_argument('--name', default='atlas', help='输出文件名前缀 (默认: atlas)')
+    parser.add_argument('--config', default=str(REPO_ROOT / 'js' / 'assets.js'),
+                        help='素材配置文件 (默认: js/assets.js)')
+    parser.add_argument('--categories', nargs='*', default=list(ASSET_TABLES.values()),
+                        help='从配置中打包的分类 (默认: 全部)')
+    parser.add_argument('-i', '--input', action='append', default=[],
+                        help='额外加入的素材目录，可重复')
+    parser.add_argument('--max-size', type=int, default=2048, help='单张图集最大边长 (默认: 2048)')
+    parser.add_argument('--padding', type=int, default=1, help='精灵间距 (默认: 1)')
+    parser.add_argument('--no-trim', action='store_true', help='不裁剪透明边')
+    parser.add_argument('--profile', action='store_true',
+                        help='统计各阶段耗时和内存，结束时打印汇总表')
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                        help='同时写出 Chrome trace-event JSON（隐含 --profile）')
+
+    args = parser.parse_args()
+
+    if args.profile or args.profile_trace:
+        instrument.enable(trace_path=args.profile_trace)
+
+    if args.max_size & (args.max_size - 1):
+        parser.error('--max-size 必须是 2 的幂')
+
+    entries = [e for e in parse_asset_config(args.config) if e[0] in args.categories]
+    for input_dir in args.input:
+        entries.extend(collect_dir(input_dir))
+
+    build(entries, args.output, name=args.name, max_size=args.max_size,
+          padding=args.padding, trim=not args.no_trim)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按布局文件批量裁剪
+==================================
+
+功能:
+- 读取 JSON 裁剪布局（格式见 spritekit/layout.py），每张精灵表只解码一次，
+  所有矩形在同一数组上裁剪
+- 支持 grid 简写、透明边裁剪、最大连通区域、背景色透明化、截断区域外扩
+- 清理和编码分发到线程池
+
+现有布局:
+  scripts/layouts/characters.json     角色怪物图按排切格子（cut_sprites.py）
+  scripts/layouts/bosses_manual.json  BOSS.png 手动区域（extract_bosses_manual_regions.py）
+  assets/environment_layout.json      树木/灌木/石头（assets/extract_sprites.py）
+"""
+
+import argparse
+
+from spritekit import instrument
+from spritekit.layout import load_layout, run_layout
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='按布局文件批量裁剪 - 每张精灵表只解码一次',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 在项目根目录下按布局切割角色怪物图
+  python tools/crop_layout.py -l scripts/layouts/characters.json --root .
+
+  # 环境素材（路径相对于布局文件所在的 assets 目录），4 线程，压缩 PNG
+  python tools/crop_layout.py -l assets/environment_layout.json --workers 4 --optimize-png
+
+  # Boss 区域先外扩到不再截断内容
+  python tools/crop_layout.py -l scripts/layouts/bosses_manual.json --root . --expand
+        """
+    )
+
+    parser.add_argument('-l', '--layout', required=True, help='布局文件 (JSON)')
+    parser.add_argument('--root', default=None,
+                        help='source/output 相对路径的根目录 (默认: 布局文件所在目录)')
+    parser.add_argument('--expand', action='store_true',
+                        help='边上有内容（截断）的矩形先向外扩展，每边最多 24 像素')
+    parser.add_argument('--optimize-png', action='store_true',
+                        help='输出无损压缩到最小的 PNG（颜色不超过256种时写调色板PNG）')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='每张表的清理/编码线程数 (默认: 1，0 表示使用全部CPU核心)')
+    parser.add_argument('--profile', action='store_true',
+                        help='统计各阶段耗时和内存，结束时打印汇总表')
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                        help='同时写出 Chrome trace-event JSON（隐含 --profile）')
+
+    args = parser.parse_args()
+
+    if args.profile or args.profile_trace:
+        instrument.enable(trace_path=args.profile_trace)
+
+    sheets = load_layout(args.layout)
+    if args.expand:
+        for sheet in sheets:
+            for sprite in sheet['sprites']:
+                sprite.setdefault('expand', {'tolerance': 5, 'max_grow': 24})
+
+    results = run_layout(args.layout, root=args.root, workers=args.workers,
+                         optimize=args.optimize_png, sheets=sheets)
+
+    for source, infos in results.items():
+        saved = [info for info in infos if info['filepath']]
+        skipped = [info for info in infos if not info['filepath']]
+        print(f"{source}: 保存 {len(saved)} 个，跳过 {len(skipped)} 个")
+        for info in skipped:
+            print(f"  跳过 {info['name']} ({info['skipped']})")
+
+
+if __name__ == '__main__':
+    main()
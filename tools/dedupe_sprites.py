@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+精灵去重
+==================================
+
+功能:
+- 对提取结果目录（可多个，递归查找 PNG）计算精确哈希和感知哈希
+- 用 BK 树找出相同或几乎相同的精灵并分组，每组保留第一个（按路径排序）
+- 删除其余重复文件，同步更新目录下的构建清单和 trim.json，
+  重新运行提取时不会再生成这些文件
+- 可导出分组报告 (JSON)
+
+建议在 sprite_classifier.py --copy 之前运行，避免重复素材进入游戏资源目录。
+"""
+
+import os
+import json
+import argparse
+from pathlib import Path
+
+from PIL import Image
+import numpy as np
+
+from spritekit import (
+    BuildManifest, MetadataIndex, TRIM_SIDECAR, group_duplicates, iter_images,
+    sprite_hashes, write_trim_sidecar,
+)
+from spritekit import instrument
+from spritekit.manifest import MANIFEST_NAME
+
+
+HASH_VERSION = 1
+
+
+def _hash_file(path):
+    """计算单个文件的哈希（工作进程中运行）"""
+    try:
+        with instrument.stage('load'), Image.open(path) as img:
+            rgba = np.asarray(img.convert('RGBA'))
+    except (OSError, ValueError):
+        return None
+    with instrument.stage('hash'):
+        return sprite_hashes(rgba)
+
+
+def iter_hashes(paths, workers=1, index=None):
+    """
+    按输入顺序产出 (路径, 哈希)
+
+    Args:
+        index: MetadataIndex，未变化的文件直接复用缓存的哈希
+    """
+    kind = f'sprite_hashes_v{HASH_VERSION}'
+    cached = [index.get(path, kind) if index is not None else None for path in paths]
+    stale = [path for path, hashes in zip(paths, cached) if hashes is None]
+    if index is not None and len(stale) < len(paths):
+        print(f"复用缓存哈希: {len(paths) - len(stale)} 个，重新计算: {len(stale)} 个")
+
+    fresh = iter_images(_hash_file, stale, workers, chunksize=16)
+    for path, hashes in zip(paths, cached):
+        if hashes is None:
+            hashes = next(fresh)
+            if hashes is not None and index is not None:
+                index.put(path, kind, hashes)
+        if hashes is not None:
+            yield path, hashes
+
+    if index is not None:
+        index.save()
+
+
+def find_duplicates(input_dirs, max_distance=6, size_tolerance=0.1, color_tolerance=6,
+                    workers=1, index=None):
+    """
+    查找重复精灵
+
+    Returns:
+        [[保留路径, 重复路径, ...], ...]
+    """
+    paths = sorted({str(p) for d in input_dirs for p in Path(d).rglob('*.png')})
+    print(f"找到 {len(paths)} 个精灵图")
+    # 哈希按需计算，dedup 阶段包含其中的 load/hash
+    with instrument.stage('dedup'):
+        return group_duplicates(iter_hashes(paths, workers, index), max_distance,
+                                size_tolerance, color_tolerance)
+
+
+def _manifests(input_dirs):
+    """输入目录下（含上级目录）的构建清单"""
+    found = set()
+    for d in input_dirs:
+        d = Path(d).resolve()
+        found.update(p.resolve() for p in d.rglob(MANIFEST_NAME))
+        for parent in d.parents:
+            if (parent / MANIFEST_NAME).exists():
+                found.add((parent / MANIFEST_NAME).resolve())
+    return sorted(found)
+
+
+def remove_duplicates(groups, input_dirs):
+    """
+    删除重复文件并更新构建清单和 trim.json
+
+    Returns:
+        删除的文件数
+    """
+    removed = [path for group in groups for path in group[1:]]
+    for path in removed:
+        os.remove(path)
+
+    for manifest_path in _manifests(input_dirs):
+        manifest = BuildManifest(manifest_path)
+        if manifest.forget_outputs(removed):
+            manifest.save()
+
+    for d in {os.path.dirname(path) for path in removed}:
+        if os.path.exists(os.path.join(d, TRIM_SIDECAR)):
+            write_trim_sidecar(d, {})
+
+    return len(removed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='精灵去重 - 删除相同或几乎相同的提取结果',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 只查看重复分组
+  python dedupe_sprites.py -i extracted/trees_sam2 extracted/rockpack --dry-run
+
+  # 删除重复文件并导出报告
+  python dedupe_sprites.py -i extracted/trees_sam2 --report duplicates.json
+
+  # 只合并完全相同的精灵
+  python dedupe_sprites.py -i extracted/trees_sam2 --distance 0
+        """
+    )
+
+    parser.add_argument('-i', '--input', nargs='+', required=True, help='提取结果目录（递归查找 PNG）')
+    parser.add_argument('--distance', type=int, default=6,
+                        help='128 位感知哈希的最大汉明距离 (默认: 6，0 只合并完全相同的)')
+    parser.add_argument('--size-tolerance', type=float, default=0.1,
+                        help='裁掉透明边后宽高的最大相对差 (默认: 0.1)')
+    parser.add_argument('--color-tolerance', type=float, default=6,
+                        help='平均颜色各通道的最大差 (默认: 6)')
+    parser.add_argument('--dry-run', action='store_true', help='只报告，不删除文件')
+    parser.add_argument('--report', help='导出分组报告 (JSON)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行计算哈希的进程数 (默认: 1，0 表示使用全部CPU核心)')
+    parser.add_argument('--index', help='哈希缓存索引文件 (默认: ~/.cache/spritekit/metadata.json)')
+    parser.add_argument('--no-index', action='store_true', help='不使用哈希缓存')
+    parser.add_argument('--profile', action='store_true',
+                        help='统计各阶段耗时和内存，结束时打印汇总表')
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                        help='同时写出 Chrome trace-event JSON（隐含 --profile）')
+
+    args = parser.parse_args()
+
+    if args.profile or args.profile_trace:
+        instrument.enable(trace_path=args.profile_trace)
+
+    index = None if args.no_index else MetadataIndex(args.index)
+    groups = find_duplicates(args.input, args.distance, args.size_tolerance,
+                             args.color_tolerance, args.workers, index)
+
+    duplicates = sum(len(group) - 1 for group in groups)
+    print(f"重复分组: {len(groups)} 组，重复文件: {duplicates} 个")
+    for group in groups:
+        print(f"  保留 {group[0]}")
+        for path in group[1:]:
+            print(f"    重复 {path}")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'groups': [{'keep': g[0], 'duplicates': g[1:]} for g in groups]},
+                      f, ensure_ascii=False, indent=2)
+        print(f"报告已导出: {args.report}")
+
+    if not args.dry_run and groups:
+        print(f"已删除 {remove_duplicates(groups, args.input)} 个重复文件")
+
+
+if __name__ == '__main__':
+    main()
@@ -25,22 +25,26 @@ import sys
 import argparse
 import numpy as np
 from pathlib import Path
-from PIL import Image
-import cv2
+
+from spritekit import (
+    AlphaBackend, ColorKeyBackend, GridBackend, Sam2Backend, RegionCache,
+    BuildManifest, extract_sprites, extract_to_dir, incremental_map, load_rgba, save_sprites,
+)
+from spritekit import instrument
+from spritekit.optional import available_sam_loaders, has_module
 
 
 def install_dependencies():
     """安装必要的依赖"""
     import subprocess
-    packages = [
-        'torch', 'torchvision',
-        'opencv-python', 'pillow', 'numpy', 'matplotlib',
-        'ultralytics'
-    ]
-    for pkg in packages:
-        try:
-            __import__(pkg.replace('-', '_'))
-        except ImportError:
+    # pip 包名 -> 导入名，只探测不导入
+    packages = {
+        'torch': 'torch', 'torchvision': 'torchvision',
+        'opencv-python': 'cv2', 'pillow': 'PIL', 'numpy': 'numpy', 'matplotlib': 'matplotlib',
+        'ultralytics': 'ultralytics',
+    }
+    for pkg, module in packages.items():
+        if not has_module(module):
             print(f"正在安装 {pkg}...")
             subprocess.check_call([sys.executable, '-m', 'pip', 'install', pkg])
 
@@ -48,95 +52,105 @@ def install_dependencies():
 class SAM2ObjectExtractor:
     """SAM2 对象提取器"""
 
-    def __init__(self, model_size='base', device=None):
+    def __init__(self, model_size='base', device=None, cache=None):
         """
         初始化 SAM2 模型
 
         Args:
             model_size: 模型大小 ('tiny', 'small', 'base', 'large')
             device: 运行设备 ('cuda' 或 'cpu')
+            cache: RegionCache，缓存模型遮罩（None 不缓存）
         """
         self.model_size = model_size
         self.device = device
+        self.cache = cache
         self.model = None
         self.mask_generator = None
 
     def load_model(self):
-        """加载 SAM2 模型"""
-        try:
-            # 方法1: 使用 ultralytics (更简单)
-            from ultralytics import SAM
-            model_map = {
-                'tiny': 'sam2_t.pt',
-                'small': 'sam2_s.pt',
-                'base': 'sam2_b.pt',
-                'large': 'sam2_l.pt'
-            }
-            model_name = model_map.get(self.model_size, 'sam2_b.pt')
-            print(f"正在加载 SAM2 模型: {model_name}")
-            self.model = SAM(model_name)
-            self.use_ultralytics = True
-            print("SAM2 模型加载成功 (ultralytics)")
-            return True
-        except Exception as e:
-            print(f"ultralytics SAM2 加载失败: {e}")
-
-        try:
-            # 方法2: 使用原生 segment-anything-2
-            from sam2.build_sam import build_sam2
-            from sam2.automatic_mask_generator import SAM2AutomaticMaskGenerator
-            import torch
-
-            device = self.device or ('cuda' if torch.cuda.is_available() else 'cpu')
-            checkpoint_map = {
-                'tiny': 'sam2_hiera_tiny.pt',
-                'small': 'sam2_hiera_small.pt',
-                'base': 'sam2_hiera_base_plus.pt',
-                'large': 'sam2_hiera_large.pt'
-            }
-            config_map = {
-                'tiny': 'sam2_hiera_t.yaml',
-                'small': 'sam2_hiera_s.yaml',
-                'base': 'sam2_hiera_b+.yaml',
-                'large': 'sam2_hiera_l.yaml'
-            }
-
-            checkpoint = checkpoint_map.get(self.model_size, 'sam2_hiera_base_plus.pt')
-            config = config_map.get(self.model_size, 'sam2_hiera_b+.yaml')
-
-            print(f"正在加载 SAM2 模型: {checkpoint}")
-            sam2 = build_sam2(config, checkpoint, device=device)
-            self.mask_generator = SAM2AutomaticMaskGenerator(sam2)
-            self.use_ultralytics = False
-            print("SAM2 模型加载成功 (native)")
-            return True
-        except Exception as e:
-            print(f"原生 SAM2 加载失败: {e}")
+        """
+        加载 SAM2 模型
 
-        try:
-            # 方法3: 使用 HuggingFace Transformers
-            from transformers import SamModel, SamProcessor
-            import torch
-
-            device = self.device or ('cuda' if torch.cuda.is_available() else 'cpu')
-            model_id = "facebook/sam-vit-huge"
-            print(f"正在加载 SAM 模型: {model_id}")
-            self.model = SamModel.from_pretrained(model_id).to(device)
-            self.processor = SamProcessor.from_pretrained(model_id)
-            self.use_ultralytics = False
-            self.use_transformers = True
-            print("SAM 模型加载成功 (transformers)")
-            return True
-        except Exception as e:
-            print(f"Transformers SAM 加载失败: {e}")
+        先用 find_spec 探测已安装的实现，只导入并尝试这些实现
+        （ultralytics -> 原生 sam2 -> transformers）。
+        """
+        loaders = available_sam_loaders()
+        if not loaders:
+            print("未安装任何 SAM 实现（ultralytics / sam2 / transformers）")
+        for loader in loaders:
+            try:
+                getattr(self, f'_load_{loader}')()
+                return True
+            except Exception as e:
+                print(f"{loader} SAM 加载失败: {e}")
 
         print("所有 SAM 加载方法均失败，请安装依赖:")
         print("  pip install ultralytics")
         print("  或 pip install git+https://github.com/facebookresearch/segment-anything-2.git")
         return False
 
+    def _load_ultralytics(self):
+        """方法1: 使用 ultralytics (更简单)"""
+        from ultralytics import SAM
+        model_map = {
+            'tiny': 'sam2_t.pt',
+            'small': 'sam2_s.pt',
+            'base': 'sam2_b.pt',
+            'large': 'sam2_l.pt'
+        }
+        model_name = model_map.get(self.model_size, 'sam2_b.pt')
+        print(f"正在加载 SAM2 模型: {model_name}")
+        self.model = SAM(model_name)
+        self.use_ultralytics = True
+        print("SAM2 模型加载成功 (ultralytics)")
+
+    def _load_native(self):
+        """方法2: 使用原生 segment-anything-2"""
+        from sam2.build_sam import build_sam2
+        from sam2.automatic_mask_generator import SAM2AutomaticMaskGenerator
+        import torch
+
+        device = self.device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        checkpoint_map = {
+            'tiny': 'sam2_hiera_tiny.pt',
+            'small': 'sam2_hiera_small.pt',
+            'base': 'sam2_hiera_base_plus.pt',
+            'large': 'sam2_hiera_large.pt'
+        }
+        config_map = {
+            'tiny': 'sam2_hiera_t.yaml',
+            'small': 'sam2_hiera_s.yaml',
+            'base': 'sam2_hiera_b+.yaml',
+            'large': 'sam2_hiera_l.yaml'
+        }
+
+        checkpoint = checkpoint_map.get(self.model_size, 'sam2_hiera_base_plus.pt')
+        config = config_map.get(self.model_size, 'sam2_hiera_b+.yaml')
+
+        print(f"正在加载 SAM2 模型: {checkpoint}")
+        sam2 = build_sam2(config, checkpoint, device=device)
+        self.mask_generator = SAM2AutomaticMaskGenerator(sam2)
+        self.use_ultralytics = False
+        print("SAM2 模型加载成功 (native)")
+
+    def _load_transformers(self):
+        """方法3: 使用 HuggingFace Transformers"""
+        from transformers import SamModel, SamProcessor
+        import torch
+
+        device = self.device or ('cuda' if torch.cuda.is_available() else 'cpu')
+        model_id = "facebook/sam-vit-huge"
+        print(f"正在加载 SAM 模型: {model_id}")
+        self.model = SamModel.from_pretrained(model_id).to(device)
+        self.processor = SamProcessor.from_pretrained(model_id)
+        self.use_ultralytics = False
+        self.use_transformers = True
+        print("SAM 模型加载成功 (transformers)")
+
     def generate_masks_ultralytics(self, image_path):
         """使用 ultralytics 生成遮罩"""
+        import cv2
+
         results = self.model(image_path)
         masks = []
         for result in results:
@@ -154,8 +168,21 @@ class SAM2ObjectExtractor:
                     })
         return masks
 
+    def generate_masks(self, image_path, image):
+        """生成 SAM 风格的遮罩列表"""
+        if hasattr(self, 'use_ultralytics') and self.use_ultralytics:
+            masks = self.generate_masks_ultralytics(image_path)
+        elif self.mask_generator:
+            masks = self.mask_generator.generate(np.ascontiguousarray(image[:, :, :3]))
+        else:
+            print("模型未正确加载")
+            return []
+
+        print(f"检测到 {len(masks)} 个潜在对象")
+        return masks
+
     def extract_objects(self, image_path, output_dir, min_area=100,
-                       max_objects=50, padding=5):
+                       max_objects=50, padding=5, trim=False, optimize=False):
         """
         从图像中提取所有对象
 
@@ -165,94 +192,45 @@ class SAM2ObjectExtractor:
             min_area: 最小对象面积（像素）
             max_objects: 最大提取对象数量
             padding: 对象边界填充像素
+            trim: 裁掉透明边，偏移信息写入 trim.json
+            optimize: 写出调色板/高压缩 PNG
 
         Returns:
             提取的对象列表
         """
-        # 读取图像
-        image = cv2.imread(str(image_path))
-        if image is None:
+        try:
+            image = load_rgba(image_path)
+        except (OSError, ValueError):
             print(f"无法读取图像: {image_path}")
             return []
 
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        height, width = image.shape[:2]
-
-        # 创建输出目录
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-
-        # 生成遮罩
         print(f"正在分析图像: {image_path}")
 
-        if hasattr(self, 'use_ultralytics') and self.use_ultralytics:
-            masks = self.generate_masks_ultralytics(image_path)
+        # 只缓存成功加载的模型的输出，键包含模型大小和加载方式
+        if getattr(self, 'use_ultralytics', False):
+            loader = 'ultralytics'
         elif self.mask_generator:
-            masks = self.mask_generator.generate(image_rgb)
+            loader = 'native'
         else:
-            print("模型未正确加载")
-            return []
-
-        print(f"检测到 {len(masks)} 个潜在对象")
-
-        # 按面积排序并过滤
-        masks = sorted(masks, key=lambda x: x['area'], reverse=True)
-        masks = [m for m in masks if m['area'] >= min_area]
-        masks = masks[:max_objects]
-
-        print(f"过滤后保留 {len(masks)} 个对象")
-
-        # 提取并保存每个对象
-        extracted_objects = []
-        base_name = Path(image_path).stem
-
-        for idx, mask_data in enumerate(masks):
-            mask = mask_data['segmentation']
-
-            # 获取边界框
-            if 'bbox' in mask_data:
-                x, y, w, h = mask_data['bbox']
-            else:
-                coords = np.where(mask)
-                if len(coords[0]) == 0:
-                    continue
-                y_min, y_max = coords[0].min(), coords[0].max()
-                x_min, x_max = coords[1].min(), coords[1].max()
-                x, y, w, h = x_min, y_min, x_max - x_min, y_max - y_min
-
-            # 添加填充
-            x = max(0, x - padding)
-            y = max(0, y - padding)
-            w = min(width - x, w + 2 * padding)
-            h = min(height - y, h + 2 * padding)
-
-            # 裁剪区域
-            cropped_image = image_rgb[y:y+h, x:x+w].copy()
-            cropped_mask = mask[y:y+h, x:x+w]
-
-            # 创建带透明背景的图像
-            rgba_image = np.zeros((h, w, 4), dtype=np.uint8)
-            rgba_image[:, :, :3] = cropped_image
-            rgba_image[:, :, 3] = (cropped_mask * 255).astype(np.uint8)
-
-            # 保存
-            output_filename = f"{base_name}_object_{idx:03d}.png"
-            output_filepath = output_path / output_filename
-
-            pil_image = Image.fromarray(rgba_image)
-            pil_image.save(output_filepath)
+            loader = None
+        backend = Sam2Backend(
+            self.generate_masks,
+            cache=self.cache if loader else None,
+            cache_params={'model': self.model_size, 'loader': loader},
+        )
 
-            extracted_objects.append({
-                'filename': output_filename,
-                'filepath': str(output_filepath),
-                'area': mask_data['area'],
-                'bbox': (x, y, w, h),
-                'index': idx
-            })
+        sprites = extract_sprites(
+            image, backend, image_path=str(image_path),
+            min_area=min_area, padding=padding, max_objects=max_objects, order='area'
+        )
+        print(f"过滤后保留 {len(sprites)} 个对象")
 
-            print(f"  保存对象 {idx}: {output_filename} (面积: {mask_data['area']})")
+        extracted = save_sprites(sprites, output_dir, "{stem}_object_{index:03d}.png",
+                                 trim=trim, optimize=optimize, stem=Path(image_path).stem)
+        for obj in extracted:
+            print(f"  保存对象 {obj['index']}: {obj['filename']} (面积: {obj['area']})")
 
-        return extracted_objects
+        return extracted
 
 
 class SimpleSpriteExtractor:
@@ -262,148 +240,62 @@ class SimpleSpriteExtractor:
     """
 
     @staticmethod
-    def extract_by_transparency(image_path, output_dir, min_area=50, padding=2):
+    def extract_by_transparency(image_path, output_dir, min_area=50, padding=2, trim=False,
+                                optimize=False):
         """
         通过透明度提取对象（适用于PNG精灵图）
         """
-        image = Image.open(image_path).convert('RGBA')
-        image_np = np.array(image)
+        image = load_rgba(image_path)
 
-        # 获取alpha通道
-        if image_np.shape[2] == 4:
-            alpha = image_np[:, :, 3]
-        else:
+        # 完全不透明说明没有透明背景
+        if image[:, :, 3].min() == 255:
             print("图像没有透明通道，尝试颜色分离")
-            return SimpleSpriteExtractor.extract_by_color(image_path, output_dir, min_area, padding)
-
-        # 二值化
-        binary = (alpha > 10).astype(np.uint8)
-
-        # 查找轮廓
-        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-
-        extracted = []
-        base_name = Path(image_path).stem
-
-        for idx, contour in enumerate(contours):
-            area = cv2.contourArea(contour)
-            if area < min_area:
-                continue
-
-            x, y, w, h = cv2.boundingRect(contour)
+            return SimpleSpriteExtractor.extract_by_color(image_path, output_dir, min_area, padding,
+                                                          trim=trim, optimize=optimize)
 
-            # 添加填充
-            x = max(0, x - padding)
-            y = max(0, y - padding)
-            w = min(image_np.shape[1] - x, w + 2 * padding)
-            h = min(image_np.shape[0] - y, h + 2 * padding)
-
-            # 裁剪
-            cropped = image_np[y:y+h, x:x+w]
-
-            # 保存
-            output_filename = f"{base_name}_sprite_{idx:03d}.png"
-            output_filepath = output_path / output_filename
-
-            pil_image = Image.fromarray(cropped)
-            pil_image.save(output_filepath)
-
-            extracted.append({
-                'filename': output_filename,
-                'area': area,
-                'bbox': (x, y, w, h)
-            })
-
-            print(f"  提取精灵 {idx}: {output_filename} (面积: {area})")
+        sprites = extract_sprites(image, AlphaBackend(threshold=10),
+                                  min_area=min_area, padding=padding)
+        extracted = save_sprites(sprites, output_dir, "{stem}_sprite_{index:03d}.png",
+                                 trim=trim, optimize=optimize, stem=Path(image_path).stem)
+        for sprite in extracted:
+            print(f"  提取精灵 {sprite['index']}: {sprite['filename']} (面积: {sprite['area']})")
 
         return extracted
 
     @staticmethod
     def extract_by_color(image_path, output_dir, min_area=50, padding=2,
-                        bg_color=None, tolerance=30):
+                        bg_color=None, tolerance=30, trim=False, optimize=False):
         """
         通过背景颜色提取对象
 
         Args:
             bg_color: 背景颜色 (R, G, B)，None则自动检测
-            tolerance: 颜色容差
+            tolerance: 颜色容差（任一通道差值超过容差即为前景）
+            trim: 裁掉透明边，偏移信息写入 trim.json
+            optimize: 写出调色板/高压缩 PNG
         """
-        image = Image.open(image_path).convert('RGB')
-        image_np = np.array(image)
-
-        # 自动检测背景颜色（取四角平均）
-        if bg_color is None:
-            corners = [
-                image_np[0, 0],
-                image_np[0, -1],
-                image_np[-1, 0],
-                image_np[-1, -1]
-            ]
-            bg_color = np.mean(corners, axis=0).astype(int)
-            print(f"自动检测背景颜色: RGB{tuple(bg_color)}")
-
-        # 创建遮罩
-        diff = np.abs(image_np.astype(int) - bg_color)
-        mask = np.any(diff > tolerance, axis=2).astype(np.uint8)
-
-        # 形态学操作清理噪点
-        kernel = np.ones((3, 3), np.uint8)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-
-        # 查找轮廓
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
-
-        extracted = []
-        base_name = Path(image_path).stem
-
-        for idx, contour in enumerate(contours):
-            area = cv2.contourArea(contour)
-            if area < min_area:
-                continue
-
-            x, y, w, h = cv2.boundingRect(contour)
-
-            # 添加填充
-            x = max(0, x - padding)
-            y = max(0, y - padding)
-            w = min(image_np.shape[1] - x, w + 2 * padding)
-            h = min(image_np.shape[0] - y, h + 2 * padding)
-
-            # 裁剪并创建透明背景
-            cropped_rgb = image_np[y:y+h, x:x+w]
-            cropped_mask = mask[y:y+h, x:x+w]
-
-            rgba = np.zeros((h, w, 4), dtype=np.uint8)
-            rgba[:, :, :3] = cropped_rgb
-            rgba[:, :, 3] = cropped_mask * 255
-
-            # 保存
-            output_filename = f"{base_name}_sprite_{idx:03d}.png"
-            output_filepath = output_path / output_filename
-
-            pil_image = Image.fromarray(rgba)
-            pil_image.save(output_filepath)
-
-            extracted.append({
-                'filename': output_filename,
-                'area': area,
-                'bbox': (x, y, w, h)
-            })
-
-            print(f"  提取精灵 {idx}: {output_filename} (面积: {area})")
+        image = load_rgba(image_path)
+
+        backend = ColorKeyBackend(
+            bg_color=bg_color,
+            threshold=tolerance + 1,
+            metric='chebyshev',
+            denoise=True
+        )
+        print(f"背景颜色: RGB{tuple(int(c) for c in backend.background_color(image)[:3])}")
+
+        sprites = extract_sprites(image, backend, min_area=min_area, padding=padding)
+        extracted = save_sprites(sprites, output_dir, "{stem}_sprite_{index:03d}.png",
+                                 trim=trim, optimize=optimize, stem=Path(image_path).stem)
+        for sprite in extracted:
+            print(f"  提取精灵 {sprite['index']}: {sprite['filename']} (面积: {sprite['area']})")
 
         return extracted
 
     @staticmethod
     def extract_grid_sprites(image_path, output_dir, grid_width, grid_height,
-                            padding=0, skip_empty=True, empty_threshold=10):
+                            padding=0, skip_empty=True, empty_threshold=10, trim=False,
+                            optimize=False):
         """
         从网格精灵图中提取（适用于规则排列的精灵图）
 
@@ -412,62 +304,109 @@ class SimpleSpriteExtractor:
             grid_height: 每个精灵的高度
             skip_empty: 跳过空白精灵
             empty_threshold: 空白判断阈值
+            trim: 裁掉透明边，偏移信息写入 trim.json
+            optimize: 写出调色板/高压缩 PNG
         """
-        image = Image.open(image_path).convert('RGBA')
-        image_np = np.array(image)
-
-        img_height, img_width = image_np.shape[:2]
-        cols = img_width // grid_width
-        rows = img_height // grid_height
-
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
+        backend = GridBackend(grid_width, grid_height, skip_empty, empty_threshold)
+        extracted = extract_to_dir(image_path, output_dir, backend,
+                                   "{stem}_grid_{row:02d}_{col:02d}.png", padding=padding,
+                                   trim=trim, optimize=optimize)
+        # 格子左上角（即 GridBackend 区域 bbox 的 x, y，不含 padding）
+        for sprite in extracted:
+            sprite['position'] = (sprite['col'] * grid_width, sprite['row'] * grid_height)
 
-        extracted = []
-        base_name = Path(image_path).stem
-        sprite_idx = 0
+        print(f"  从网格中提取了 {len(extracted)} 个精灵")
+        return extracted
 
-        for row in range(rows):
-            for col in range(cols):
-                x = col * grid_width
-                y = row * grid_height
 
-                # 裁剪
-                cropped = image_np[y:y+grid_height, x:x+grid_width]
+# 每个工作进程各自持有的提取器（顺序模式下即当前进程）
+_worker_state = {}
 
-                # 检查是否为空
-                if skip_empty:
-                    if cropped.shape[2] == 4:
-                        non_transparent = np.sum(cropped[:, :, 3] > empty_threshold)
-                    else:
-                        non_transparent = cropped.size
 
-                    if non_transparent < empty_threshold:
-                        continue
+def _init_worker(use_sam, model_size, cache):
+    """工作进程初始化: 每个进程只加载一次 SAM2 模型"""
+    extractor = None
+    if use_sam:
+        extractor = SAM2ObjectExtractor(model_size=model_size, cache=cache)
+        if not extractor.load_model():
+            print("SAM2 加载失败，切换到简单提取模式")
+            extractor = None
+    _worker_state['extractor'] = extractor
+    _worker_state['use_sam'] = use_sam
+
+
+def _process_image(task):
+    """处理单张图像，返回 (提取结果, 是否记录到构建清单)"""
+    image_file, image_output_dir, kwargs = task
+    extractor = _worker_state.get('extractor')
+
+    print(f"\n处理: {image_file.name}")
+    if extractor is not None:
+        extracted = extractor.extract_objects(
+            str(image_file),
+            str(image_output_dir),
+            **kwargs
+        )
+    else:
+        # 简单模式不限制对象数量
+        simple_kwargs = {k: v for k, v in kwargs.items() if k in ('min_area', 'padding', 'trim', 'optimize')}
 
-                # 保存
-                output_filename = f"{base_name}_grid_{row:02d}_{col:02d}.png"
-                output_filepath = output_path / output_filename
+        # 尝试透明度提取
+        extracted = SimpleSpriteExtractor.extract_by_transparency(
+            str(image_file),
+            str(image_output_dir),
+            **simple_kwargs
+        )
 
-                pil_image = Image.fromarray(cropped)
-                pil_image.save(output_filepath)
+        # 如果没有提取到，尝试颜色提取
+        if not extracted:
+            extracted = SimpleSpriteExtractor.extract_by_color(
+                str(image_file),
+                str(image_output_dir),
+                **simple_kwargs
+            )
 
-                extracted.append({
-                    'filename': output_filename,
-                    'row': row,
-                    'col': col,
-                    'position': (x, y)
-                })
+    # SAM2 加载失败时的简单模式结果不记录，SAM2 可用后会重新提取
+    return extracted, extractor is not None or not _worker_state['use_sam']
 
-                sprite_idx += 1
 
-        print(f"  从网格中提取了 {len(extracted)} 个精灵")
-        return extracted
+def build_images(image_files, output_for, use_sam=True, cache=None, workers=1,
+                 model_size='base', force=False, manifest_dir=None, prune=False, **kwargs):
+    """
+    提取多张图像，跳过源文件和参数都未变化的图像
 
+    Args:
+        output_for: 图像路径 -> 输出目录
+        force: 不查构建清单、全部重新生成（结果仍写入清单）
+        manifest_dir: 构建清单所在目录
+        prune: 清理清单中已不在 image_files 里的图像的输出（批量处理整个目录时）
 
-def process_directory(input_dir, output_dir, use_sam=True, **kwargs):
+    Returns:
+        {文件名: 提取结果}
+    """
+    manifest = BuildManifest.in_dir(manifest_dir)
+    params = {
+        'tool': 'extract_objects_sam2',
+        'mode': 'sam2' if use_sam else 'simple',
+        'model': model_size if use_sam else None,
+        **kwargs,
+    }
+    tasks = [(f.name, f, (f, output_for(f), kwargs)) for f in image_files]
+    return incremental_map(_process_image, tasks, manifest, params, workers,
+                           initializer=_init_worker, initargs=(use_sam, model_size, cache),
+                           force=force, prune=prune)
+
+
+def process_directory(input_dir, output_dir, use_sam=True, cache=None, workers=1,
+                      model_size='base', force=False, **kwargs):
     """
     处理目录中的所有图像
+
+    Args:
+        workers: 并行进程数（1 顺序执行，0 使用全部核心）；
+                 SAM2 模式下每个进程各加载一份模型
+        model_size: SAM2 模型大小
+        force: 不查构建清单，重新生成所有输出
     """
     input_path = Path(input_dir)
     output_path = Path(output_dir)
@@ -475,53 +414,20 @@ def process_directory(input_dir, output_dir, use_sam=True, **kwargs):
     # 支持的图像格式
     image_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp'}
 
-    # 查找所有图像
-    image_files = [f for f in input_path.iterdir()
-                   if f.suffix.lower() in image_extensions]
+    # 查找所有图像（排序保证输出顺序确定）
+    image_files = sorted(f for f in input_path.iterdir()
+                         if f.suffix.lower() in image_extensions)
 
     if not image_files:
         print(f"在 {input_dir} 中没有找到图像文件")
-        return
+        return {}
 
     print(f"找到 {len(image_files)} 个图像文件")
 
-    if use_sam:
-        extractor = SAM2ObjectExtractor()
-        if not extractor.load_model():
-            print("SAM2 加载失败，切换到简单提取模式")
-            use_sam = False
-
-    all_extracted = {}
-
-    for image_file in image_files:
-        print(f"\n处理: {image_file.name}")
-        image_output_dir = output_path / image_file.stem
-
-        if use_sam:
-            extracted = extractor.extract_objects(
-                str(image_file),
-                str(image_output_dir),
-                **kwargs
-            )
-        else:
-            # 尝试透明度提取
-            extracted = SimpleSpriteExtractor.extract_by_transparency(
-                str(image_file),
-                str(image_output_dir),
-                **kwargs
-            )
-
-            # 如果没有提取到，尝试颜色提取
-            if not extracted:
-                extracted = SimpleSpriteExtractor.extract_by_color(
-                    str(image_file),
-                    str(image_output_dir),
-                    **kwargs
-                )
-
-        all_extracted[image_file.name] = extracted
-
-    return all_extracted
+    # 每张图像输出到独立子目录，文件名只取决于图像本身，与进程调度无关
+    return build_images(image_files, lambda f: output_path / f.stem, use_sam, cache,
+                        workers, model_size, force, manifest_dir=output_path, prune=True,
+                        **kwargs)
 
 
 def main():
@@ -536,6 +442,9 @@ def main():
   # 处理整个目录
   python extract_objects_sam2.py -i assets/ -o extracted/ --batch
 
+  # 4 个进程并行处理目录（简单模式）
+  python extract_objects_sam2.py -i assets/ -o extracted/ --batch --simple --workers 4
+
   # 使用简单模式（不需要深度学习）
   python extract_objects_sam2.py -i sprites.png -o output/ --simple
 
@@ -555,11 +464,31 @@ def main():
     parser.add_argument('--padding', type=int, default=5, help='边界填充像素（默认5）')
     parser.add_argument('--model', choices=['tiny', 'small', 'base', 'large'],
                        default='base', help='SAM2模型大小（默认base）')
+    parser.add_argument('--cache-dir', default=None,
+                       help='SAM2 遮罩缓存目录（默认 ~/.cache/spritekit）')
+    parser.add_argument('--cache-size', type=int, default=512, help='缓存大小上限 MB（默认512）')
+    parser.add_argument('--no-cache', action='store_true', help='禁用 SAM2 遮罩缓存')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='批量模式并行进程数（默认1，0 表示使用全部CPU核心）')
+    parser.add_argument('--force', action='store_true',
+                       help='忽略构建清单，重新生成所有输出（默认只处理有变化的图像）')
+    parser.add_argument('--trim', action='store_true',
+                       help='裁掉精灵四周的透明边，原尺寸和偏移写入输出目录的 trim.json')
+    parser.add_argument('--optimize-png', action='store_true',
+                       help='输出无损压缩到最小的 PNG（颜色不超过256种时写调色板PNG）')
+    parser.add_argument('--profile', action='store_true',
+                       help='统计各阶段耗时和内存，结束时打印汇总表')
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                       help='同时写出 Chrome trace-event JSON（隐含 --profile）')
 
     args = parser.parse_args()
 
+    if args.profile or args.profile_trace:
+        instrument.enable(trace_path=args.profile_trace)
+
     input_path = Path(args.input)
     output_path = Path(args.output)
+    cache = None if args.no_cache else RegionCache(args.cache_dir, args.cache_size * 1024 * 1024)
 
     if not input_path.exists():
         print(f"错误: 输入路径不存在: {args.input}")
@@ -576,7 +505,9 @@ def main():
             str(input_path),
             str(output_path),
             args.grid[0],
-            args.grid[1]
+            args.grid[1],
+            trim=args.trim,
+            optimize=args.optimize_png
         )
         print(f"\n完成! 提取了 {len(extracted)} 个精灵")
         return
@@ -587,48 +518,37 @@ def main():
             str(input_path),
             str(output_path),
             use_sam=not args.simple,
+            cache=cache,
+            workers=args.workers,
+            model_size=args.model,
+            force=args.force,
             min_area=args.min_area,
             max_objects=args.max_objects,
-            padding=args.padding
+            padding=args.padding,
+            trim=args.trim,
+            optimize=args.optimize_png
         )
 
         total = sum(len(v) for v in results.values())
         print(f"\n完成! 共提取了 {total} 个对象")
         return
 
-    # 单张图像处理
-    if args.simple:
-        extracted = SimpleSpriteExtractor.extract_by_transparency(
-            str(input_path),
-            str(output_path),
-            min_area=args.min_area,
-            padding=args.padding
-        )
-        if not extracted:
-            extracted = SimpleSpriteExtractor.extract_by_color(
-                str(input_path),
-                str(output_path),
-                min_area=args.min_area,
-                padding=args.padding
-            )
-    else:
-        extractor = SAM2ObjectExtractor(model_size=args.model)
-        if extractor.load_model():
-            extracted = extractor.extract_objects(
-                str(input_path),
-                str(output_path),
-                min_area=args.min_area,
-                max_objects=args.max_objects,
-                padding=args.padding
-            )
-        else:
-            print("SAM2 不可用，使用简单模式")
-            extracted = SimpleSpriteExtractor.extract_by_transparency(
-                str(input_path),
-                str(output_path),
-                min_area=args.min_area,
-                padding=args.padding
-            )
+    # 单张图像处理（SAM2 不可用时自动切换到简单模式）
+    results = build_images(
+        [input_path],
+        lambda f: output_path,
+        use_sam=not args.simple,
+        cache=cache,
+        model_size=args.model,
+        force=args.force,
+        manifest_dir=output_path,
+        min_area=args.min_area,
+        max_objects=args.max_objects,
+        padding=args.padding,
+        trim=args.trim,
+        optimize=args.optimize_png
+    )
+    extracted = results[input_path.name]
 
     print(f"\n完成! 提取了 {len(extracted)} 个对象")
 
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+PNG 无损压缩
+==================================
+
+功能:
+- 递归重新编码目录中的 PNG（如 assets/ 下的游戏素材、提取结果）
+- 颜色不超过 256 种时写调色板 PNG（带 tRNS），否则写 RGB/RGBA
+- 逐一尝试多种行过滤和 zlib 策略，只在结果更小时覆盖原文件
+- 解码结果与原图逐像素一致（全透明像素的 RGB 除外）
+- 只处理 8 位 L/LA/P/RGB/RGBA；16 位图像和带色彩管理（gAMA/cHRM/sRGB/iCCP）、
+  文本或 EXIF 数据块的文件保持原样（重新编码会丢失精度或这些数据块）
+- 同步更新目录中的构建清单，重新运行提取/分类时不会把文件当作已损坏
+"""
+
+import os
+import argparse
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from spritekit import BuildManifest, encode_png, iter_images, normalize_transparent
+from spritekit import instrument
+from spritekit.manifest import MANIFEST_NAME
+from spritekit.meta import read_png_header
+
+
+SUPPORTED_MODES = ('L', 'LA', 'P', 'RGB', 'RGBA')
+# encode_png 不写出这些数据块，对应的 PIL info 键
+UNSUPPORTED_INFO = ('gamma', 'chromaticity', 'srgb', 'icc_profile', 'exif')
+
+
+def _reencodable(img, header):
+    """能否无损重新编码: 8 位（调色板可低于 8 位）且没有会被丢掉的数据块"""
+    if header is None or img.mode not in SUPPORTED_MODES:
+        return False
+    if header['color_type'] != 3 and header['bit_depth'] != 8:
+        return False
+    return not img.text and not any(key in img.info for key in UNSUPPORTED_INFO)
+
+
+def _optimize_file(task):
+    """重新编码单个文件（工作进程中运行），返回 (原大小, 新大小, 新数据或 None)"""
+    path, dry_run = task
+    original = os.path.getsize(path)
+    try:
+        with instrument.stage('load'), Image.open(path) as img:
+            rgba = np.asarray(img.convert('RGBA'))
+            # 文本块可能在 IDAT 之后，解码后 img.text/img.info 才完整
+            if not _reencodable(img, read_png_header(path)):
+                return original, original, None
+    except (OSError, ValueError):
+        return original, original, None
+
+    with instrument.stage('encode'):
+        data = encode_png(rgba)
+    if len(data) >= original:
+        return original, original, None
+    if not dry_run:
+        with instrument.stage('write'):
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, 'wb') as f:
+                f.write(data)
+            # 写入前再解码一次确认无损
+            with Image.open(tmp) as img:
+                same = (normalize_transparent(np.asarray(img.convert('RGBA')))
+                        == normalize_transparent(rgba)).all()
+            if not same:
+                os.remove(tmp)
+                return original, original, None
+            os.replace(tmp, path)
+    return original, len(data), path
+
+
+def optimize_dirs(input_dirs, workers=1, dry_run=False):
+    """
+    重新压缩目录中的所有 PNG
+
+    Returns:
+        (原总大小, 新总大小, 改写的文件列表)
+    """
+    paths = sorted({str(p) for d in input_dirs for p in Path(d).rglob('*.png')})
+    print(f"找到 {len(paths)} 个 PNG 文件")
+
+    before = after = 0
+    rewritten = []
+    for path, (old, new, done) in zip(paths, iter_images(_optimize_file,
+                                                         [(p, dry_run) for p in paths],
+                                                         workers, chunksize=8)):
+        before += old
+        after += new
+        if done:
+            rewritten.append(path)
+            print(f"  {path}: {old:,} -> {new:,} 字节 (-{1 - new / old:.0%})")
+
+    if rewritten and not dry_run:
+        manifests = {p.resolve() for d in input_dirs for p in Path(d).rglob(MANIFEST_NAME)}
+        for manifest_path in sorted(manifests):
+            manifest = BuildManifest(manifest_path)
+            if manifest.refresh_outputs(rewritten):
+                manifest.save()
+
+    return before, after, rewritten
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='PNG 无损压缩 - 调色板 + 多种过滤/压缩策略',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 压缩游戏素材
+  python optimize_png.py -i assets/players assets/enemies assets/bosses
+
+  # 只统计可节省的大小
+  python optimize_png.py -i assets --dry-run --workers 0
+        """
+    )
+
+    parser.add_argument('-i', '--input', nargs='+', required=True, help='输入目录（递归查找 PNG）')
+    parser.add_argument('--dry-run', action='store_true', help='只统计，不改写文件')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行进程数 (默认: 1，0 表示使用全部CPU核心)')
+    parser.add_argument('--profile', action='store_true',
+                        help='统计各阶段耗时和内存，结束时打印汇总表')
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                        help='同时写出 Chrome trace-event JSON（隐含 --profile）')
+
+    args = parser.parse_args()
+
+    if args.profile or args.profile_trace:
+        instrument.enable(trace_path=args.profile_trace)
+
+    before, after, rewritten = optimize_dirs(args.input, args.workers, args.dry_run)
+    if before:
+        action = '可压缩' if args.dry_run else '已压缩'
+        print(f"\n{action} {len(rewritten)} 个文件: {before:,} -> {after:,} 字节 "
+              f"(节省 {before - after:,} 字节，{1 - after / before:.1%})")
+
+
+if __name__ == '__main__':
+    main()
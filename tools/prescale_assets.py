@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按绘制尺寸预缩放素材
+==================================
+
+功能:
+- 游戏以固定尺寸绘制精灵（见 js/config.js 与 js/entities.js 中各 draw 方法），
+  而素材原图大得多（角色/敌人 96x96，树 240x300 左右），浏览器每帧都要缩放
+- 构建时按实际绘制尺寸生成缩小版本（1x，可选 2x 供高 DPI 屏幕），
+  面积平均或最近邻缩放，透明边缘不产生黑边
+- 输出 variants.json，把素材 id 映射到各倍率的文件；
+  缩小幅度不足 20% 的倍率直接引用原图
+- 构建清单记录源文件和参数，未变化的素材直接跳过
+- 用 --categories 只处理部分分类时，variants.json 中其它分类保持不变
+
+绘制尺寸（1x 边长）:
+  players  CONFIG.player.size * 2.5               Player.draw
+  enemies  CONFIG.enemy.size * 1.5(精英) * 2.2     Enemy.draw
+  bosses   CONFIG.enemy.size * 2.5 * 2.2           Enemy.draw
+  weapons  40                                      drawWeaponSprite 最大调用尺寸
+  items    16 * 2                                  Drop.draw（金币最大 16）
+  trees    原图 * 0.6                               Obstacle 缩放因子上限
+草丛和石头在游戏中是放大绘制的，不需要缩小版本。
+
+variants.json 格式:
+
+    {
+      "version": 1, "filter": "area", "densities": [1, 2],
+      "sprites": {
+        "players": {
+          "warrior": {"source": "assets/players/warrior.png",
+                      "sourceSize": {"w": 96, "h": 96}, "renderSize": 45,
+                      "variants": {"1x": {"file": "assets/scaled/players/warrior@1x.png",
+                                          "w": 45, "h": 45}, "2x": {...}}}
+        }
+      }
+    }
+"""
+
+import re
+import json
+import argparse
+from pathlib import Path
+
+from spritekit import BuildManifest, fit_size, downscale, iter_images, load_rgba, save_sprite
+from spritekit import instrument
+
+from build_atlas import ASSET_TABLES, REPO_ROOT, parse_asset_config
+
+
+VARIANTS_VERSION = 1
+
+# 缩小后长边仍超过原图的该比例时直接用原图
+MIN_REDUCTION = 0.8
+
+# Obstacle 中树木的最大缩放因子（js/entities.js）
+TREE_MAX_SCALE = 0.6
+TREE_DIR = 'assets/environment/trees'
+
+SIZE_RE = re.compile(r"\b(player|enemy)\s*:\s*\{\s*size\s*:\s*(\d+(?:\.\d+)?)")
+
+
+def render_sizes(config_js):
+    """
+    由 js/config.js 推算各分类的最大绘制边长（像素，1x）
+
+    Returns:
+        {分类: 边长}；trees 按原图比例缩放，不在其中
+    """
+    sizes = {'player': 18, 'enemy': 14}
+    if Path(config_js).exists():
+        text = Path(config_js).read_text(encoding='utf-8')
+        sizes.update({name: float(value) for name, value in SIZE_RE.findall(text)})
+    return {
+        'players': sizes['player'] * 2.5,
+        'enemies': sizes['enemy'] * 1.5 * 2.2,
+        'bosses': sizes['enemy'] * 2.5 * 2.2,
+        'weapons': 40,
+        'items': 16 * 2,
+    }
+
+
+def collect_trees(root=REPO_ROOT):
+    """树木素材（sprite_classifier 复制到 assets/environment/trees 的文件）"""
+    return [('trees', path.stem, str(path.relative_to(root)))
+            for path in sorted((Path(root) / TREE_DIR).glob('*.png'))]
+
+
+def _rel(path, root):
+    try:
+        return Path(path).resolve().relative_to(Path(root).resolve()).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def _scale_asset(task):
+    """生成单个素材的各倍率版本（工作进程中运行），返回变体列表"""
+    source, output_dir, asset_id, render, densities, filter, optimize = task
+    rgba = load_rgba(source)
+    height, width = rgba.shape[:2]
+    if render is None:
+        render = max(width, height) * TREE_MAX_SCALE
+
+    results = []
+    for density in densities:
+        size = fit_size((width, height), render * density)
+        entry = {'density': f"{density}x", 'w': size[0], 'h': size[1],
+                 'renderSize': round(render, 1), 'sourceSize': {'w': width, 'h': height}}
+        if max(size) > max(width, height) * MIN_REDUCTION:
+            entry.update(w=width, h=height, file=str(source))
+            results.append(entry)
+            continue
+        with instrument.stage('scale'):
+            scaled = downscale(rgba, size, filter)
+        filepath = Path(output_dir) / f"{asset_id}@{density}x.png"
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        save_sprite(scaled, filepath, optimize)
+        entry.update(file=str(filepath), generated=True)
+        results.append(entry)
+    return results
+
+
+def prescale(entries, output_dir, sizes, densities=(1, 2), filter='area', optimize=False,
+             workers=1, force=False, root=REPO_ROOT):
+    """
+    生成缩小版本和 variants.json
+
+    Args:
+        entries: [(分类, id, 路径), ...]，相对路径相对于 root
+        output_dir: 输出目录，文件为 {分类}/{id}@{倍率}x.png
+        sizes: {分类: 1x 绘制边长}，不在其中的分类按 TREE_MAX_SCALE 缩放
+        densities: 倍率列表
+        filter: 'area' 或 'nearest'
+        force: 不查构建清单、全部重新生成（结果仍写入清单）
+
+    Returns:
+        variants.json 的内容
+    """
+    output_dir = Path(output_dir)
+    manifest = BuildManifest.in_dir(output_dir)
+    params = {'tool': 'prescale_assets', 'sizes': sizes, 'densities': list(densities),
+              'filter': filter, 'optimize': optimize, 'min_reduction': MIN_REDUCTION}
+
+    tasks = []
+    missing = []
+    for category, asset_id, path in entries:
+        source = Path(root) / path
+        if not source.exists():
+            missing.append(str(source))
+            continue
+        tasks.append((f"{category}/{asset_id}", str(source),
+                      (str(source), str(output_dir / category), asset_id, sizes.get(category),
+                       list(densities), filter, optimize)))
+
+    if missing:
+        print(f"警告: {len(missing)} 个素材文件不存在，已跳过")
+        for path in missing:
+            print(f"  {path}")
+
+    # 与 incremental_map 相同的跳过逻辑，但引用原图的倍率不算作输出文件
+    results = {}
+    pending = []
+    for target, source, arg in tasks:
+        cached = None if force else manifest.lookup(target, source, params)
+        if cached is not None:
+            results[target] = cached
+        else:
+            pending.append((target, source, arg))
+    if len(pending) < len(tasks):
+        print(f"跳过 {len(tasks) - len(pending)} 个未变化的素材")
+
+    outputs = iter_images(_scale_asset, [arg for _, _, arg in pending], workers)
+    for (target, source, _), variants in zip(pending, outputs):
+        results[target] = variants
+        manifest.record(target, source, params,
+                        [v['file'] for v in variants if v.get('generated')], variants)
+    # 只清理本次处理的分类中已不存在的素材（--categories 只选部分分类时不动其它分类）
+    categories = {category for category, _, _ in entries}
+    keep = [target for target, _, _ in tasks]
+    keep += [target for target in manifest.entries if target.split('/', 1)[0] not in categories]
+    manifest.prune(keep, params)
+    manifest.save()
+
+    sprites = {}
+    before = after = 0
+    for target, source, _ in tasks:
+        variants = results[target]
+        category, asset_id = target.split('/', 1)
+        first = variants[0]
+        sprites.setdefault(category, {})[asset_id] = {
+            'source': _rel(source, root),
+            'sourceSize': {'w': first['sourceSize']['w'], 'h': first['sourceSize']['h']},
+            'renderSize': first['renderSize'],
+            'variants': {v['density']: {'file': _rel(v['file'], root), 'w': v['w'], 'h': v['h']}
+                         for v in variants},
+        }
+        before += first['sourceSize']['w'] * first['sourceSize']['h']
+        after += first['w'] * first['h']
+
+    variants = {'version': VARIANTS_VERSION, 'filter': filter, 'densities': list(densities),
+                'sprites': sprites}
+    # 只替换本次处理的分类，其它分类沿用现有 variants.json（文件仍在输出目录中）
+    kept = _previous_sprites(output_dir / 'variants.json', variants, categories)
+    variants['sprites'] = {**kept, **sprites}
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(output_dir / 'variants.json', 'w', encoding='utf-8') as f:
+        json.dump(variants, f, ensure_ascii=False, indent=1)
+
+    print(f"处理 {len(results)} 个素材")
+    if before:
+        print(f"{densities[0]}x 像素总数: {before:,} -> {after:,} ({after / before:.1%})")
+    print(f"变体清单: {output_dir / 'variants.json'}")
+    return variants
+
+
+def _previous_sprites(path, variants, categories):
+    """
+    现有 variants.json 中不在 categories 里的分类
+
+    版本、缩放方式或倍率不同时，旧条目与新清单的顶层字段不符，不沿用。
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            previous = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    others = {category: entries for category, entries in previous.get('sprites', {}).items()
+              if category not in categories}
+    if not others:
+        return {}
+    if any(previous.get(key) != variants[key] for key in ('version', 'filter', 'densities')):
+        print(f"警告: 现有 {path.name} 的缩放方式或倍率不同，未包含分类 {', '.join(sorted(others))}")
+        return {}
+    return others
+
+
+def _parse_size(text):
+    category, _, value = text.partition('=')
+    try:
+        return category, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"格式应为 分类=像素: {text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='按绘制尺寸预缩放素材 - 生成 1x/2x 缩小版本和 variants.json',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 按 js/config.js 的绘制尺寸生成全部素材的 1x/2x 版本
+  python prescale_assets.py
+
+  # 只处理树木和 Boss，最近邻缩放，压缩 PNG
+  python prescale_assets.py --categories trees bosses --filter nearest --optimize-png
+
+  # 敌人改按 32 像素绘制，只要 1x
+  python prescale_assets.py --size enemies=32 --densities 1
+        """
+    )
+
+    parser.add_argument('-o', '--output', default=str(REPO_ROOT / 'assets' / 'scaled'),
+                        help='输出目录 (默认: assets/scaled)')
+    parser.add_argument('--config', default=str(REPO_ROOT / 'js' / 'assets.js'),
+                        help='素材配置文件 (默认: js/assets.js)')
+    parser.add_argument('--game-config', default=str(REPO_ROOT / 'js' / 'config.js'),
+                        help='游戏配置文件，读取角色/敌人尺寸 (默认: js/config.js)')
+    parser.add_argument('--categories', nargs='*',
+                        default=list(ASSET_TABLES.values()) + ['trees'],
+                        help='处理的分类 (默认: 全部，含 trees)')
+    parser.add_argument('--densities', nargs='+', type=int, default=[1, 2],
+                        help='生成的倍率 (默认: 1 2)')
+    parser.add_argument('--filter', choices=['area', 'nearest'], default='area',
+                        help='缩放方式: area 面积平均 / nearest 最近邻 (默认: area)')
+    parser.add_argument('--size', type=_parse_size, action='append', default=[],
+                        metavar='分类=像素', help='覆盖某分类的 1x 绘制边长，可重复')
+    parser.add_argument('--optimize-png', action='store_true',
+                        help='输出无损压缩到最小的 PNG（颜色不超过256种时写调色板PNG）')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行进程数 (默认: 1，0 表示使用全部CPU核心)')
+    parser.add_argument('--force', action='store_true',
+                        help='忽略构建清单，重新生成所有输出 (默认只处理有变化的素材)')
+    parser.add_argument('--profile', action='store_true',
+                        help='统计各阶段耗时和内存，结束时打印汇总表')
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                        help='同时写出 Chrome trace-event JSON（隐含 --profile）')
+
+    args = parser.parse_args()
+
+    if args.profile or args.profile_trace:
+        instrument.enable(trace_path=args.profile_trace)
+
+    sizes = render_sizes(args.game_config)
+    sizes.update(args.size)
+
+    entries = [e for e in parse_asset_config(args.config) if e[0] in args.categories]
+    if 'trees' in args.categories:
+        entries.extend(collect_trees())
+
+    prescale(entries, args.output, sizes, densities=sorted(set(args.densities)),
+             filter=args.filter, optimize=args.optimize_png, workers=args.workers,
+             force=args.force)
+
+
+if __name__ == '__main__':
+    main()
@@ -18,23 +18,32 @@ import sys
 import argparse
 import numpy as np
 from pathlib import Path
-from PIL import Image
-import cv2
+
+from spritekit import (
+    cut_sprite, load_rgba, save_sprites, merge_masks, merge_groups, dedupe_regions,
+    mask_region, filter_regions, RegionCache, BuildManifest, incremental_map, stage,
+)
+from spritekit import instrument
+from spritekit.optional import has_module
 
 
 class SAM2AutoExtractor:
     """SAM2 自动对象提取器"""
 
-    def __init__(self, model_size='base', device=None):
+    def __init__(self, model_size='base', device=None, point_batch_size=64, cache=None):
         """
         初始化
 
         Args:
             model_size: 模型大小 ('tiny', 'small', 'base', 'large')
             device: 设备 ('cuda', 'cpu', None=自动)
+            point_batch_size: 点提示分割时每批解码的点数
+            cache: RegionCache，缓存图像特征和点提示遮罩（None 不缓存）
         """
         self.model_size = model_size
         self.device = device
+        self.point_batch_size = point_batch_size
+        self.cache = cache
         self.model = None
         self.sam_predictor = None
 
@@ -48,6 +57,10 @@ class SAM2AutoExtractor:
 
     def load_model(self):
         """加载SAM2模型"""
+        if not has_module('ultralytics'):
+            print("SAM2 加载失败: 未安装 ultralytics")
+            print("请安装: pip install ultralytics")
+            return False
         try:
             from ultralytics import SAM
             print(f"正在加载 SAM2 模型: {self.model_name}")
@@ -59,6 +72,67 @@ class SAM2AutoExtractor:
             print("请安装: pip install ultralytics")
             return False
 
+    def load_predictor(self):
+        """加载可复用图像特征的 SAM2 预测器（点提示分割用）"""
+        if self.sam_predictor is not None:
+            return True
+        if not has_module('ultralytics'):
+            return False
+        try:
+            from ultralytics.models.sam import SAM2Predictor
+            overrides = dict(task='segment', mode='predict', model=self.model_name,
+                             imgsz=1024, save=False, verbose=False)
+            if self.device:
+                overrides['device'] = self.device
+            self.sam_predictor = SAM2Predictor(overrides=overrides)
+            return True
+        except Exception as e:
+            print(f"SAM2 预测器加载失败，点提示将逐批重新编码图像: {e}")
+            return False
+
+    def set_image(self, image_path):
+        """编码图像；缓存中有该图像的特征时跳过图像编码器"""
+        predictor = self.sam_predictor
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(image_path, model=self.model_name, stage='image_features')
+            arrays = self.cache.get_arrays(key, 'features')
+            if arrays is not None:
+                try:
+                    import torch
+                    if predictor.model is None:
+                        predictor.setup_model()
+                    predictor.setup_source(str(image_path))
+                    tensors = {name: torch.from_numpy(arr).to(predictor.device)
+                               for name, arr in arrays.items()}
+                    if 'image_embed' in tensors:
+                        # SAM2: {'image_embed', 'high_res_feats': [...]}
+                        levels = sum(1 for name in tensors if name.startswith('high_res_feats_'))
+                        predictor.features = {
+                            'image_embed': tensors['image_embed'],
+                            'high_res_feats': [tensors[f'high_res_feats_{i}'] for i in range(levels)],
+                        }
+                    else:
+                        predictor.features = tensors['features']
+                    print("图像特征缓存命中")
+                    return
+                except Exception as e:
+                    print(f"图像特征缓存不可用，重新编码: {e}")
+
+        predictor.set_image(str(image_path))
+
+        if key is not None:
+            features = predictor.features
+            if isinstance(features, dict):
+                tensors = {'image_embed': features['image_embed']}
+                for i, feat in enumerate(features['high_res_feats']):
+                    tensors[f'high_res_feats_{i}'] = feat
+            else:
+                tensors = {'features': features}
+            self.cache.put_arrays(
+                key, {name: t.detach().cpu().numpy() for name, t in tensors.items()}, 'features'
+            )
+
     def generate_grid_points(self, width, height, points_per_side=32):
         """生成网格采样点"""
         x_coords = np.linspace(0, width - 1, points_per_side)
@@ -69,32 +143,57 @@ class SAM2AutoExtractor:
                 points.append([int(x), int(y)])
         return np.array(points)
 
-    def segment_with_points(self, image_path, points):
-        """使用点提示进行分割"""
-        all_masks = []
+    def segment_with_points(self, image_path, points, batch_size=None):
+        """
+        使用点提示进行分割
 
-        # 批量处理点
-        batch_size = 16
-        for i in range(0, len(points), batch_size):
-            batch_points = points[i:i+batch_size]
+        图像只编码一次，所有点按批送入解码器，每个点作为一个独立提示。
 
-            for point in batch_points:
+        Args:
+            image_path: 输入图像路径
+            points: (N, 2) 点坐标
+            batch_size: 每批点数，None 使用 point_batch_size
+
+        Returns:
+            区域列表（遮罩只保存边界框内的局部窗口）
+        """
+        batch_size = batch_size or self.point_batch_size
+        points = np.asarray(points).reshape(-1, 2)
+
+        if self.load_predictor():
+            predictor = self.sam_predictor
+            self.set_image(image_path)
+        else:
+            # 回退: 每批调用一次模型，仍按批提示，但每批都会重新编码图像
+            predictor = None
+
+        regions = []
+        try:
+            for i in range(0, len(points), batch_size):
+                batch = points[i:i+batch_size]
+                # (B, 1, 2): B 个对象，每个对象一个正向点
+                prompts = dict(points=batch[:, None, :].tolist(), labels=[[1]] * len(batch))
                 try:
-                    results = self.model(
-                        image_path,
-                        points=[point.tolist()],
-                        labels=[1]
-                    )
-
-                    for result in results:
-                        if result.masks is not None:
-                            for mask_tensor in result.masks.data:
-                                mask_np = mask_tensor.cpu().numpy().astype(np.uint8)
-                                all_masks.append(mask_np)
+                    if predictor is not None:
+                        results = predictor(**prompts)
+                    else:
+                        results = self.model(str(image_path), **prompts)
                 except Exception as e:
+                    print(f"  点提示批次 {i // batch_size} 失败: {e}")
                     continue
 
-        return all_masks
+                for result in results:
+                    if result.masks is None:
+                        continue
+                    for mask_tensor in result.masks.data.cpu().numpy():
+                        region = mask_region(mask_tensor > 0, len(regions))
+                        if region is not None:
+                            regions.append(region)
+        finally:
+            if predictor is not None:
+                predictor.reset_image()
+
+        return regions
 
     def auto_segment_by_contours(self, image_path, min_area=100, dist_thresh=0.02, enable_merge=False):
         """
@@ -107,170 +206,92 @@ class SAM2AutoExtractor:
             dist_thresh: 距离变换阈值 (未使用)
             enable_merge: 是否启用智能合并 (默认False)
         """
-        image = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+        import cv2
 
-        if image.shape[2] == 4:
-            # 有Alpha通道，用它来检测对象
-            alpha = image[:, :, 3]
-            binary = (alpha > 10).astype(np.uint8) * 255
-        else:
-            # 无Alpha，用边缘检测
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-            binary = cv2.adaptiveThreshold(
-                gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                cv2.THRESH_BINARY_INV, 11, 2
-            )
+        with stage('load'):
+            image = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
+
+        with stage('mask'):
+            if image.shape[2] == 4:
+                # 有Alpha通道，用它来检测对象
+                alpha = image[:, :, 3]
+                binary = (alpha > 10).astype(np.uint8) * 255
+            else:
+                # 无Alpha，用边缘检测
+                gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                binary = cv2.adaptiveThreshold(
+                    gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                    cv2.THRESH_BINARY_INV, 11, 2
+                )
 
         # 直接检测连通区域
         num_labels, labels, stats, centroids = cv2.connectedComponentsWithStats(binary, connectivity=8)
 
-        # 收集所有区域信息，包括遮罩
+        # 收集所有区域信息，遮罩只保存边界框内的局部窗口
         regions = []
         for i in range(1, num_labels):
-            area = stats[i, cv2.CC_STAT_AREA]
+            area = int(stats[i, cv2.CC_STAT_AREA])
             if area < min_area // 4:  # 使用较小阈值，后面会合并小的树干
                 continue
 
-            x = stats[i, cv2.CC_STAT_LEFT]
-            y = stats[i, cv2.CC_STAT_TOP]
-            w = stats[i, cv2.CC_STAT_WIDTH]
-            h = stats[i, cv2.CC_STAT_HEIGHT]
+            x = int(stats[i, cv2.CC_STAT_LEFT])
+            y = int(stats[i, cv2.CC_STAT_TOP])
+            w = int(stats[i, cv2.CC_STAT_WIDTH])
+            h = int(stats[i, cv2.CC_STAT_HEIGHT])
             cx, cy = centroids[i]
 
-            # 创建该区域的遮罩
-            mask = (labels == i).astype(np.uint8)
-
             regions.append({
                 'id': i,
                 'center': [int(cx), int(cy)],
                 'bbox': [x, y, x + w, y + h],
                 'area': area,
-                'mask': mask,
-                'merged': False,
-                'merged_into': None
+                'mask': labels[y:y+h, x:x+w] == i
             })
 
         print(f"检测到 {len(regions)} 个连通区域")
 
         # 智能合并：将树干合并到其上方的树冠（仅当启用时）
+        # 按底边排序的索引查找候选树冠，并查集处理链式合并
         if enable_merge:
-            for i, r_trunk in enumerate(regions):
-                if r_trunk['merged']:
-                    continue
-
-                x1, y1, x2, y2 = r_trunk['bbox']
-                trunk_cx = (x1 + x2) / 2
-                trunk_width = x2 - x1
-                trunk_area = r_trunk['area']
-
-                best_crown = None
-                best_gap = float('inf')
-
-                for j, r_crown in enumerate(regions):
-                    if i == j or r_crown['merged']:
-                        continue
-
-                    x1_c, y1_c, x2_c, y2_c = r_crown['bbox']
-                    crown_cx = (x1_c + x2_c) / 2
-                    crown_width = x2_c - x1_c
-                    crown_area = r_crown['area']
-
-                    # 树干应该在树冠下方
-                    vertical_gap = y1 - y2_c  # 树干顶部 - 树冠底部
-                    if vertical_gap < 0 or vertical_gap > 15:
-                        continue
-
-                    # 树冠通常比树干大
-                    if crown_area < trunk_area * 0.8:
-                        continue
-
-                    # 水平中心应该对齐
-                    center_diff = abs(trunk_cx - crown_cx)
-                    max_center_diff = max(trunk_width, crown_width) * 0.5
-                    if center_diff > max_center_diff:
-                        continue
-
-                    # 树干宽度不应该比树冠宽太多
-                    if trunk_width > crown_width * 1.5:
-                        continue
-
-                    if vertical_gap < best_gap:
-                        best_gap = vertical_gap
-                        best_crown = j
-
-                if best_crown is not None:
-                    r_trunk['merged'] = True
-                    r_trunk['merged_into'] = best_crown
+            groups = merge_groups(
+                [r['bbox'] for r in regions],
+                [r['area'] for r in regions],
+                max_gap=15
+            )
+        else:
+            groups = {i: [i] for i in range(len(regions))}
 
         # 生成最终的遮罩列表
         masks = []
-        for i, region in enumerate(regions):
-            if region['merged']:
-                continue
-
-            # 合并所有属于这个区域的遮罩
-            combined_mask = region['mask'].copy()
-
-            # 找到所有合并到这个区域的子区域
-            if enable_merge:
-                for other in regions:
-                    if other['merged_into'] == i:
-                        combined_mask = np.maximum(combined_mask, other['mask'])
-
-            area = np.sum(combined_mask > 0)
+        for root, members in groups.items():
+            parts = []
+            for m in members:
+                x1, y1, x2, y2 = regions[m]['bbox']
+                parts.append({'mask': regions[m]['mask'], 'bbox': (x1, y1, x2 - x1, y2 - y1)})
+
+            # 在外接框窗口内合并局部遮罩
+            combined_mask, bbox, area = merge_masks(parts)
             if area < min_area:
                 continue
 
-            coords = np.where(combined_mask > 0)
-            if len(coords[0]) > 0:
-                y_min, y_max = coords[0].min(), coords[0].max()
-                x_min, x_max = coords[1].min(), coords[1].max()
-
-                masks.append({
-                    'mask': combined_mask,
-                    'bbox': (x_min, y_min, x_max - x_min + 1, y_max - y_min + 1),
-                    'area': area,
-                    'center': region['center']
-                })
+            masks.append({
+                'mask': combined_mask,
+                'bbox': bbox,
+                'area': area,
+                'center': regions[root]['center']
+            })
 
         print(f"{'合并后生成' if enable_merge else '生成'} {len(masks)} 个对象遮罩")
         return masks
 
     def remove_duplicate_masks(self, masks, iou_thresh=0.5):
-        """移除重复/高度重叠的遮罩"""
-        if len(masks) <= 1:
-            return masks
-
-        # 按面积排序
-        masks = sorted(masks, key=lambda x: x['area'], reverse=True)
-
-        keep = []
-        used = set()
-
-        for i, mask_i in enumerate(masks):
-            if i in used:
-                continue
-
-            keep.append(mask_i)
-
-            for j in range(i + 1, len(masks)):
-                if j in used:
-                    continue
-
-                # 计算IoU
-                intersection = np.logical_and(mask_i['mask'], masks[j]['mask']).sum()
-                union = np.logical_or(mask_i['mask'], masks[j]['mask']).sum()
-
-                if union > 0:
-                    iou = intersection / union
-                    if iou > iou_thresh:
-                        used.add(j)
-
-        return keep
+        """移除重复/高度重叠的遮罩（边界框扫描线索引 + 窗口/批量IoU）"""
+        return dedupe_regions(masks, iou_thresh)
 
     def extract_objects(self, image_path, output_dir,
                        min_area=100, max_objects=200, padding=5,
-                       iou_thresh=0.5):
+                       iou_thresh=0.5, method='contours', points_per_side=32, trim=False,
+                       optimize=False):
         """
         提取图像中的所有对象
 
@@ -281,105 +302,147 @@ class SAM2AutoExtractor:
             max_objects: 最大对象数量
             padding: 边界填充像素
             iou_thresh: 去重IoU阈值
+            method: 'contours' 连通区域分割；'points' 网格点提示 SAM2 分割
+            points_per_side: points 模式下每边的网格点数
+            trim: 裁掉透明边，偏移信息写入 trim.json
+            optimize: 写出调色板/高压缩 PNG
 
         Returns:
             提取的对象信息列表
         """
         # 读取图像
-        image = cv2.imread(str(image_path), cv2.IMREAD_UNCHANGED)
-        if image is None:
+        try:
+            image = load_rgba(image_path)
+        except (OSError, ValueError):
             print(f"无法读取图像: {image_path}")
             return []
 
-        # 处理通道
-        if len(image.shape) == 2:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-            original_alpha = None
-        elif image.shape[2] == 4:
-            image_rgb = cv2.cvtColor(image[:, :, :3], cv2.COLOR_BGR2RGB)
-            original_alpha = image[:, :, 3]
-        else:
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            original_alpha = None
-
-        height, width = image_rgb.shape[:2]
-
-        # 创建输出目录
-        output_path = Path(output_dir)
-        output_path.mkdir(parents=True, exist_ok=True)
+        height, width = image.shape[:2]
 
         print(f"正在分析图像: {image_path} ({width}x{height})")
 
-        # 使用轮廓检测+SAM2分割
-        masks = self.auto_segment_by_contours(str(image_path), min_area)
+        with stage('segment', method=method):
+            if method == 'points':
+                # 网格点提示: 一次编码图像，批量解码所有点
+                key = None
+                masks = None
+                if self.cache is not None:
+                    key = self.cache.key(image_path, model=self.model_name, method='points',
+                                         points_per_side=points_per_side)
+                    masks = self.cache.get(key)
+                    if masks is not None:
+                        print(f"遮罩缓存命中: {len(masks)} 个遮罩")
+                if masks is None:
+                    points = self.generate_grid_points(width, height, points_per_side)
+                    masks = self.segment_with_points(image_path, points)
+                    if key is not None:
+                        self.cache.put(key, masks)
+                masks = filter_regions(masks, min_area)
+            else:
+                # 使用轮廓检测+SAM2分割
+                masks = self.auto_segment_by_contours(str(image_path), min_area)
 
         print(f"SAM2 生成了 {len(masks)} 个遮罩")
 
         # 去重
-        masks = self.remove_duplicate_masks(masks, iou_thresh)
+        with stage('dedup'):
+            masks = self.remove_duplicate_masks(masks, iou_thresh)
         print(f"去重后保留 {len(masks)} 个对象")
 
         # 限制数量
         masks = masks[:max_objects]
 
-        # 提取并保存
-        extracted = []
-        base_name = Path(image_path).stem
+        # 裁剪: 区域遮罩与原始透明度取交集
+        sprites = []
+        with stage('crop'):
+            for mask_data in masks:
+                rgba, bbox = cut_sprite(image, mask_data, padding)
+                sprites.append({'region': mask_data, 'image': rgba, 'bbox': bbox})
 
-        for idx, mask_data in enumerate(masks):
-            mask = mask_data['mask']
-            x, y, w, h = mask_data['bbox']
+        extracted = save_sprites(sprites, output_dir, "{stem}_obj_{index:03d}.png",
+                                 trim=trim, optimize=optimize, stem=Path(image_path).stem)
+        for obj in extracted:
+            print(f"  [{obj['index']:3d}] {obj['filename']} (面积: {obj['area']:,})")
 
-            # 添加填充
-            x = max(0, x - padding)
-            y = max(0, y - padding)
-            w = min(width - x, w + 2 * padding)
-            h = min(height - y, h + 2 * padding)
+        return extracted
 
-            # 裁剪
-            cropped_rgb = image_rgb[y:y+h, x:x+w].copy()
-            cropped_mask = mask[y:y+h, x:x+w]
 
-            # 结合原始透明度
-            if original_alpha is not None:
-                cropped_alpha = original_alpha[y:y+h, x:x+w]
-                final_alpha = np.minimum(cropped_mask * 255, cropped_alpha)
-            else:
-                final_alpha = cropped_mask * 255
-
-            # 创建RGBA图像
-            rgba = np.zeros((h, w, 4), dtype=np.uint8)
-            rgba[:, :, :3] = cropped_rgb
-            rgba[:, :, 3] = final_alpha.astype(np.uint8)
-
-            # 保存
-            output_filename = f"{base_name}_obj_{idx:03d}.png"
-            output_filepath = output_path / output_filename
-
-            pil_image = Image.fromarray(rgba)
-            pil_image.save(output_filepath)
-
-            extracted.append({
-                'filename': output_filename,
-                'filepath': str(output_filepath),
-                'area': mask_data['area'],
-                'bbox': (x, y, w, h),
-                'index': idx
-            })
+# 每个工作进程各自持有的提取器（顺序模式下即当前进程）
+_worker_state = {}
 
-            print(f"  [{idx:3d}] {output_filename} (面积: {mask_data['area']:,})")
 
-        return extracted
+def _init_worker(model_size, point_batch_size, cache, needs_model):
+    """工作进程初始化: 只有 points 模式需要模型，每个进程只加载一次"""
+    extractor = SAM2AutoExtractor(model_size=model_size, point_batch_size=point_batch_size,
+                                  cache=cache)
+    if needs_model and not extractor.load_model():
+        extractor = None
+    _worker_state['extractor'] = extractor
 
 
-def batch_process(input_dir, output_dir, **kwargs):
-    """批量处理目录"""
+def _process_image(task):
+    """处理单张图像，返回 (提取结果, 是否记录到构建清单)"""
+    image_file, image_output, kwargs = task
+    extractor = _worker_state.get('extractor')
+    if extractor is None:
+        return [], False
+
+    print(f"\n{'='*50}")
+    print(f"处理: {image_file.name}")
+    print('='*50)
+
+    extracted = extractor.extract_objects(
+        str(image_file),
+        str(image_output),
+        **kwargs
+    )
+    return extracted, True
+
+
+def build_images(image_files, output_for, model_size='base', point_batch_size=64, cache=None,
+                 workers=1, force=False, manifest_dir=None, prune=False, **kwargs):
+    """
+    提取多张图像，跳过源文件和参数都未变化的图像
+
+    Args:
+        output_for: 图像路径 -> 输出目录
+        force: 不查构建清单、全部重新生成（结果仍写入清单）
+        manifest_dir: 构建清单所在目录
+        prune: 清理清单中已不在 image_files 里的图像的输出（批量处理整个目录时）
+
+    Returns:
+        {文件名: 提取结果}
+    """
+    manifest = BuildManifest.in_dir(manifest_dir)
+    needs_model = kwargs.get('method') == 'points'
+    params = {
+        'tool': 'sam2_auto_extract',
+        'model': model_size if needs_model else None,
+        **kwargs,
+    }
+    tasks = [(f.name, f, (f, output_for(f), kwargs)) for f in image_files]
+    return incremental_map(_process_image, tasks, manifest, params, workers,
+                           initializer=_init_worker,
+                           initargs=(model_size, point_batch_size, cache, needs_model),
+                           force=force, prune=prune)
+
+
+def batch_process(input_dir, output_dir, model_size='base', point_batch_size=64, cache=None,
+                  workers=1, force=False, **kwargs):
+    """
+    批量处理目录
+
+    Args:
+        workers: 并行进程数（1 顺序执行，0 使用全部核心）；
+                 points 模式下每个进程各加载一份模型
+        force: 不查构建清单，重新生成所有输出
+    """
     input_path = Path(input_dir)
     output_path = Path(output_dir)
 
     image_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.webp'}
-    image_files = [f for f in input_path.iterdir()
-                   if f.suffix.lower() in image_extensions]
+    image_files = sorted(f for f in input_path.iterdir()
+                         if f.suffix.lower() in image_extensions)
 
     if not image_files:
         print(f"目录中没有图像: {input_dir}")
@@ -387,25 +450,10 @@ def batch_process(input_dir, output_dir, **kwargs):
 
     print(f"找到 {len(image_files)} 个图像文件")
 
-    extractor = SAM2AutoExtractor()
-    if not extractor.load_model():
-        return {}
-
-    results = {}
-    for image_file in image_files:
-        print(f"\n{'='*50}")
-        print(f"处理: {image_file.name}")
-        print('='*50)
-
-        image_output = output_path / image_file.stem
-        extracted = extractor.extract_objects(
-            str(image_file),
-            str(image_output),
-            **kwargs
-        )
-        results[image_file.name] = extracted
-
-    return results
+    # 每张图像输出到独立子目录，文件名只取决于图像本身，与进程调度无关
+    return build_images(image_files, lambda f: output_path / f.stem, model_size,
+                        point_batch_size, cache, workers, force,
+                        manifest_dir=output_path, prune=True, **kwargs)
 
 
 def main():
@@ -420,8 +468,11 @@ def main():
   # 调整参数
   python sam2_auto_extract.py -i sprite.png -o output/ --min-area 300 --iou 0.4
 
-  # 批量处理
-  python sam2_auto_extract.py -i sprites/ -o extracted/ --batch
+  # 网格点提示分割（图像只编码一次，每批解码 128 个点）
+  python sam2_auto_extract.py -i sprite.png -o output/ --method points --point-batch 128
+
+  # 批量处理（4 个进程并行）
+  python sam2_auto_extract.py -i sprites/ -o extracted/ --batch --workers 4
         """
     )
 
@@ -434,29 +485,57 @@ def main():
     parser.add_argument('--max-objects', type=int, default=200, help='最大对象数')
     parser.add_argument('--padding', type=int, default=5, help='边界填充')
     parser.add_argument('--iou', type=float, default=0.5, help='去重IoU阈值')
+    parser.add_argument('--method', choices=['contours', 'points'], default='contours',
+                       help='分割方式: contours 连通区域 / points 网格点提示 (默认: contours)')
+    parser.add_argument('--points-per-side', type=int, default=32, help='points 模式每边网格点数')
+    parser.add_argument('--point-batch', type=int, default=64, help='points 模式每批解码的点数')
+    parser.add_argument('--cache-dir', default=None,
+                       help='图像特征/遮罩缓存目录 (默认: ~/.cache/spritekit)')
+    parser.add_argument('--cache-size', type=int, default=512, help='缓存大小上限 MB (默认: 512)')
+    parser.add_argument('--no-cache', action='store_true', help='禁用缓存')
+    parser.add_argument('--workers', type=int, default=1,
+                       help='批量处理并行进程数 (默认: 1，0 表示使用全部CPU核心)')
+    parser.add_argument('--force', action='store_true',
+                       help='忽略构建清单，重新生成所有输出 (默认只处理有变化的图像)')
+    parser.add_argument('--trim', action='store_true',
+                       help='裁掉精灵四周的透明边，原尺寸和偏移写入输出目录的 trim.json')
+    parser.add_argument('--optimize-png', action='store_true',
+                       help='输出无损压缩到最小的 PNG（颜色不超过256种时写调色板PNG）')
+    parser.add_argument('--profile', action='store_true',
+                       help='统计各阶段耗时和内存，结束时打印汇总表')
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                       help='同时写出 Chrome trace-event JSON（隐含 --profile）')
 
     args = parser.parse_args()
 
+    if args.profile or args.profile_trace:
+        instrument.enable(trace_path=args.profile_trace)
+
     kwargs = {
         'min_area': args.min_area,
         'max_objects': args.max_objects,
         'padding': args.padding,
         'iou_thresh': args.iou,
+        'method': args.method,
+        'points_per_side': args.points_per_side,
+        'trim': args.trim,
+        'optimize': args.optimize_png,
     }
 
     input_path = Path(args.input)
+    cache = None if args.no_cache else RegionCache(args.cache_dir, args.cache_size * 1024 * 1024)
 
     if args.batch or input_path.is_dir():
-        results = batch_process(str(input_path), args.output, **kwargs)
+        results = batch_process(str(input_path), args.output, model_size=args.model,
+                                point_batch_size=args.point_batch, cache=cache,
+                                workers=args.workers, force=args.force, **kwargs)
         total = sum(len(v) for v in results.values())
         print(f"\n完成! 共提取了 {total} 个对象")
     else:
-        extractor = SAM2AutoExtractor(model_size=args.model)
-        if extractor.load_model():
-            extracted = extractor.extract_objects(
-                str(input_path), args.output, **kwargs
-            )
-            print(f"\n完成! 提取了 {len(extracted)} 个对象")
+        results = build_images([input_path], lambda f: Path(args.output), args.model,
+                               args.point_batch, cache, force=args.force,
+                               manifest_dir=args.output, **kwargs)
+        print(f"\n完成! 提取了 {len(results[input_path.name])} 个对象")
 
 
 if __name__ == '__main__':
@@ -7,17 +7,24 @@
 开发者: Claude Code Assistant
 
 功能:
-- 根据尺寸和形状自动分类提取的精灵图
+- 根据尺寸、形状（填充率、凸包实心度）和颜色自动分类提取的精灵图
 - 将精灵分为: 树木(trees)、灌木(bushes)、树干(stumps)
 - 复制分类后的素材到游戏资源目录
 """
 
 import os
+import json
 import shutil
 from pathlib import Path
 from PIL import Image
 import argparse
 
+import numpy as np
+from scipy.spatial import ConvexHull
+
+from spritekit import BuildManifest, MetadataIndex, iter_images
+from spritekit import instrument
+
 
 class SpriteClassifier:
     """精灵图分类器"""
@@ -33,6 +40,17 @@ class SpriteClassifier:
 
     STUMP_MAX_HEIGHT = 50       # 树干最大高度
     STUMP_MAX_ASPECT = 0.8      # 树干最大宽高比 (偏窄)
+    STUMP_MIN_BROWN = 0.5       # 树干/木桩最小棕色占比
+    STUMP_MAX_GREEN = 0.1       # 树干/木桩最大绿色占比
+
+    # 特征提取（修改以下参数或 analyze_sprite 时递增 FEATURE_VERSION，使缓存的特征失效）
+    FEATURE_VERSION = 1
+    ALPHA_THRESHOLD = 10        # Alpha 大于该值视为不透明
+    HUE_BINS = 12               # 色相直方图桶数 (每桶 30°)
+    MIN_SATURATION = 40         # 低于该饱和度不计入色相
+    MIN_VALUE = 30              # 低于该亮度不计入色相
+    GREEN_BINS = slice(2, 6)    # 60°-180°: 黄绿到青
+    BROWN_BINS = slice(0, 2)    # 0°-60°: 红棕到橙黄
 
     def __init__(self):
         self.categories = {
@@ -43,7 +61,15 @@ class SpriteClassifier:
         }
 
     def analyze_sprite(self, image_path):
-        """分析单个精灵图的属性"""
+        """
+        分析单个精灵图的属性
+
+        全部基于整幅数组运算: Alpha 阈值 -> 行/列 any 归约得到内容边界框，
+        并计算填充率、凸包实心度和色相直方图。
+
+        Returns:
+            属性 dict，完全透明时返回 None
+        """
         try:
             img = Image.open(image_path)
 
@@ -51,30 +77,25 @@ class SpriteClassifier:
             if img.mode != 'RGBA':
                 img = img.convert('RGBA')
 
-            width, height = img.size
+            rgba = np.asarray(img)
+            opaque = rgba[:, :, 3] > self.ALPHA_THRESHOLD
 
             # 计算实际内容区域（非透明像素）
-            pixels = img.load()
-            min_x, min_y = width, height
-            max_x, max_y = 0, 0
-            pixel_count = 0
-
-            for y in range(height):
-                for x in range(width):
-                    if pixels[x, y][3] > 10:  # Alpha > 10
-                        min_x = min(min_x, x)
-                        min_y = min(min_y, y)
-                        max_x = max(max_x, x)
-                        max_y = max(max_y, y)
-                        pixel_count += 1
-
-            if pixel_count == 0:
+            rows = np.flatnonzero(opaque.any(axis=1))
+            if len(rows) == 0:
                 return None
+            cols = np.flatnonzero(opaque.any(axis=0))
+            min_x, max_x = int(cols[0]), int(cols[-1])
+            min_y, max_y = int(rows[0]), int(rows[-1])
 
+            pixel_count = int(np.count_nonzero(opaque))
             content_width = max_x - min_x + 1
             content_height = max_y - min_y + 1
             aspect_ratio = content_width / content_height if content_height > 0 else 0
 
+            hsv = np.asarray(img.convert('RGB').convert('HSV'))[opaque]
+            hue_hist = self.hue_histogram(hsv)
+
             return {
                 'path': image_path,
                 'filename': os.path.basename(image_path),
@@ -82,12 +103,49 @@ class SpriteClassifier:
                 'height': content_height,
                 'area': pixel_count,
                 'aspect_ratio': aspect_ratio,
-                'bbox': (min_x, min_y, max_x, max_y)
+                'bbox': (min_x, min_y, max_x, max_y),
+                'fill_ratio': pixel_count / (content_width * content_height),
+                'solidity': self.solidity(opaque, pixel_count),
+                'mean_color': tuple(int(c) for c in rgba[:, :, :3][opaque].mean(axis=0).round()),
+                'hue_hist': hue_hist.tolist(),
+                'green_ratio': float(hue_hist[self.GREEN_BINS].sum()),
+                'brown_ratio': float(hue_hist[self.BROWN_BINS].sum()),
             }
         except Exception as e:
             print(f"分析失败 {image_path}: {e}")
             return None
 
+    @staticmethod
+    def solidity(opaque, pixel_count):
+        """
+        凸包实心度 = 不透明像素数 / 凸包面积
+
+        只取每行最左、最右像素的四个角点求凸包，点数与高度成正比。
+        """
+        ys = np.flatnonzero(opaque.any(axis=1))
+        left = opaque[ys].argmax(axis=1)
+        right = opaque.shape[1] - opaque[ys, ::-1].argmax(axis=1)
+        points = np.concatenate([
+            np.stack([left, ys], axis=1),
+            np.stack([right, ys], axis=1),
+            np.stack([left, ys + 1], axis=1),
+            np.stack([right, ys + 1], axis=1),
+        ]).astype(np.float64)
+        hull_area = ConvexHull(points).volume
+        return pixel_count / hull_area if hull_area > 0 else 1.0
+
+    @classmethod
+    def hue_histogram(cls, hsv):
+        """
+        不透明像素的色相直方图（归一化）
+
+        饱和度或亮度过低的像素（灰/黑/白）不计入色相，各桶之和可能小于 1。
+        """
+        colored = (hsv[:, 1] >= cls.MIN_SATURATION) & (hsv[:, 2] >= cls.MIN_VALUE)
+        bins = hsv[colored, 0].astype(np.int64) * cls.HUE_BINS // 256
+        hist = np.bincount(bins, minlength=cls.HUE_BINS).astype(np.float64)
+        return hist / max(len(hsv), 1)
+
     def classify_sprite(self, info):
         """根据属性分类精灵图"""
         if info is None:
@@ -118,15 +176,67 @@ class SpriteClassifier:
         if aspect > 0.7 and area >= self.BUSH_MIN_AREA:
             return 'bushes'
 
+        # 形状无法判断的小碎块: 以棕色为主、几乎没有绿色的是木桩/断木
+        if (area < 2000 and info.get('brown_ratio', 0) >= self.STUMP_MIN_BROWN
+                and info.get('green_ratio', 1) <= self.STUMP_MAX_GREEN):
+            return 'stumps'
+
         return 'unknown'
 
-    def process_directory(self, input_dir):
-        """处理目录中的所有精灵图"""
+    def iter_analyzed(self, paths, workers=1, index=None):
+        """
+        按文件名顺序产出分析结果
+
+        Args:
+            paths: 精灵图路径列表
+            workers: 并行分析的进程数
+            index: MetadataIndex，已缓存且文件未变化的特征直接复用，
+                   只有变化的文件会被解码分析
+        """
+        if index is None:
+            yield from iter_images(_analyze_file, paths, workers, chunksize=8)
+            return
+
+        kind = f'sprite_features_v{self.FEATURE_VERSION}'
+        cached = [index.get(path, kind) for path in paths]
+        stale = [path for path, features in zip(paths, cached) if features is None]
+        if len(stale) < len(paths):
+            print(f"复用缓存特征: {len(paths) - len(stale)} 个，重新分析: {len(stale)} 个")
+
+        fresh = iter_images(_analyze_file, stale, workers, chunksize=8)
+        for path, features in zip(paths, cached):
+            if features is None:
+                info = next(fresh)
+                if info is not None:
+                    index.put(path, kind, {k: v for k, v in info.items()
+                                           if k not in ('path', 'filename')})
+            else:
+                info = dict(features, path=path, filename=os.path.basename(path))
+            yield info
+
+        index.save()
+
+    def process_directory(self, input_dir, workers=1, sinks=(), keep=True, index=None):
+        """
+        处理目录中的所有精灵图
+
+        Args:
+            workers: 并行分析的进程数（1 顺序执行，0 使用全部核心）
+            sinks: 结果输出端（JsonlWriter / StreamingReport / AssetCopier），
+                   每个结果就绪后立即写出
+            keep: 是否把结果保存在 self.categories 中；流式模式下为 False，
+                  内存占用与精灵数量无关
+            index: MetadataIndex，缓存特征，重复运行时只分析变化的文件
+
+        Returns:
+            完整扫描了输入目录时为 True；目录不存在时为 False
+            （调用方据此决定是否清理上次复制的文件）
+        """
         input_path = Path(input_dir)
 
-        if not input_path.exists():
+        if not input_path.is_dir():
             print(f"目录不存在: {input_dir}")
-            return
+            return False
 
         # 获取所有PNG文件
         png_files = sorted(input_path.glob("*.png"))
@@ -134,55 +244,44 @@ class SpriteClassifier:
         print(f"找到 {len(png_files)} 个精灵图")
         print("-" * 50)
 
-        for png_file in png_files:
-            info = self.analyze_sprite(str(png_file))
+        # 按文件名顺序产出结果，复制时的编号与顺序执行一致
+        counts = {cat: 0 for cat in self.categories}
+        for info in self.iter_analyzed([str(p) for p in png_files], workers, index):
             if info:
                 category = self.classify_sprite(info)
                 info['category'] = category
-                self.categories[category].append(info)
+                counts[category] += 1
+                if keep:
+                    self.categories[category].append(info)
+                for sink in sinks:
+                    sink.add(info)
 
                 print(f"{info['filename']:30} -> {category:10} "
                       f"({info['width']}x{info['height']}, area={info['area']:,})")
 
         print("-" * 50)
         print(f"\n分类统计:")
-        for cat, items in self.categories.items():
-            print(f"  {cat}: {len(items)} 个")
-
-    def copy_to_game_assets(self, output_base_dir, prefix=""):
-        """将分类后的素材复制到游戏资源目录"""
-        output_base = Path(output_base_dir)
-
-        # 创建子目录
-        dirs = {
-            'trees': output_base / 'trees',
-            'bushes': output_base / 'bushes',
-            'stumps': output_base / 'stumps'
-        }
-
-        for dir_path in dirs.values():
-            dir_path.mkdir(parents=True, exist_ok=True)
-
-        copied = {'trees': 0, 'bushes': 0, 'stumps': 0}
-
-        for category, items in self.categories.items():
-            if category == 'unknown':
-                continue
-
-            for i, info in enumerate(items):
-                src = info['path']
-                new_name = f"{prefix}{category[:-1]}_{i:02d}.png"  # tree_00.png
-                dst = dirs[category] / new_name
+        for cat, count in counts.items():
+            print(f"  {cat}: {count} 个")
+        return True
 
-                shutil.copy2(src, dst)
-                copied[category] += 1
-                print(f"复制: {info['filename']} -> {dst}")
+    def copy_to_game_assets(self, output_base_dir, prefix="", force=False, complete=True):
+        """
+        将分类后的素材复制到游戏资源目录
 
-        print(f"\n复制完成:")
-        for cat, count in copied.items():
-            print(f"  {cat}: {count} 个")
+        源文件未变化且目标文件完好时跳过复制；同一前缀上次复制、
+        这次不再产生的文件会被删除（如某类精灵数量减少）。
 
-        return copied
+        Args:
+            force: 忽略构建清单，全部重新复制
+            complete: 分类结果是否来自完整扫描（process_directory 的返回值），
+                      否则不删除上次复制的文件；没有任何结果时同样不删除
+        """
+        copier = AssetCopier(output_base_dir, prefix, force)
+        for items in self.categories.values():
+            for info in items:
+                copier.add(info)
+        return copier.close(complete)
 
     def export_classification_report(self, output_file):
         """导出分类报告"""
@@ -193,20 +292,149 @@ class SpriteClassifier:
                 f.write(f"## {category.upper()} ({len(items)} 个)\n\n")
 
                 if items:
-                    f.write("| 文件名 | 尺寸 | 面积 | 宽高比 |\n")
-                    f.write("|--------|------|------|--------|\n")
+                    f.write("| 文件名 | 尺寸 | 面积 | 宽高比 | 填充率 | 实心度 | 平均颜色 |\n")
+                    f.write("|--------|------|------|--------|--------|--------|----------|\n")
 
                     for info in items:
-                        f.write(f"| {info['filename']} | "
-                               f"{info['width']}x{info['height']} | "
-                               f"{info['area']:,} | "
-                               f"{info['aspect_ratio']:.2f} |\n")
+                        f.write(f"| {info['filename']} | {_report_cells(info)} |\n")
 
                 f.write("\n")
 
         print(f"报告已保存: {output_file}")
 
 
+def _analyze_file(path):
+    """分析单个精灵图（工作进程中运行）"""
+    with instrument.stage('analyze'):
+        return SpriteClassifier().analyze_sprite(path)
+
+
+def _report_cells(info):
+    """报告表格中尺寸到平均颜色的各列"""
+    return (f"{info['width']}x{info['height']} | "
+            f"{info['area']:,} | "
+            f"{info['aspect_ratio']:.2f} | "
+            f"{info['fill_ratio']:.2f} | "
+            f"{info['solidity']:.2f} | "
+            f"#{bytes(info['mean_color']).hex()}")
+
+
+class JsonlWriter:
+    """每个分类结果写一行 JSON（JSON Lines），写完立即刷新"""
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.file = open(output_file, 'w', encoding='utf-8')
+
+    def add(self, info):
+        self.file.write(json.dumps(info, ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+        print(f"分类结果已保存: {self.output_file}")
+
+
+class StreamingReport:
+    """
+    流式分类报告
+
+    每个结果就绪即追加一行（带分类列），分类统计写在末尾，
+    不需要在内存中保存全部结果。
+    """
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.counts = {}
+        self.file = open(output_file, 'w', encoding='utf-8')
+        self.file.write("# 精灵图分类报告\n\n")
+        self.file.write("| 文件名 | 分类 | 尺寸 | 面积 | 宽高比 | 填充率 | 实心度 | 平均颜色 |\n")
+        self.file.write("|--------|------|------|------|--------|--------|--------|----------|\n")
+
+    def add(self, info):
+        category = info['category']
+        self.counts[category] = self.counts.get(category, 0) + 1
+        self.file.write(f"| {info['filename']} | {category} | {_report_cells(info)} |\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.write("\n## 分类统计\n\n")
+        for category, count in self.counts.items():
+            self.file.write(f"- {category}: {count} 个\n")
+        self.file.close()
+        print(f"报告已保存: {self.output_file}")
+
+
+class AssetCopier:
+    """
+    把分类结果逐个复制到游戏资源目录
+
+    每类按加入顺序编号（tree_00.png ...），配合构建清单跳过未变化的文件。
+    """
+
+    CATEGORIES = ('trees', 'bushes', 'stumps')
+
+    def __init__(self, output_base_dir, prefix="", force=False):
+        output_base = Path(output_base_dir)
+        self.prefix = prefix
+        self.force = force
+        self.manifest = BuildManifest.in_dir(output_base)
+        self.params = {'tool': 'sprite_classifier', 'prefix': prefix}
+
+        # 创建子目录
+        self.dirs = {category: output_base / category for category in self.CATEGORIES}
+        for dir_path in self.dirs.values():
+            dir_path.mkdir(parents=True, exist_ok=True)
+
+        self.counts = {category: 0 for category in self.CATEGORIES}
+        self.copied = {category: 0 for category in self.CATEGORIES}
+        self.skipped = 0
+        self.targets = []
+
+    def add(self, info):
+        category = info['category']
+        if category not in self.dirs:
+            return
+
+        index = self.counts[category]
+        self.counts[category] += 1
+
+        src = info['path']
+        new_name = f"{self.prefix}{category[:-1]}_{index:02d}.png"  # tree_00.png
+        dst = self.dirs[category] / new_name
+        target = f"{category}/{new_name}"
+        self.targets.append(target)
+
+        if not self.force and self.manifest.lookup(target, src, self.params) is not None:
+            self.skipped += 1
+            return
+
+        shutil.copy2(src, dst)
+        self.manifest.record(target, src, self.params, [dst])
+        self.copied[category] += 1
+        print(f"复制: {info['filename']} -> {dst}")
+
+    def close(self, complete=True):
+        """
+        保存构建清单
+
+        Args:
+            complete: 输入目录是否完整扫描；只有完整扫描且有结果时才删除
+                      上次复制、这次不再产生的文件，否则只保存已复制的记录
+        """
+        if complete and self.targets:
+            self.manifest.prune(self.targets, self.params)
+        self.manifest.save()
+
+        print(f"\n复制完成:")
+        for cat, count in self.copied.items():
+            print(f"  {cat}: {count} 个")
+        if self.skipped:
+            print(f"  未变化跳过: {self.skipped} 个")
+
+        return self.copied
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='精灵图分类器 - 自动分类树木、灌木、树干',
@@ -221,6 +449,10 @@ def main():
 
   # 导出报告
   python sprite_classifier.py -i extracted/trees_sam2 --report classification.md
+
+  # 流式模式: 4 个进程并行分析，结果逐行写出
+  python sprite_classifier.py -i extracted/trees_sam2 --stream --workers 4 \\
+      --jsonl classes.jsonl --report classification.md
         """
     )
 
@@ -229,14 +461,55 @@ def main():
     parser.add_argument('--copy', action='store_true', help='复制分类后的素材到输出目录')
     parser.add_argument('--prefix', default='green_', help='文件名前缀 (默认: green_)')
     parser.add_argument('--report', help='导出分类报告文件')
+    parser.add_argument('--force', action='store_true', help='忽略构建清单，重新复制所有素材')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='并行分析的进程数 (默认: 1，0 表示使用全部CPU核心)')
+    parser.add_argument('--jsonl', help='逐行写出分类结果 (JSON Lines)')
+    parser.add_argument('--stream', action='store_true',
+                        help='流式模式: 报告和复制随结果逐个写出，不在内存中保存全部结果')
+    parser.add_argument('--index', help='特征缓存索引文件 (默认: ~/.cache/spritekit/metadata.json)')
+    parser.add_argument('--no-index', action='store_true', help='不使用特征缓存，重新分析所有文件')
+    parser.add_argument('--profile', action='store_true',
+                        help='统计各阶段耗时和内存，结束时打印汇总表')
+    parser.add_argument('--profile-trace', default=None, metavar='FILE',
+                        help='同时写出 Chrome trace-event JSON（隐含 --profile）')
 
     args = parser.parse_args()
 
+    if args.profile or args.profile_trace:
+        instrument.enable(trace_path=args.profile_trace)
+
+    sinks = []
+    copier = None
+    if args.jsonl:
+        sinks.append(JsonlWriter(args.jsonl))
+    if args.stream:
+        if args.report:
+            sinks.append(StreamingReport(args.report))
+        if args.copy and args.output:
+            copier = AssetCopier(args.output, prefix=args.prefix, force=args.force)
+            sinks.append(copier)
+
+    index = None if args.no_index else MetadataIndex(args.index)
+
     classifier = SpriteClassifier()
-    classifier.process_directory(args.input)
+    complete = False
+    try:
+        complete = classifier.process_directory(args.input, workers=args.workers, sinks=sinks,
+                                                keep=not args.stream, index=index)
+    finally:
+        # 目录不存在或中途出错时不清理上次复制的文件
+        for sink in sinks:
+            if sink is copier:
+                sink.close(complete)
+            else:
+                sink.close()
+
+    if args.stream or not complete:
+        return
 
     if args.copy and args.output:
-        classifier.copy_to_game_assets(args.output, prefix=args.prefix)
+        classifier.copy_to_game_assets(args.output, prefix=args.prefix, force=args.force)
 
     if args.report:
         classifier.export_classification_report(args.report)
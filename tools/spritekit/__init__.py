@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+spritekit - 精灵图提取公共库
+============================
+
+scripts/ 与 tools/ 下各提取脚本共用的实现，全部基于整幅数组运算。
+
+模块:
+- mask:      背景色检测、颜色距离遮罩、背景透明化
+- regions:   连通区域标记、单遍区域统计、最大连通区域、过滤、边界填充
+- localmask: 边界框内局部遮罩的 IoU、合并、粘贴
+- dedup:     边界框扫描线索引 + 批量 IoU 去重
+- merge:     树干-树冠合并（底边排序索引 + 并查集）
+- backends:  可插拔分割后端（纯色/形态学/透明度/网格/SAM2）
+- pipeline:  分割 -> 裁剪 -> 保存 的统一流水线
+- cache:     按图像内容哈希缓存模型分割结果（LRU 淘汰）
+- parallel:  逐图像处理分发到进程池（结果保持输入顺序）
+- manifest:  增量构建清单（源哈希 + 参数 + 输出哈希）
+- meta:      只读文件头的图像元数据索引 + 派生信息缓存
+- trim:      透明边裁剪 + 偏移信息 trim.json
+- atlas:     MaxRects 纹理图集装箱
+- phash:     精确哈希 + 感知哈希（aHash/dHash）+ BK 树查找重复精灵
+- encode:    PNG 编码（无损调色板 + 多种过滤/压缩策略取最小）
+- synth:     可复现的合成精灵表（基准测试用）
+- instrument: 分阶段耗时/峰值内存统计，汇总表 + Chrome 轨迹
+- optional:  可选依赖探测（find_spec，不导入，结果缓存）
+- scale:     按绘制尺寸缩小精灵（面积平均/最近邻）
+- integral:  遮罩积分图，矩形/边界像素计数 O(1)，区域外扩
+- layout:    JSON 裁剪布局，每张表解码一次批量裁剪
+- xycut:     投影切分（空白行/列连续段 + 递归 XY-cut）
+"""
+
+from .mask import (
+    get_background_color,
+    color_distance,
+    background_mask,
+    foreground_mask,
+    knockout_background,
+    knockout_alpha,
+)
+from .regions import (
+    RegionStats,
+    region_stats,
+    label_regions,
+    largest_component,
+    filter_regions,
+    pad_bbox,
+)
+from .localmask import bbox_intersection, bbox_union, mask_iou, merge_masks, local_mask, mask_region
+from .dedup import overlapping_pairs, pair_ious, dedupe_regions
+from .merge import UnionFind, trunk_crown_pairs, merge_groups
+from .backends import (
+    SegmentationBackend,
+    ColorKeyBackend,
+    MorphologyBackend,
+    AlphaBackend,
+    GridBackend,
+    Sam2Backend,
+)
+from .pipeline import (
+    load_rgba,
+    cut_sprite,
+    extract_sprites,
+    save_sprite,
+    save_sprites,
+    extract_to_dir,
+)
+from .cache import RegionCache, file_digest, pack_regions, unpack_regions
+from .parallel import resolve_workers, iter_images, map_images
+from .manifest import BuildManifest, incremental_map
+from .meta import read_png_header, image_header, alpha_facts, MetadataIndex
+from .trim import (
+    TRIM_SIDECAR,
+    trim_sprite,
+    trim_info,
+    read_trim_sidecar,
+    write_trim_sidecar,
+)
+from .atlas import MaxRectsBin, next_pow2, pack_rects, build_atlas
+from .phash import (
+    premultiplied_gray,
+    average_hash,
+    difference_hash,
+    sprite_hashes,
+    hamming,
+    BKTree,
+    group_duplicates,
+)
+from .encode import FILTERS, STRATEGIES, normalize_transparent, palette_of, encode_png, write_png
+from .synth import draw_object, synth_sheet
+from .instrument import stage, print_summary, write_trace
+from .optional import SAM_LOADERS, has_module, missing_modules, available_sam_loaders
+from .scale import fit_size, downscale
+from .integral import IntegralMask
+from .layout import load_layout, crop_sheet, run_layout
+from .xycut import runs, row_runs, column_runs, xy_cut
+
+__all__ = [
+    'get_background_color',
+    'color_distance',
+    'background_mask',
+    'foreground_mask',
+    'knockout_background',
+    'knockout_alpha',
+    'RegionStats',
+    'region_stats',
+    'label_regions',
+    'largest_component',
+    'filter_regions',
+    'pad_bbox',
+    'bbox_intersection',
+    'bbox_union',
+    'mask_iou',
+    'merge_masks',
+    'local_mask',
+    'mask_region',
+    'overlapping_pairs',
+    'pair_ious',
+    'dedupe_regions',
+    'UnionFind',
+    'trunk_crown_pairs',
+    'merge_groups',
+    'SegmentationBackend',
+    'ColorKeyBackend',
+    'MorphologyBackend',
+    'AlphaBackend',
+    'GridBackend',
+    'Sam2Backend',
+    'load_rgba',
+    'cut_sprite',
+    'extract_sprites',
+    'save_sprite',
+    'save_sprites',
+    'extract_to_dir',
+    'RegionCache',
+    'file_digest',
+    'pack_regions',
+    'unpack_regions',
+    'resolve_workers',
+    'iter_images',
+    'map_images',
+    'BuildManifest',
+    'incremental_map',
+    'read_png_header',
+    'image_header',
+    'alpha_facts',
+    'MetadataIndex',
+    'TRIM_SIDECAR',
+    'trim_sprite',
+    'trim_info',
+    'read_trim_sidecar',
+    'write_trim_sidecar',
+    'MaxRectsBin',
+    'next_pow2',
+    'pack_rects',
+    'build_atlas',
+    'premultiplied_gray',
+    'average_hash',
+    'difference_hash',
+    'sprite_hashes',
+    'hamming',
+    'BKTree',
+    'group_duplicates',
+    'FILTERS',
+    'STRATEGIES',
+    'normalize_transparent',
+    'palette_of',
+    'encode_png',
+    'write_png',
+    'draw_object',
+    'synth_sheet',
+    'stage',
+    'print_summary',
+    'write_trace',
+    'SAM_LOADERS',
+    'has_module',
+    'missing_modules',
+    'available_sam_loaders',
+    'fit_size',
+    'downscale',
+    'IntegralMask',
+    'load_layout',
+    'crop_sheet',
+    'run_layout',
+    'runs',
+    'row_runs',
+    'column_runs',
+    'xy_cut',
+]
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+纹理图集打包
+============
+
+把多张精灵裁掉透明边后装箱到一张或多张 2 的幂尺寸的图集中。
+
+- 装箱: MaxRects（Best Short Side Fit），不旋转，精灵之间留 padding 像素
+- 图集尺寸: 先尝试把剩余精灵全部放进一张尽量小的 2 的幂图集；
+  放不下最大尺寸时先填满一张最大图集，剩下的继续下一张
+- 帧信息: 与 TexturePacker JSON 相同的字段含义，
+  frame 为图集中的位置，spriteSourceSize 为裁剪区域在原图中的位置，
+  sourceSize 为原图尺寸，绘制时可还原原来的留白
+"""
+
+import numpy as np
+
+from .trim import trim_sprite, trim_info
+
+
+def next_pow2(n):
+    """不小于 n 的最小 2 的幂"""
+    return 1 << max(0, int(n) - 1).bit_length()
+
+
+class MaxRectsBin:
+    """
+    MaxRects 装箱（Best Short Side Fit）
+
+    维护所有极大空闲矩形；放入一个矩形后切分与之相交的空闲矩形，
+    并删除被其他空闲矩形包含的冗余矩形。
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.free = [(0, 0, width, height)]
+
+    def insert(self, w, h):
+        """放入 w x h 的矩形，返回 (x, y)，放不下返回 None"""
+        best = None
+        for fx, fy, fw, fh in self.free:
+            if w <= fw and h <= fh:
+                short = min(fw - w, fh - h)
+                long = max(fw - w, fh - h)
+                if best is None or (short, long) < best[0]:
+                    best = ((short, long), fx, fy)
+        if best is None:
+            return None
+
+        _, x, y = best
+        self._split((x, y, w, h))
+        self._prune()
+        return x, y
+
+    def _split(self, node):
+        nx, ny, nw, nh = node
+        free = []
+        for rect in self.free:
+            fx, fy, fw, fh = rect
+            if nx >= fx + fw or nx + nw <= fx or ny >= fy + fh or ny + nh <= fy:
+                free.append(rect)
+                continue
+            # 相交: 保留 node 四周剩余的部分
+            if nx > fx:
+                free.append((fx, fy, nx - fx, fh))
+            if nx + nw < fx + fw:
+                free.append((nx + nw, fy, fx + fw - nx - nw, fh))
+            if ny > fy:
+                free.append((fx, fy, fw, ny - fy))
+            if ny + nh < fy + fh:
+                free.append((fx, ny + nh, fw, fy + fh - ny - nh))
+        self.free = free
+
+    def _prune(self):
+        free = sorted(set(self.free), key=lambda r: r[2] * r[3], reverse=True)
+        kept = []
+        for fx, fy, fw, fh in free:
+            contained = any(
+                fx >= kx and fy >= ky and fx + fw <= kx + kw and fy + fh <= ky + kh
+                for kx, ky, kw, kh in kept
+            )
+            if not contained:
+                kept.append((fx, fy, fw, fh))
+        self.free = kept
+
+
+def _try_pack(sizes, indices, width, height, padding):
+    """尝试把 indices 全部放进 width x height，返回 {i: (x, y)}，放不下返回 None"""
+    # 右、下边缘不需要留 padding
+    packer = MaxRectsBin(width + padding, height + padding)
+    placed = {}
+    for i in indices:
+        w, h = sizes[i]
+        pos = packer.insert(w + padding, h + padding)
+        if pos is None:
+            return None
+        placed[i] = pos
+    return placed
+
+
+def _fill(sizes, indices, width, height, padding):
+    """尽量多地放进一张图集，返回 {i: (x, y)}"""
+    packer = MaxRectsBin(width + padding, height + padding)
+    placed = {}
+    for i in indices:
+        w, h = sizes[i]
+        pos = packer.insert(w + padding, h + padding)
+        if pos is not None:
+            placed[i] = pos
+    return placed
+
+
+def _candidate_sizes(sizes, indices, max_size, padding):
+    """按面积从小到大排列的 2 的幂图集尺寸"""
+    area = sum((sizes[i][0] + padding) * (sizes[i][1] + padding) for i in indices)
+    min_w = next_pow2(max(sizes[i][0] for i in indices))
+    min_h = next_pow2(max(sizes[i][1] for i in indices))
+
+    candidates = []
+    w = min_w
+    while w <= max_size:
+        h = min_h
+        while h <= max_size:
+            if w * h >= area:
+                candidates.append((w * h, max(w, h), w, h))
+            h *= 2
+        w *= 2
+    return [(w, h) for _, _, w, h in sorted(candidates)]
+
+
+def pack_rects(sizes, max_size=2048, padding=1):
+    """
+    把矩形装箱到若干张 2 的幂图集
+
+    Args:
+        sizes: [(w, h), ...]
+        max_size: 单张图集最大边长（2 的幂）
+        padding: 矩形之间的间距
+
+    Returns:
+        (placements, sheets): placements[i] = (图集序号, x, y)，sheets = [(w, h), ...]
+    """
+    for w, h in sizes:
+        if w > max_size or h > max_size:
+            raise ValueError(f"精灵尺寸 {w}x{h} 超过图集最大尺寸 {max_size}")
+
+    # 先放大的: 长边降序，面积降序
+    remaining = sorted(range(len(sizes)),
+                       key=lambda i: (max(sizes[i]), sizes[i][0] * sizes[i][1]), reverse=True)
+    placements = [None] * len(sizes)
+    sheets = []
+
+    while remaining:
+        placed = None
+        for width, height in _candidate_sizes(sizes, remaining, max_size, padding):
+            placed = _try_pack(sizes, remaining, width, height, padding)
+            if placed is not None:
+                break
+        if placed is None:
+            width = height = max_size
+            placed = _fill(sizes, remaining, width, height, padding)
+
+        sheet = len(sheets)
+        sheets.append((width, height))
+        for i, (x, y) in placed.items():
+            placements[i] = (sheet, x, y)
+        remaining = [i for i in remaining if i not in placed]
+
+    return placements, sheets
+
+
+def build_atlas(sprites, max_size=2048, padding=1, trim=True):
+    """
+    打包精灵图集
+
+    Args:
+        sprites: [(key, rgba), ...]，key 为帧名（可以是任意可哈希值）
+        max_size: 单张图集最大边长
+        padding: 精灵之间的间距
+        trim: 是否裁掉透明边
+
+    Returns:
+        (sheets, frames): sheets 为 RGBA 数组列表，
+        frames[key] = {'sheet', 'frame', 'trimmed', 'spriteSourceSize', 'sourceSize'}
+    """
+    crops = []
+    for key, rgba in sprites:
+        height, width = rgba.shape[:2]
+        if trim:
+            crop, (x, y, w, h) = trim_sprite(rgba)
+        else:
+            crop, (x, y, w, h) = rgba, (0, 0, width, height)
+        crops.append((key, crop, (x, y, w, h), (width, height)))
+
+    placements, sizes = pack_rects([(c[2][2], c[2][3]) for c in crops], max_size, padding)
+
+    sheets = [np.zeros((h, w, 4), dtype=np.uint8) for w, h in sizes]
+    frames = {}
+    for (key, crop, (x, y, w, h), (width, height)), (sheet, px, py) in zip(crops, placements):
+        sheets[sheet][py:py + h, px:px + w] = crop
+        frames[key] = {
+            'sheet': sheet,
+            'frame': {'x': px, 'y': py, 'w': w, 'h': h},
+            'trimmed': (w, h) != (width, height),
+            **trim_info((x, y, w, h), (width, height)),
+        }
+    return sheets, frames
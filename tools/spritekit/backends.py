@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+分割后端
+========
+
+每个后端实现 segment(image, image_path, min_area, min_size) -> (regions, alpha):
+    regions: 区域列表（见 regions.py），可附带 'mask' 局部遮罩（见 localmask.py）
+    alpha:   (H, W) uint8 输出 Alpha 平面；None 表示沿用原图 Alpha
+基于连通区域的后端在统计阶段就按 min_area/min_size 向量化过滤。
+
+后端:
+- ColorKeyBackend:   纯色背景，按颜色距离抠图
+- MorphologyBackend: 纯色背景，检测前先做形态学闭运算填充空洞
+- AlphaBackend:      透明背景，按 Alpha 通道分割
+- GridBackend:       规则网格精灵图
+- Sam2Backend:       SAM2 等模型生成的遮罩列表
+"""
+
+import numpy as np
+from scipy import ndimage
+
+from .mask import get_background_color, foreground_mask, knockout_alpha
+from .regions import label_regions
+from .localmask import mask_region
+from .instrument import stage
+
+
+def open_close(mask, size=3):
+    """
+    先开运算去噪点，再闭运算补小洞
+
+    边界处理与 cv2.morphologyEx 一致: 腐蚀时图像外视为前景。
+    """
+    structure = np.ones((size, size), dtype=bool)
+    mask = ndimage.binary_erosion(mask, structure, border_value=1)
+    mask = ndimage.binary_dilation(mask, structure)
+    mask = ndimage.binary_dilation(mask, structure)
+    return ndimage.binary_erosion(mask, structure, border_value=1)
+
+
+class SegmentationBackend:
+    """分割后端基类"""
+
+    name = 'base'
+
+    def segment(self, image, image_path=None, min_area=0, min_size=0):
+        raise NotImplementedError
+
+
+class ColorKeyBackend(SegmentationBackend):
+    """纯色背景抠图"""
+
+    name = 'colorkey'
+
+    def __init__(self, bg_color=None, threshold=30, channels=3, metric='l1',
+                 knockout=None, denoise=False, connectivity=8):
+        """
+        Args:
+            bg_color: 背景颜色，None则取四角平均
+            threshold: 前景判定阈值（颜色距离 >= threshold 为前景）
+            channels: 参与比较的通道数（3=RGB，4=RGBA）
+            metric: 颜色距离 ('l1' 或 'chebyshev')
+            knockout: 透明化阈值；None 则直接用前景遮罩作为 Alpha，
+                      否则保留原图 Alpha，仅把距离 < knockout 的像素置为透明
+            denoise: 是否对前景遮罩做 3x3 开/闭运算
+            connectivity: 连通性 (4 或 8)
+        """
+        self.bg_color = bg_color
+        self.threshold = threshold
+        self.channels = channels
+        self.metric = metric
+        self.knockout = knockout
+        self.denoise = denoise
+        self.connectivity = connectivity
+
+    def background_color(self, image):
+        if self.bg_color is not None:
+            return np.asarray(self.bg_color)
+        return get_background_color(image)
+
+    def foreground(self, image, bg_color):
+        """前景遮罩（同时用于输出 Alpha）"""
+        mask = foreground_mask(image, bg_color, self.threshold, self.channels, self.metric)
+        if self.denoise:
+            mask = open_close(mask)
+        return mask
+
+    def detection_mask(self, mask):
+        """用于连通区域检测的遮罩，子类可在此做额外处理"""
+        return mask
+
+    def segment(self, image, image_path=None, min_area=0, min_size=0):
+        with stage('mask'):
+            bg_color = self.background_color(image)
+            mask = self.foreground(image, bg_color)
+            detection = self.detection_mask(mask)
+        _, regions = label_regions(detection, self.connectivity,
+                                   min_area, min_size)
+
+        with stage('mask'):
+            if self.knockout is None:
+                alpha = mask.astype(np.uint8) * 255
+            else:
+                alpha = knockout_alpha(image, bg_color, self.knockout, self.channels, self.metric)
+
+        return regions, alpha
+
+
+class MorphologyBackend(ColorKeyBackend):
+    """纯色背景抠图，检测前用闭运算把同一对象的碎块连起来"""
+
+    name = 'morphology'
+
+    def __init__(self, closing_size=7, closing_iterations=2, **kwargs):
+        super().__init__(**kwargs)
+        self.closing_size = closing_size
+        self.closing_iterations = closing_iterations
+
+    def detection_mask(self, mask):
+        structure = np.ones((self.closing_size, self.closing_size), dtype=bool)
+        return ndimage.binary_closing(mask, structure=structure,
+                                      iterations=self.closing_iterations)
+
+
+class AlphaBackend(SegmentationBackend):
+    """透明背景精灵图，按 Alpha 通道分割"""
+
+    name = 'alpha'
+
+    def __init__(self, threshold=10, connectivity=8):
+        self.threshold = threshold
+        self.connectivity = connectivity
+
+    def segment(self, image, image_path=None, min_area=0, min_size=0):
+        with stage('mask'):
+            mask = image[:, :, 3] > self.threshold
+        _, regions = label_regions(mask, self.connectivity,
+                                   min_area, min_size)
+        return regions, None
+
+
+class GridBackend(SegmentationBackend):
+    """规则网格精灵图，每个格子是一个区域"""
+
+    name = 'grid'
+
+    def __init__(self, grid_width, grid_height, skip_empty=True, empty_threshold=10):
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.skip_empty = skip_empty
+        self.empty_threshold = empty_threshold
+
+    def segment(self, image, image_path=None, min_area=0, min_size=0):
+        gw, gh = self.grid_width, self.grid_height
+        rows = image.shape[0] // gh
+        cols = image.shape[1] // gw
+
+        # 一次性统计所有格子的不透明像素数
+        opaque = image[:rows * gh, :cols * gw, 3] > self.empty_threshold
+        counts = opaque.reshape(rows, gh, cols, gw).sum(axis=(1, 3))
+
+        regions = []
+        for row in range(rows):
+            for col in range(cols):
+                if self.skip_empty and counts[row, col] < self.empty_threshold:
+                    continue
+                regions.append({
+                    'label': row * cols + col,
+                    'bbox': (col * gw, row * gh, gw, gh),
+                    'area': int(counts[row, col]),
+                    'row': row,
+                    'col': col,
+                })
+        return regions, None
+
+
+class Sam2Backend(SegmentationBackend):
+    """
+    模型遮罩后端
+
+    generate(image_path, image) 返回 SAM 风格的遮罩列表，
+    每项包含 'segmentation' (H, W) bool，可选 'bbox' (x, y, w, h) 与 'area'。
+
+    传入 cache (RegionCache) 时，以图像内容 + cache_params（模型、后端等）
+    为键缓存局部遮罩区域，源图未变化时跳过 generate。
+    """
+
+    name = 'sam2'
+
+    def __init__(self, generate, cache=None, cache_params=None):
+        self.generate = generate
+        self.cache = cache
+        self.cache_params = cache_params or {}
+
+    def segment(self, image, image_path=None, min_area=0, min_size=0):
+        key = None
+        regions = None
+        if self.cache is not None and image_path:
+            key = self.cache.key(image_path, backend=self.name, **self.cache_params)
+            regions = self.cache.get(key)
+            if regions is not None:
+                print(f"缓存命中: {len(regions)} 个遮罩")
+
+        if regions is None:
+            regions = []
+            for idx, mask_data in enumerate(self.generate(image_path, image)):
+                region = mask_region(mask_data['segmentation'], idx,
+                                     mask_data.get('bbox'), mask_data.get('area'))
+                if region is not None:
+                    regions.append(region)
+            if key is not None:
+                self.cache.put(key, regions)
+
+        # 模型遮罩直接决定 Alpha，忽略原图透明度
+        alpha = np.full(image.shape[:2], 255, dtype=np.uint8)
+        return regions, alpha
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+分割结果磁盘缓存
+================
+
+键 = sha256(图像文件字节) + 模型/后端/生成参数，源图不变时直接复用模型输出，
+调整 --min-area / --padding / --iou 等后处理参数不再重新跑模型。
+
+- 区域: 局部遮罩按位打包后与边界框、面积一起写入 np.savez_compressed
+- 数组: 任意命名数组（如图像特征）同样以 .npz 保存
+- 淘汰: 读取时刷新文件 mtime，写入后按 mtime 从旧到新删除，
+  使缓存目录总大小不超过 max_bytes（LRU）
+"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'spritekit'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# 超过该时间未更新的临时文件视为崩溃遗留
+STALE_TMP_SECONDS = 3600
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """文件内容的 sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def pack_regions(regions):
+    """局部遮罩区域 -> 紧凑数组（所有遮罩拼接后按位打包）"""
+    boxes = np.array([r['bbox'] for r in regions], dtype=np.int64).reshape(-1, 4)
+    areas = np.array([r['area'] for r in regions], dtype=np.int64)
+    labels = np.array([r.get('label', i) for i, r in enumerate(regions)], dtype=np.int64)
+    if regions:
+        bits = np.packbits(np.concatenate([np.asarray(r['mask'], dtype=bool).ravel()
+                                           for r in regions]))
+    else:
+        bits = np.empty(0, dtype=np.uint8)
+    return {'boxes': boxes, 'areas': areas, 'labels': labels, 'bits': bits}
+
+
+def unpack_regions(arrays):
+    """pack_regions 的逆变换"""
+    boxes, areas, labels = arrays['boxes'], arrays['areas'], arrays['labels']
+    sizes = boxes[:, 2] * boxes[:, 3]
+    flat = np.unpackbits(arrays['bits'], count=int(sizes.sum())).astype(bool)
+    masks = np.split(flat, np.cumsum(sizes)[:-1]) if len(sizes) else []
+
+    return [
+        {
+            'label': int(label),
+            'bbox': tuple(int(v) for v in box),
+            'area': int(area),
+            'mask': mask.reshape(box[3], box[2]),
+        }
+        for label, box, area, mask in zip(labels, boxes, areas, masks)
+    ]
+
+
+class RegionCache:
+    """
+    基于内容哈希的分割结果缓存
+
+    Args:
+        cache_dir: 缓存目录，None 使用 ~/.cache/spritekit
+        max_bytes: 缓存目录大小上限
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self._digests = {}
+
+    def key(self, image_path, **params):
+        """图像内容哈希 + 参数（模型、后端等）-> 缓存键"""
+        path = os.path.abspath(image_path)
+        stat = os.stat(path)
+        # 同一进程内按 (路径, 大小, mtime) 复用哈希，避免重复读文件
+        ident = (path, stat.st_size, stat.st_mtime_ns)
+        if ident not in self._digests:
+            self._digests[ident] = file_digest(path)
+
+        payload = json.dumps(params, sort_keys=True, default=str)
+        return hashlib.sha256((self._digests[ident] + payload).encode('utf-8')).hexdigest()
+
+    def _path(self, key, kind):
+        return self.cache_dir / f"{key}.{kind}.npz"
+
+    def get_arrays(self, key, kind='arrays'):
+        """读取命名数组，未命中返回 None"""
+        path = self._path(key, kind)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        except (OSError, ValueError, KeyError):
+            return None
+        # 刷新访问时间，供 LRU 淘汰
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return arrays
+
+    def put_arrays(self, key, arrays, kind='arrays'):
+        """写入命名数组（先写临时文件再改名，避免并发读到半个文件）"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key, kind)
+        # 临时文件不以 .npz 结尾，其它进程的 evict 不会把它当成缓存条目删掉
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp, path)
+        self.evict()
+
+    def get(self, key):
+        """读取区域列表，未命中返回 None"""
+        arrays = self.get_arrays(key, 'regions')
+        return unpack_regions(arrays) if arrays is not None else None
+
+    def put(self, key, regions):
+        """写入区域列表"""
+        self.put_arrays(key, pack_regions(regions), 'regions')
+
+    def evict(self):
+        """
+        按最近访问时间从旧到新删除，直到总大小不超过上限
+
+        只处理 *.npz 条目；写入中的临时文件（*.tmp）只在超过
+        STALE_TMP_SECONDS 未更新（写入进程已退出）时清理。
+        """
+        now = time.time()
+        for path in self.cache_dir.glob('*.tmp'):
+            try:
+                if now - path.stat().st_mtime > STALE_TMP_SECONDS:
+                    path.unlink()
+            except OSError:
+                pass
+
+        entries = []
+        for path in self.cache_dir.glob('*.npz'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                pass
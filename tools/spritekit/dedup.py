@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+IoU 去重
+========
+
+1. 扫描线索引: 按 x 起点排序扫描，只保留边界框相交的候选对
+2. IoU: 候选对少时逐对在交集窗口内计算；候选对多时把所有局部遮罩
+   展开成稀疏矩阵 M (对象 x 像素)，用 M @ M.T 一次得到全部交集像素数
+3. 贪心保留: 与原 remove_duplicate_masks 相同，按面积从大到小，
+   被保留对象抑制其后 IoU 超过阈值的对象
+
+区域格式见 localmask.py（'bbox' 为 (x, y, w, h)，'mask' 为局部遮罩）。
+"""
+
+import numpy as np
+from scipy import sparse
+
+from .localmask import mask_iou
+
+
+# 候选对数量达到该值时改用稀疏矩阵批量计算
+BATCH_MIN_PAIRS = 64
+
+
+def overlapping_pairs(boxes):
+    """
+    扫描线找出所有边界框相交的下标对
+
+    Args:
+        boxes: (x, y, w, h) 列表
+
+    Returns:
+        (K, 2) int 数组，每行 i < j
+    """
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    x0, y0 = boxes[:, 0], boxes[:, 1]
+    x1, y1 = x0 + boxes[:, 2], y0 + boxes[:, 3]
+
+    pairs = []
+    active = np.empty(0, dtype=np.int64)
+    for i in np.argsort(x0, kind='stable'):
+        # 移除已经完全位于扫描线左侧的框
+        active = active[x1[active] > x0[i]]
+        hit = active[(y0[active] < y1[i]) & (y1[active] > y0[i])]
+        for j in hit:
+            pairs.append((min(i, j), max(i, j)))
+        active = np.append(active, i)
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.array(pairs, dtype=np.int64)
+
+
+def _pixel_matrix(regions):
+    """把局部遮罩展开成 (对象数, 像素数) 的稀疏 0/1 矩阵"""
+    width = max(r['bbox'][0] + r['bbox'][2] for r in regions)
+    height = max(r['bbox'][1] + r['bbox'][3] for r in regions)
+
+    rows, cols = [], []
+    for idx, r in enumerate(regions):
+        x, y = r['bbox'][:2]
+        ys, xs = np.nonzero(r['mask'])
+        cols.append((ys + y) * width + (xs + x))
+        rows.append(np.full(len(ys), idx, dtype=np.int64))
+
+    rows = np.concatenate(rows)
+    cols = np.concatenate(cols)
+    data = np.ones(len(rows), dtype=np.int32)
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(regions), width * height))
+
+
+def pair_ious(regions, pairs, batch=None):
+    """
+    计算候选对的 IoU
+
+    Args:
+        regions: 区域列表
+        pairs: (K, 2) 下标对
+        batch: True 用稀疏矩阵批量计算，False 逐对窗口计算，None 自动选择
+
+    Returns:
+        (K,) float 数组
+    """
+    if len(pairs) == 0:
+        return np.empty(0, dtype=np.float64)
+
+    if batch is None:
+        batch = len(pairs) >= BATCH_MIN_PAIRS
+
+    if not batch:
+        return np.array([mask_iou(regions[i], regions[j]) for i, j in pairs])
+
+    matrix = _pixel_matrix(regions)
+    overlap = (matrix @ matrix.T).tocsr()
+    inter = np.asarray(overlap[pairs[:, 0], pairs[:, 1]]).ravel().astype(np.float64)
+
+    area = np.array([r['area'] for r in regions], dtype=np.float64)
+    union = area[pairs[:, 0]] + area[pairs[:, 1]] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def dedupe_regions(regions, iou_thresh=0.5, batch=None):
+    """
+    移除重复/高度重叠的区域
+
+    Returns:
+        按面积从大到小排列的保留区域
+    """
+    if len(regions) <= 1:
+        return list(regions)
+
+    regions = sorted(regions, key=lambda r: r['area'], reverse=True)
+
+    pairs = overlapping_pairs([r['bbox'] for r in regions])
+    ious = pair_ious(regions, pairs, batch)
+
+    # 每个区域只记录排在它后面、IoU 超过阈值的区域
+    suppress = [[] for _ in regions]
+    for (i, j), iou in zip(pairs, ious):
+        if iou > iou_thresh:
+            suppress[i].append(j)
+
+    keep = []
+    used = set()
+    for i, region in enumerate(regions):
+        if i in used:
+            continue
+        keep.append(region)
+        used.update(suppress[i])
+
+    return keep
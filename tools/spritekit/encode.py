@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+PNG 输出编码
+============
+
+像素画素材颜色很少，默认的 RGBA + zlib 默认级别浪费体积。
+
+- 颜色统计: 全透明像素统一视为同一种颜色（其 RGB 不可见）
+- 调色板: 不超过 256 种颜色时写索引色 PNG（PLTE + tRNS），
+  按颜色数选 1/2/4/8 位深，半透明颜色排在前面以缩短 tRNS
+- 否则写 RGB（全不透明时）或 RGBA
+- 压缩: 行过滤（None/Sub/Up/Average/Paeth 固定或逐行自适应）
+  与 zlib 策略（默认/filtered/RLE）逐一尝试，保留最小的结果
+
+过滤在整幅数组上计算（PNG 过滤基于原始字节，不依赖重建结果）。
+解码结果与输入逐像素一致（全透明像素的 RGB 除外）。
+"""
+
+import struct
+import zlib
+
+import numpy as np
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+FILTERS = ('none', 'sub', 'up', 'average', 'paeth')
+STRATEGIES = {
+    'default': zlib.Z_DEFAULT_STRATEGY,
+    'filtered': zlib.Z_FILTERED,
+    'rle': zlib.Z_RLE,
+}
+
+
+def normalize_transparent(rgba):
+    """全透明像素统一为 (0, 0, 0, 0)"""
+    rgba = np.array(rgba, dtype=np.uint8, copy=True)
+    rgba[rgba[:, :, 3] == 0] = 0
+    return rgba
+
+
+def palette_of(rgba, max_colors=256):
+    """
+    图像的调色板
+
+    Returns:
+        (palette, indices): palette 为 (N, 4) RGBA，半透明颜色在前；
+        indices 为 (H, W) 索引；颜色数超过 max_colors 时返回 None
+    """
+    packed = rgba.reshape(-1, 4).view(np.uint32).ravel()
+    colors = np.unique(packed)
+    if len(colors) > max_colors:
+        return None
+    palette = colors.view(np.uint8).reshape(-1, 4)
+
+    # tRNS 只需覆盖到最后一个半透明颜色
+    order = np.argsort(palette[:, 3] == 255, kind='stable')
+    palette = palette[order]
+    lookup = np.empty(len(colors), dtype=np.uint8)
+    lookup[order] = np.arange(len(colors), dtype=np.uint8)
+    indices = lookup[np.searchsorted(colors, packed)]
+    return palette, indices.reshape(rgba.shape[:2])
+
+
+def _pack_bits(indices, depth):
+    """把索引按位深打包为每行字节（行尾补零）"""
+    if depth == 8:
+        return indices
+    per_byte = 8 // depth
+    height, width = indices.shape
+    padded = np.zeros((height, -(-width // per_byte) * per_byte), dtype=np.uint8)
+    padded[:, :width] = indices
+    groups = padded.reshape(height, -1, per_byte)
+    shifts = np.arange(per_byte - 1, -1, -1, dtype=np.uint8) * depth
+    return np.bitwise_or.reduce(groups << shifts, axis=2).astype(np.uint8)
+
+
+def _filter_rows(raw, bpp, method):
+    """
+    对所有行应用同一种过滤
+
+    Args:
+        raw: (H, 行字节数) uint8
+        bpp: 每像素字节数（不足 1 字节按 1）
+
+    Returns:
+        (H, 行字节数) 过滤后的字节
+    """
+    x = raw.astype(np.int16)
+    left = np.zeros_like(x)
+    left[:, bpp:] = x[:, :-bpp]
+    up = np.zeros_like(x)
+    up[1:] = x[:-1]
+
+    if method == 'none':
+        out = x
+    elif method == 'sub':
+        out = x - left
+    elif method == 'up':
+        out = x - up
+    elif method == 'average':
+        out = x - (left + up) // 2
+    else:
+        upleft = np.zeros_like(x)
+        upleft[1:, bpp:] = x[:-1, :-bpp]
+        p = left + up - upleft
+        pa, pb, pc = np.abs(p - left), np.abs(p - up), np.abs(p - upleft)
+        pred = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upleft))
+        out = x - pred
+    return (out & 0xFF).astype(np.uint8)
+
+
+def filtered_scanlines(raw, bpp, method):
+    """
+    带过滤类型字节的扫描线数据
+
+    Args:
+        method: FILTERS 之一，或 'adaptive'（逐行选绝对值和最小的过滤）
+    """
+    if method == 'adaptive':
+        candidates = np.stack([_filter_rows(raw, bpp, m) for m in FILTERS])
+        cost = np.abs(candidates.astype(np.int8).astype(np.int32)).sum(axis=2)
+        types = cost.argmin(axis=0)
+        rows = candidates[types, np.arange(raw.shape[0])]
+    else:
+        types = np.full(raw.shape[0], FILTERS.index(method))
+        rows = _filter_rows(raw, bpp, method)
+    return np.column_stack([types.astype(np.uint8), rows]).tobytes()
+
+
+def _chunk(kind, data):
+    return (struct.pack('>I', len(data)) + kind + data
+            + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+
+def _layout(rgba):
+    """选择颜色格式，返回 (IHDR 字段, 额外数据块, 原始行字节, bpp)"""
+    height, width = rgba.shape[:2]
+    result = palette_of(rgba)
+    if result is not None:
+        palette, indices = result
+        count = len(palette)
+        depth = 1 if count <= 2 else 2 if count <= 4 else 4 if count <= 16 else 8
+        extra = [(b'PLTE', palette[:, :3].tobytes())]
+        translucent = int(np.count_nonzero(palette[:, 3] < 255))
+        if translucent:
+            extra.append((b'tRNS', palette[:translucent, 3].tobytes()))
+        return (width, height, depth, 3), extra, _pack_bits(indices, depth), 1
+
+    if (rgba[:, :, 3] == 255).all():
+        return (width, height, 8, 2), [], rgba[:, :, :3].reshape(height, -1), 3
+    return (width, height, 8, 6), [], rgba.reshape(height, -1), 4
+
+
+def encode_png(rgba, filters=FILTERS + ('adaptive',), strategies=tuple(STRATEGIES)):
+    """
+    编码为尽量小的 PNG
+
+    Args:
+        rgba: (H, W, 4) uint8
+        filters: 尝试的过滤方式
+        strategies: 尝试的 zlib 策略（STRATEGIES 的键）
+
+    Returns:
+        PNG 文件字节
+    """
+    rgba = normalize_transparent(rgba)
+    (width, height, depth, color_type), extra, raw, bpp = _layout(rgba)
+
+    best = None
+    for method in filters:
+        data = filtered_scanlines(raw, bpp, method)
+        for strategy in strategies:
+            compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, STRATEGIES[strategy])
+            idat = compressor.compress(data) + compressor.flush()
+            if best is None or len(idat) < len(best):
+                best = idat
+
+    ihdr = struct.pack('>IIBBBBB', width, height, depth, color_type, 0, 0, 0)
+    chunks = [_chunk(b'IHDR', ihdr)]
+    chunks += [_chunk(kind, data) for kind, data in extra]
+    chunks += [_chunk(b'IDAT', best), _chunk(b'IEND', b'')]
+    return PNG_SIGNATURE + b''.join(chunks)
+
+
+def write_png(rgba, path):
+    """用 encode_png 写文件，返回写入的字节数"""
+    data = encode_png(rgba)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return len(data)
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+分阶段计时与内存统计
+====================
+
+    with stage('segment'):
+        regions = backend.segment(image)
+
+未启用时 stage() 什么也不做，开销可以忽略。启用后每个阶段记录:
+
+- 墙钟时间
+- 进程峰值 RSS（阶段结束时的历史最高值）
+- 分配峰值: 阶段内 Python/numpy 分配超过进入时的最大值（tracemalloc）
+- 净分配: 阶段结束时比进入时多占用的内存
+
+阶段可以嵌套（外层包含内层）。多进程模式下工作进程记录的阶段随结果
+传回主进程（见 parallel.iter_images），Chrome 轨迹中按进程分行显示。
+
+结束时打印汇总表；指定轨迹文件时另写 Chrome trace-event JSON，
+可在 chrome://tracing 或 Perfetto 中打开。
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import unicodedata
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+_state = {
+    'enabled': False,
+    'memory': True,
+    'pid': None,
+    'events': [],
+}
+# 嵌套阶段栈按线程分开（layout 裁剪在线程池中运行阶段）
+_local = threading.local()
+
+
+def peak_rss():
+    """进程峰值常驻内存（字节），无法获取时返回 None"""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, 'peak_wset', info.rss)
+
+
+def enabled():
+    return _state['enabled']
+
+
+def memory_enabled():
+    return _state['enabled'] and _state['memory']
+
+
+def enable(memory=True, report=True, trace_path=None):
+    """
+    启用记录
+
+    Args:
+        memory: 是否用 tracemalloc 统计分配（有一定开销）
+        report: 进程退出时打印汇总表
+        trace_path: 进程退出时写出 Chrome trace-event JSON
+    """
+    first = _state['pid'] is None
+    _state.update(enabled=True, memory=memory, pid=os.getpid(), events=[])
+    _local.stack = []
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if first and (report or trace_path):
+        atexit.register(_finish, report, trace_path)
+
+
+def _finish(report, trace_path):
+    if os.getpid() != _state['pid']:
+        return
+    if report:
+        print_summary()
+    if trace_path:
+        write_trace(trace_path)
+        print(f"轨迹已保存: {trace_path}")
+
+
+@contextmanager
+def stage(name, **args):
+    """
+    记录一个阶段
+
+    Args:
+        name: 阶段名（load/mask/segment/dedup/crop/encode/write 等）
+        args: 附加到轨迹事件上的信息（如文件名）
+    """
+    if not _state['enabled']:
+        yield
+        return
+
+    memory = _state['memory'] and tracemalloc.is_tracing()
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        tracemalloc.reset_peak()
+    else:
+        current = 0
+    frame = {'start_mem': current, 'peak': current}
+    stack.append(frame)
+    wall = time.time()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        stack.pop()
+        event = {
+            'name': name,
+            'ts': wall,
+            'dur': duration,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'rss_peak': peak_rss(),
+            'alloc_peak': None,
+            'alloc_net': None,
+            'args': args,
+        }
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame['peak'])
+            event['alloc_peak'] = peak - frame['start_mem']
+            event['alloc_net'] = current - frame['start_mem']
+            if stack:
+                stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        _state['events'].append(event)
+
+
+def run_profiled(func, memory, item):
+    """工作进程中调用 func(item)，返回 (结果, 本次记录的阶段)"""
+    if _state['pid'] != os.getpid():
+        enable(memory, report=False)
+    _state['events'] = []
+    result = func(item)
+    events, _state['events'] = _state['events'], []
+    return result, events
+
+
+def merge(events):
+    """合并工作进程传回的阶段"""
+    _state['events'].extend(events)
+
+
+def events():
+    return list(_state['events'])
+
+
+def summary():
+    """
+    按阶段名汇总
+
+    Returns:
+        [{'name', 'calls', 'total_s', 'max_s', 'rss_peak', 'alloc_peak', 'alloc_net'}, ...]，
+        按首次出现的顺序
+    """
+    rows = {}
+    for e in _state['events']:
+        row = rows.setdefault(e['name'], {
+            'name': e['name'], 'calls': 0, 'total_s': 0.0, 'max_s': 0.0,
+            'rss_peak': None, 'alloc_peak': None, 'alloc_net': None,
+        })
+        row['calls'] += 1
+        row['total_s'] += e['dur']
+        row['max_s'] = max(row['max_s'], e['dur'])
+        for key in ('rss_peak', 'alloc_peak'):
+            if e[key] is not None:
+                row[key] = e[key] if row[key] is None else max(row[key], e[key])
+        if e['alloc_net'] is not None:
+            row['alloc_net'] = (row['alloc_net'] or 0) + e['alloc_net']
+    return list(rows.values())
+
+
+def _mb(value):
+    return '-' if value is None else f"{value / 1024 / 1024:.1f}"
+
+
+def _cell(text, width, left=False):
+    """按显示宽度填充（中文字符占两列）"""
+    text = str(text)
+    shown = sum(2 if unicodedata.east_asian_width(c) in 'WF' else 1 for c in text)
+    pad = ' ' * max(0, width - shown)
+    return text + pad if left else pad + text
+
+
+def print_summary(file=None):
+    """打印汇总表（嵌套阶段的时间包含在外层阶段中）"""
+    rows = summary()
+    file = file or sys.stdout
+    if not rows:
+        print("\n[profile] 没有记录到阶段", file=file)
+        return
+    pids = {e['pid'] for e in _state['events']}
+    print(f"\n[profile] {len(pids)} 个进程", file=file)
+    widths = (12, 8, 12, 12, 14, 14, 12)
+    header = ('阶段', '次数', '总耗时(s)', '最长(ms)', '峰值RSS(MB)', '分配峰值(MB)', '净分配(MB)')
+    print(''.join(_cell(text, w, i == 0) for i, (text, w) in enumerate(zip(header, widths))),
+          file=file)
+    for row in rows:
+        cells = (row['name'], row['calls'], f"{row['total_s']:.3f}", f"{row['max_s'] * 1000:.1f}",
+                 _mb(row['rss_peak']), _mb(row['alloc_peak']), _mb(row['alloc_net']))
+        print(''.join(_cell(text, w, i == 0) for i, (text, w) in enumerate(zip(cells, widths))),
+              file=file)
+
+
+def write_trace(path):
+    """写出 Chrome trace-event JSON（完整事件 'X'，时间单位微秒）"""
+    trace = []
+    for pid in sorted({e['pid'] for e in _state['events']}):
+        label = 'main' if pid == _state['pid'] else 'worker'
+        trace.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                      'args': {'name': f"{label} {pid}"}})
+    for e in _state['events']:
+        args = dict(e['args'])
+        for key in ('rss_peak', 'alloc_peak', 'alloc_net'):
+            if e[key] is not None:
+                args[key] = e[key]
+        trace.append({
+            'name': e['name'],
+            'cat': 'spritekit',
+            'ph': 'X',
+            'ts': e['ts'] * 1e6,
+            'dur': e['dur'] * 1e6,
+            'pid': e['pid'],
+            'tid': e['tid'],
+            'args': args,
+        })
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
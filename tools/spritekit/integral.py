@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+积分图（summed-area table）
+===========================
+
+前景遮罩的积分图只建一次，之后任意矩形内的前景像素数都是 4 次查表:
+
+    S[y, x] = mask[:y, :x].sum()
+    count(x0..x1, y0..y1) = S[y1+1, x1+1] - S[y0, x1+1] - S[y1+1, x0] + S[y0, x0]
+
+矩形的四条边是 1 像素宽的矩形，同样 O(1)。用来检查手动划定的区域
+是否截断了内容（边上有前景像素），并给出不再截断的最小外扩矩形。
+
+矩形统一为闭区间 (min_col, min_row, max_col, max_row)，与各手动区域脚本一致。
+"""
+
+import numpy as np
+
+from .mask import get_background_color, foreground_mask
+
+
+EDGES = ('top', 'bottom', 'left', 'right')
+
+
+class IntegralMask:
+    """遮罩积分图，矩形/边计数 O(1)"""
+
+    def __init__(self, mask):
+        """
+        Args:
+            mask: (H, W) bool 前景遮罩
+        """
+        self.height, self.width = mask.shape
+        self.table = np.zeros((self.height + 1, self.width + 1), dtype=np.int64)
+        np.cumsum(np.cumsum(mask, axis=0), axis=1, out=self.table[1:, 1:])
+
+    @classmethod
+    def from_image(cls, rgba, bg_color=None, threshold=15, channels=3, metric='l1'):
+        """按背景色距离构建（bg_color 为 None 时取四角平均）"""
+        if bg_color is None:
+            bg_color = get_background_color(rgba)
+        return cls(foreground_mask(rgba, bg_color, threshold, channels, metric))
+
+    def clip(self, bounds):
+        """把矩形裁到图像范围内"""
+        min_col, min_row, max_col, max_row = bounds
+        return (max(0, min_col), max(0, min_row),
+                min(self.width - 1, max_col), min(self.height - 1, max_row))
+
+    def count(self, bounds):
+        """矩形内（含边界）的前景像素数"""
+        min_col, min_row, max_col, max_row = self.clip(bounds)
+        if min_col > max_col or min_row > max_row:
+            return 0
+        t = self.table
+        return int(t[max_row + 1, max_col + 1] - t[min_row, max_col + 1]
+                   - t[max_row + 1, min_col] + t[min_row, min_col])
+
+    def edges(self, bounds):
+        """四条边上的前景像素数 {'top', 'bottom', 'left', 'right'}"""
+        min_col, min_row, max_col, max_row = self.clip(bounds)
+        return {
+            'top': self.count((min_col, min_row, max_col, min_row)),
+            'bottom': self.count((min_col, max_row, max_col, max_row)),
+            'left': self.count((min_col, min_row, min_col, max_row)),
+            'right': self.count((max_col, min_row, max_col, max_row)),
+        }
+
+    def expand(self, bounds, tolerance=0, max_grow=None):
+        """
+        向外扩展矩形，直到每条边的前景像素不超过 tolerance
+
+        只移动超标的边，每次 1 像素，每步 O(1)。tolerance 为 0 时结果是
+        包含原矩形、边上没有内容的最小矩形。
+
+        Args:
+            max_grow: 每条边最多外扩的像素数，None 不限
+                      （精灵紧挨着时不限制会一路扩到相邻精灵）
+
+        Returns:
+            (新矩形, 仍超标的边列表)，后者在到达图像边界或 max_grow 时非空
+        """
+        start = self.clip(bounds)
+        min_col, min_row, max_col, max_row = start
+        limit = max(self.width, self.height) if max_grow is None else max_grow
+        low_col, low_row = max(0, start[0] - limit), max(0, start[1] - limit)
+        high_col = min(self.width - 1, start[2] + limit)
+        high_row = min(self.height - 1, start[3] + limit)
+        while True:
+            counts = self.edges((min_col, min_row, max_col, max_row))
+            moved = False
+            if counts['top'] > tolerance and min_row > low_row:
+                min_row -= 1
+                moved = True
+            if counts['bottom'] > tolerance and max_row < high_row:
+                max_row += 1
+                moved = True
+            if counts['left'] > tolerance and min_col > low_col:
+                min_col -= 1
+                moved = True
+            if counts['right'] > tolerance and max_col < high_col:
+                max_col += 1
+                moved = True
+            if not moved:
+                stuck = [edge for edge in EDGES if counts[edge] > tolerance]
+                return (min_col, min_row, max_col, max_row), stuck
@@ -0,0 +1,272 @@
+# -*- coding: utf-8 -*-
+"""
+裁剪布局
+========
+
+手动划定的裁剪矩形写在 JSON 布局文件里，新增一个精灵只需改数据:
+
+    {
+      "version": 1,
+      "sheets": [
+        {
+          "source": "PNG/BOSS.png",
+          "output": "extracted_sprites/bosses",
+          "defaults": {"cleanup": "knockout", "padding": 2},
+          "sprites": [
+            {"name": "boss_0_熊", "rect": [10, 5, 91, 76]},
+            {"name": "player_{index}", "category": "players_new",
+             "grid": {"x": 0, "y": 0, "cell": [32, 32], "count": 12}}
+          ]
+        }
+      ]
+    }
+
+精灵字段:
+- name:     输出文件名（不含 .png）；grid 中可用 {index}
+- rect:     [x, y, w, h]；grid 为一行等宽格子的简写，展开为多个 rect
+- category: 输出子目录，可省略
+- cleanup:  none 原样 / trim 裁透明边 / largest-component 只保留最大连通块后裁透明边 /
+            knockout 按背景色取内容边界框（加 padding）并把背景置为透明
+- 其它字段（label 等）原样保留，供调用方使用
+
+表级选项（也可写在 defaults 中按精灵覆盖）:
+- partial:    矩形超出图像时 clip 裁到图像内 / skip 跳过（默认 clip）
+- skip_empty: 结果全透明时不保存
+- background: knockout 的背景色，省略时取整张表四角平均
+- threshold / knockout / padding / min_pixels / alpha_threshold: 各清理方式的参数
+- expand:     {"tolerance", "max_grow"}，先把边上有内容的矩形外扩（见 integral.py）
+
+每张表只解码一次，各精灵在原图的数组视图上裁剪；清理和编码按精灵
+分发到线程池（numpy/scipy/zlib 运算会释放 GIL）。
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from .mask import get_background_color, foreground_mask, knockout_background
+from .regions import largest_component as largest_component_mask, pad_bbox
+from .trim import trim_sprite
+from .integral import IntegralMask
+from .pipeline import load_rgba, save_sprite
+from .parallel import resolve_workers
+from .instrument import stage
+
+
+LAYOUT_VERSION = 1
+CLEANUPS = ('none', 'trim', 'largest-component', 'knockout')
+
+DEFAULTS = {
+    'cleanup': 'none',
+    'partial': 'clip',
+    'skip_empty': False,
+    'background': None,
+    'threshold': 15,        # knockout: 内容检测的颜色距离阈值
+    'knockout': 10,         # knockout: 透明化的颜色距离阈值
+    'padding': 0,           # knockout: 内容边界框外留的像素
+    'alpha_threshold': 10,  # largest-component: 不透明判定
+    'min_pixels': 100,      # largest-component: 连通块须多于该像素数
+}
+
+
+def expand_sprites(sprites, defaults=None):
+    """展开 grid 简写并合并默认选项，返回每项带 rect 的精灵列表"""
+    base = {**DEFAULTS, **(defaults or {})}
+    expanded = []
+    for sprite in sprites:
+        grid = sprite.get('grid')
+        if grid is None:
+            expanded.append({**base, **sprite, 'rect': list(sprite['rect'])})
+            continue
+        cell_w, cell_h = grid['cell']
+        for index in range(grid['count']):
+            entry = {**base, **{k: v for k, v in sprite.items() if k != 'grid'}}
+            entry['name'] = sprite['name'].format(index=index)
+            entry['rect'] = [grid['x'] + index * cell_w, grid['y'], cell_w, cell_h]
+            expanded.append(entry)
+    for sprite in expanded:
+        if sprite['cleanup'] not in CLEANUPS:
+            raise ValueError(f"{sprite['name']}: 未知清理方式 {sprite['cleanup']}")
+    return expanded
+
+
+def load_layout(path):
+    """
+    读取布局文件
+
+    Returns:
+        表列表，每项 {'source', 'output', 'sprites'}，sprites 已展开并合并默认选项
+    """
+    with open(path, encoding='utf-8') as f:
+        layout = json.load(f)
+    if layout.get('version', LAYOUT_VERSION) != LAYOUT_VERSION:
+        raise ValueError(f"不支持的布局版本: {layout.get('version')}")
+
+    sheets = []
+    for sheet in layout['sheets']:
+        defaults = {k: v for k, v in sheet.items() if k in DEFAULTS}
+        defaults.update(sheet.get('defaults', {}))
+        sheets.append({
+            'source': sheet['source'],
+            'output': sheet.get('output', '.'),
+            'sprites': expand_sprites(sheet['sprites'], defaults),
+        })
+    return sheets
+
+
+def clip_rect(rect, width, height):
+    """裁到图像范围内，完全在外时返回 None"""
+    x, y, w, h = rect
+    x0, y0 = max(0, x), max(0, y)
+    x1, y1 = min(width, x + w), min(height, y + h)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def largest_component(rgba, alpha_threshold=10, min_pixels=100):
+    """
+    只保留最大的 8 连通不透明块（像素数须多于 min_pixels），其余置为全透明
+
+    没有符合条件的块时原样返回（不复制）。
+    """
+    mask = largest_component_mask(rgba[:, :, 3] > alpha_threshold, 8, min_area=min_pixels + 1)
+    if mask is None:
+        return rgba
+    cleaned = np.zeros_like(rgba)
+    np.copyto(cleaned, rgba, where=mask[:, :, None])
+    return cleaned
+
+
+def cleanup_sprite(view, sprite, bg_color=None):
+    """
+    按精灵的 cleanup 处理裁剪视图
+
+    Args:
+        view: 原图上的 (h, w, 4) 视图（不修改）
+        bg_color: knockout 使用的背景色
+
+    Returns:
+        新的 RGBA 数组；knockout 找不到内容时返回 None
+    """
+    cleanup = sprite['cleanup']
+    if cleanup == 'none':
+        return view.copy()
+    if cleanup == 'trim':
+        return trim_sprite(view)[0]
+    if cleanup == 'largest-component':
+        return trim_sprite(largest_component(view, sprite['alpha_threshold'],
+                                             sprite['min_pixels']))[0]
+
+    mask = foreground_mask(view, bg_color, threshold=sprite['threshold'])
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if not len(rows):
+        return None
+    height, width = view.shape[:2]
+    x, y, w, h = pad_bbox((cols[0], rows[0], cols[-1] - cols[0] + 1, rows[-1] - rows[0] + 1),
+                          sprite['padding'], width, height)
+    return knockout_background(view[y:y+h, x:x+w].copy(), bg_color, threshold=sprite['knockout'])
+
+
+def _sprite_path(output_dir, sprite):
+    output = Path(output_dir)
+    if sprite.get('category'):
+        output = output / sprite['category']
+    return output / f"{sprite['name']}.png"
+
+
+def crop_sheet(image, sprites, output_dir, workers=1, optimize=False, background=None):
+    """
+    从一张已解码的表裁出所有精灵并保存
+
+    Args:
+        image: (H, W, 4) RGBA 数组
+        sprites: expand_sprites 的结果
+        output_dir: 输出目录（精灵的 category 为其子目录）
+        workers: 清理/编码线程数，0 使用全部核心
+        background: knockout 的背景色，None 取四角平均（整张表只算一次）
+
+    Returns:
+        每个精灵一项 {'name', 'category', 'rect', 'filepath', 'size'}；
+        跳过的精灵 filepath 为 None，'skipped' 给出原因
+    """
+    height, width = image.shape[:2]
+    bg_color = None
+    if any(s['cleanup'] == 'knockout' for s in sprites):
+        bg_color = np.asarray(background) if background is not None else get_background_color(image)
+
+    integral = None
+    jobs = []
+    for sprite in sprites:
+        rect = sprite['rect']
+        expand = sprite.get('expand')
+        if expand:
+            if integral is None:
+                integral = IntegralMask.from_image(image, bg_color, sprite['threshold'])
+            x, y, w, h = rect
+            bounds, _ = integral.expand((x, y, x + w - 1, y + h - 1), expand.get('tolerance', 5),
+                                        expand.get('max_grow'))
+            rect = [bounds[0], bounds[1], bounds[2] - bounds[0] + 1, bounds[3] - bounds[1] + 1]
+        clipped = clip_rect(rect, width, height)
+        if clipped != tuple(rect) and sprite['partial'] == 'skip':
+            clipped = None
+        jobs.append((sprite, rect, clipped))
+
+    def run(job):
+        sprite, rect, clipped = job
+        info = {'name': sprite['name'], 'category': sprite.get('category'), 'rect': rect,
+                'filepath': None, 'size': None}
+        if clipped is None:
+            info['skipped'] = 'outside'
+            return info
+        x, y, w, h = clipped
+        with stage('crop'):
+            rgba = cleanup_sprite(image[y:y+h, x:x+w], sprite, bg_color)
+        if rgba is None or (sprite['skip_empty'] and not rgba[:, :, 3].any()):
+            info['skipped'] = 'empty'
+            return info
+        path = _sprite_path(output_dir, sprite)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        save_sprite(rgba, path, optimize)
+        info.update(filepath=str(path), size=(rgba.shape[1], rgba.shape[0]))
+        return info
+
+    workers = min(resolve_workers(workers), max(1, len(jobs)))
+    if workers == 1:
+        return [run(job) for job in jobs]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, jobs))
+
+
+def run_layout(layout_path, root=None, workers=1, optimize=False, sheets=None):
+    """
+    按布局文件裁剪所有表
+
+    Args:
+        root: source/output 相对路径的根目录，默认布局文件所在目录
+        workers: 每张表的清理/编码线程数
+        sheets: 已读取（可能已修改）的表列表，None 则读取 layout_path
+
+    Returns:
+        {source: crop_sheet 结果}；源文件无法读取的表为空列表
+    """
+    root = Path(root) if root is not None else Path(layout_path).resolve().parent
+    sheets = sheets if sheets is not None else load_layout(layout_path)
+
+    results = {}
+    for sheet in sheets:
+        source = root / sheet['source']
+        try:
+            image = load_rgba(source)
+        except (OSError, ValueError) as e:
+            print(f"无法读取 {source}: {e}")
+            results[sheet['source']] = []
+            continue
+        print(f"{sheet['source']}: {image.shape[1]}x{image.shape[0]}，{len(sheet['sprites'])} 个精灵")
+        background = next((s['background'] for s in sheet['sprites'] if s['background']), None)
+        results[sheet['source']] = crop_sheet(image, sheet['sprites'], root / sheet['output'],
+                                              workers, optimize, background)
+    return results
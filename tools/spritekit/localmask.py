@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+局部遮罩
+========
+
+区域遮罩只保存在自身边界框内: region['mask'] 的形状为 (h, w)，
+与 region['bbox'] = (x, y, w, h) 对应。IoU、合并、裁剪都只在
+相关窗口上计算，内存与对象大小成正比，而不是 图像大小 x 对象数量。
+"""
+
+import numpy as np
+
+
+def bbox_intersection(a, b):
+    """两个 (x, y, w, h) 边界框的交集，不相交返回 None"""
+    x0 = max(a[0], b[0])
+    y0 = max(a[1], b[1])
+    x1 = min(a[0] + a[2], b[0] + b[2])
+    y1 = min(a[1] + a[3], b[1] + b[3])
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def bbox_union(boxes):
+    """多个 (x, y, w, h) 边界框的外接框"""
+    x0 = min(b[0] for b in boxes)
+    y0 = min(b[1] for b in boxes)
+    x1 = max(b[0] + b[2] for b in boxes)
+    y1 = max(b[1] + b[3] for b in boxes)
+    return (x0, y0, x1 - x0, y1 - y0)
+
+
+def window(region, box):
+    """取区域局部遮罩落在 box 内的部分（box 必须位于区域边界框内）"""
+    x, y = region['bbox'][:2]
+    bx, by, bw, bh = box
+    return region['mask'][by - y:by - y + bh, bx - x:bx - x + bw]
+
+
+def mask_iou(a, b):
+    """两个局部遮罩区域的 IoU，只在边界框交集窗口内计算"""
+    box = bbox_intersection(a['bbox'], b['bbox'])
+    if box is None:
+        return 0.0
+    inter = int(np.count_nonzero(window(a, box) & window(b, box)))
+    union = a['area'] + b['area'] - inter
+    return inter / union if union > 0 else 0.0
+
+
+def paste(region, box):
+    """把区域局部遮罩放到更大的 box 窗口中，返回 (h, w) bool 数组"""
+    out = np.zeros((box[3], box[2]), dtype=bool)
+
+    # 区域可能超出 box（如裁剪窗口小于区域），只复制重叠部分
+    inter = bbox_intersection(region['bbox'], box)
+    if inter is not None:
+        ix, iy, iw, ih = inter
+        out[iy - box[1]:iy - box[1] + ih, ix - box[0]:ix - box[0] + iw] = window(region, inter)
+    return out
+
+
+def merge_masks(regions):
+    """
+    合并多个局部遮罩区域
+
+    Returns:
+        (mask, bbox, area) 合并后的局部遮罩、外接框和像素数
+    """
+    box = bbox_union([r['bbox'] for r in regions])
+    mask = np.zeros((box[3], box[2]), dtype=bool)
+    for r in regions:
+        x, y, w, h = r['bbox']
+        mask[y - box[1]:y - box[1] + h, x - box[0]:x - box[0] + w] |= r['mask']
+    return mask, box, int(np.count_nonzero(mask))
+
+
+def local_mask(full_mask, bbox):
+    """从全图遮罩截取边界框内的局部遮罩"""
+    x, y, w, h = bbox
+    return np.asarray(full_mask[y:y+h, x:x+w], dtype=bool)
+
+
+def mask_region(mask, label=0, bbox=None, area=None):
+    """
+    全图遮罩 -> 局部遮罩区域
+
+    生成器给出的 bbox 不一定可靠（原生 SAM2 的 XYWH 由闭区间 xyxy 换算，
+    宽高各少 1），只有完整覆盖遮罩时才采用，否则由遮罩重新计算。
+
+    Args:
+        mask: (H, W) 全图遮罩
+        label: 区域编号
+        bbox: 已知的 (x, y, w, h)，None 则由遮罩计算
+        area: 已知的像素数，None 则由遮罩计算
+
+    Returns:
+        区域 dict，遮罩为空时返回 None
+    """
+    mask = np.asarray(mask, dtype=bool)
+    total = np.count_nonzero(mask)
+    if total == 0:
+        return None
+    part = None
+    if bbox is not None and min(bbox[:2]) >= 0:
+        bbox = tuple(int(v) for v in bbox)
+        part = local_mask(mask, bbox)
+        if np.count_nonzero(part) != total:
+            part = None
+    if part is None:
+        rows = np.flatnonzero(mask.any(axis=1))
+        cols = np.flatnonzero(mask.any(axis=0))
+        bbox = (int(cols[0]), int(rows[0]),
+                int(cols[-1] - cols[0] + 1), int(rows[-1] - rows[0] + 1))
+        part = local_mask(mask, bbox)
+
+    if area is None:
+        area = total
+    return {'label': label, 'bbox': bbox, 'area': int(area), 'mask': part}
@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+"""
+增量构建清单
+============
+
+输出目录下的 .spritekit-manifest.json 记录每个构建目标的
+源文件哈希、提取参数和各输出文件的哈希:
+
+    {
+      "version": 1,
+      "entries": {
+        "<目标>": {
+          "source": "<sha256>",
+          "params": {...},
+          "outputs": {"<相对路径>": {"sha256": ..., "size": ..., "mtime_ns": ...}},
+          "result": [...]
+        }
+      }
+    }
+
+源文件和参数都未变化、且所有输出仍然完好时跳过该目标，直接返回上次的结果。
+输出文件先比较大小和 mtime，不一致时才重新计算哈希。
+
+incremental_map 把清单检查与 map_images 组合: 只把需要重建的目标分发出去。
+"""
+
+import json
+import os
+from pathlib import Path
+
+from .cache import file_digest
+from .parallel import map_images
+
+
+MANIFEST_NAME = '.spritekit-manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _normalize(params):
+    """参数转换为 JSON 可比较的形式（元组变列表、Path 变字符串）"""
+    return json.loads(json.dumps(params, sort_keys=True, default=str))
+
+
+class BuildManifest:
+    """
+    输出目录的增量构建清单
+
+    Args:
+        path: 清单文件路径
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.entries = {}
+        self._digests = {}
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    @classmethod
+    def in_dir(cls, output_dir):
+        """输出目录下的默认清单"""
+        return cls(Path(output_dir) / MANIFEST_NAME)
+
+    def digest(self, path):
+        """文件哈希（同一进程内按路径、大小、mtime 复用）"""
+        stat = os.stat(path)
+        ident = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        if ident not in self._digests:
+            self._digests[ident] = file_digest(path)
+        return self._digests[ident]
+
+    def _relpath(self, path):
+        path = Path(path)
+        try:
+            return path.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(path.resolve())
+
+    def _output_intact(self, rel, record):
+        path = self.root / rel
+        try:
+            stat = path.stat()
+        except OSError:
+            return False
+        if stat.st_size == record['size'] and stat.st_mtime_ns == record['mtime_ns']:
+            return True
+        return self.digest(path) == record['sha256']
+
+    def lookup(self, target, source, params):
+        """
+        目标是否无需重建
+
+        Returns:
+            上次记录的结果；需要重建时返回 None
+        """
+        entry = self.entries.get(target)
+        if entry is None:
+            return None
+        if entry['params'] != _normalize(params):
+            return None
+        try:
+            if entry['source'] != self.digest(source):
+                return None
+        except OSError:
+            return None
+        if not all(self._output_intact(rel, rec) for rel, rec in entry['outputs'].items()):
+            return None
+        return entry['result']
+
+    def record(self, target, source, params, outputs, result=None):
+        """
+        记录一次构建，并删除上次构建产生、这次不再产生的输出文件
+
+        Args:
+            target: 目标名
+            source: 源文件路径
+            params: 提取参数
+            outputs: 本次生成的输出文件路径
+            result: 需要在跳过时原样返回的结果（须可 JSON 序列化）
+        """
+        records = {}
+        for path in outputs:
+            stat = os.stat(path)
+            records[self._relpath(path)] = {
+                'sha256': self.digest(path),
+                'size': stat.st_size,
+                'mtime_ns': stat.st_mtime_ns,
+            }
+
+        old = self.entries.get(target)
+        if old is not None:
+            self._remove_outputs(set(old['outputs']) - set(records))
+
+        self.entries[target] = {
+            'source': self.digest(source),
+            'params': _normalize(params),
+            'outputs': records,
+            'result': _normalize(result if result is not None else []),
+        }
+
+    def prune(self, keep, params=None):
+        """
+        删除不在 keep 中的目标及其输出文件
+
+        Args:
+            keep: 本次构建的目标
+            params: 只清理参数与之相同的目标（如同一前缀的复制结果），None 清理全部
+        """
+        params = _normalize(params) if params is not None else None
+        for target in set(self.entries) - set(keep):
+            if params is None or self.entries[target]['params'] == params:
+                self._remove_outputs(self.entries.pop(target)['outputs'])
+
+    def forget_outputs(self, paths):
+        """
+        从各目标中去掉已被删除的输出文件（及结果中对应的项）
+
+        去重等后处理删除输出后调用，目标仍视为完好，下次构建不会重新生成。
+
+        Returns:
+            受影响的目标数
+        """
+        rels = {self._relpath(path) for path in paths}
+        changed = 0
+        for entry in self.entries.values():
+            hit = rels.intersection(entry['outputs'])
+            if not hit:
+                continue
+            for rel in hit:
+                del entry['outputs'][rel]
+            entry['result'] = [r for r in entry['result']
+                               if not (isinstance(r, dict) and 'filepath' in r
+                                       and self._relpath(r['filepath']) in hit)]
+            changed += 1
+        return changed
+
+    def refresh_outputs(self, paths):
+        """
+        输出文件被等价内容覆盖（如无损重新压缩）后更新其哈希记录
+
+        Returns:
+            受影响的目标数
+        """
+        rels = {self._relpath(path): path for path in paths}
+        changed = 0
+        for entry in self.entries.values():
+            hit = rels.keys() & entry['outputs'].keys()
+            for rel in hit:
+                stat = os.stat(rels[rel])
+                entry['outputs'][rel] = {
+                    'sha256': self.digest(rels[rel]),
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                }
+            changed += bool(hit)
+        return changed
+
+    def _remove_outputs(self, rels):
+        for rel in rels:
+            try:
+                (self.root / rel).unlink()
+            except OSError:
+                pass
+
+    def save(self):
+        """写入清单（先写临时文件再改名）"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+def incremental_map(func, tasks, manifest, params, workers=1, initializer=None, initargs=(),
+                    force=False, prune=False):
+    """
+    只对需要重建的目标调用 func
+
+    Args:
+        func: func(arg) -> (结果列表, 是否记录)，结果每项带 'filepath'（模块级函数）；
+              模型加载失败等情况返回 False，下次运行会重新构建
+        tasks: [(target, source, arg), ...]
+        manifest: BuildManifest，None 则全部重建且不记录
+        params: 提取参数（变化时全部重建）
+        workers, initializer, initargs: 见 map_images
+        force: 不查清单、全部重建，但结果照常记录，下次运行可以跳过
+        prune: 清理清单中参数相同、但不在 tasks 里的目标及其输出
+               （tasks 覆盖整个输出目录时才应开启）
+
+    Returns:
+        {target: 结果列表}，按 tasks 顺序
+    """
+    results = {}
+    pending = []
+    for target, source, arg in tasks:
+        cached = None
+        if manifest is not None and not force:
+            cached = manifest.lookup(target, source, params)
+        if cached is not None:
+            results[target] = cached
+        else:
+            pending.append((target, source, arg))
+
+    if len(pending) < len(tasks):
+        print(f"跳过 {len(tasks) - len(pending)} 个未变化的目标")
+
+    outputs = map_images(func, [arg for _, _, arg in pending], workers,
+                         initializer=initializer, initargs=initargs)
+    for (target, source, _), (result, complete) in zip(pending, outputs):
+        results[target] = result
+        if manifest is not None and complete:
+            manifest.record(target, source, params, [r['filepath'] for r in result], result)
+
+    if manifest is not None:
+        if prune:
+            manifest.prune([target for target, _, _ in tasks], params)
+        manifest.save()
+    return {target: results[target] for target, _, _ in tasks}
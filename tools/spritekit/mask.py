@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+背景色遮罩
+==========
+
+以一次数组运算计算整幅图（或裁剪区域）每个像素与背景色的 L1 颜色距离，
+取代逐像素调用 is_background_pixel 的双重循环。
+
+各脚本原有的阈值（3/5/10/15/20/30）直接作为 threshold 传入，
+判定规则与原实现一致: 距离 < threshold 即为背景。
+"""
+
+import numpy as np
+
+
+def get_background_color(img_array):
+    """检测背景色（使用图片四角的颜色）"""
+    corners = np.stack([
+        img_array[0, 0],
+        img_array[0, -1],
+        img_array[-1, 0],
+        img_array[-1, -1]
+    ])
+    return np.mean(corners, axis=0).astype(np.uint8)
+
+
+def color_distance(img_array, bg_color, channels=3, metric='l1'):
+    """
+    计算每个像素与背景色的颜色距离
+
+    Args:
+        img_array: (H, W, C) uint8 图像数组
+        bg_color: 背景色，长度 >= channels
+        channels: 参与比较的通道数（3=只比较RGB，4=连同Alpha一起比较）
+        metric: 'l1' 各通道差值之和；'chebyshev' 各通道差值的最大值
+
+    Returns:
+        (H, W) int32 距离数组
+    """
+    n = min(channels, img_array.shape[2], len(bg_color))
+    bg = np.asarray(bg_color[:n], dtype=np.int16)
+    diff = img_array[:, :, :n].astype(np.int16)
+    diff -= bg
+    np.abs(diff, out=diff)
+    if metric == 'chebyshev':
+        return diff.max(axis=2).astype(np.int32)
+    return diff.sum(axis=2, dtype=np.int32)
+
+
+def background_mask(img_array, bg_color, threshold=30, channels=3, metric='l1'):
+    """背景像素遮罩（距离 < threshold 为 True）"""
+    return color_distance(img_array, bg_color, channels, metric) < threshold
+
+
+def foreground_mask(img_array, bg_color, threshold=30, channels=3, metric='l1'):
+    """前景像素遮罩（距离 >= threshold 为 True），用于连通区域检测"""
+    return color_distance(img_array, bg_color, channels, metric) >= threshold
+
+
+def knockout_background(rgba, bg_color, threshold=30, channels=3, metric='l1'):
+    """
+    将背景色像素的 Alpha 置 0（原地修改）
+
+    Args:
+        rgba: (H, W, 4) uint8 数组，通常是裁剪出的精灵区域副本
+
+    Returns:
+        传入的 rgba 数组
+    """
+    rgba[:, :, 3][background_mask(rgba, bg_color, threshold, channels, metric)] = 0
+    return rgba
+
+
+def knockout_alpha(rgba, bg_color, threshold=30, channels=3, metric='l1'):
+    """返回背景色像素置 0 后的 Alpha 平面（不修改 rgba）"""
+    alpha = rgba[:, :, 3].copy()
+    alpha[background_mask(rgba, bg_color, threshold, channels, metric)] = 0
+    return alpha
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+树干-树冠合并
+=============
+
+把位于树冠正下方的树干碎块合并到树冠上。
+
+- 索引: 按边界框底边排序，每个树干只用二分查找取出底边落在
+  [树干顶边 - max_gap, 树干顶边] 的候选树冠，再向量化检查中心 x 对齐等条件
+- 并查集: 记录合并关系，树冠本身又被合并到更大的对象时（链式合并），
+  所有碎块都归到最终的根区域
+"""
+
+import numpy as np
+
+
+class UnionFind:
+    """并查集（路径减半）"""
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        parent = self.parent
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(self, child, root):
+        """把 child 所在集合挂到 root 所在集合下"""
+        a, b = self.find(child), self.find(root)
+        if a != b:
+            self.parent[a] = b
+
+    def groups(self):
+        """根 -> 成员列表，按根的下标排序"""
+        groups = {}
+        for i in range(len(self.parent)):
+            groups.setdefault(self.find(i), []).append(i)
+        return dict(sorted(groups.items()))
+
+
+def trunk_crown_pairs(boxes, areas, max_gap=15):
+    """
+    找出所有 (树干, 树冠) 合并对
+
+    规则与原 auto_segment_by_contours 一致: 按顺序处理每个未合并的区域，
+    在未合并的区域中选垂直间距最小的树冠（间距相同取下标小的）。
+
+    Args:
+        boxes: (N, 4) 边界框 [x1, y1, x2, y2]
+        areas: (N,) 面积
+        max_gap: 树干顶边与树冠底边的最大间距
+
+    Returns:
+        [(trunk, crown), ...]
+    """
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    areas = np.asarray(areas, dtype=np.float64)
+    n = len(boxes)
+
+    x1, y1, x2, y2 = boxes.T
+    cx = (x1 + x2) / 2
+    widths = x2 - x1
+
+    order = np.argsort(y2, kind='stable')
+    bottoms = y2[order]
+    merged = np.zeros(n, dtype=bool)
+
+    pairs = []
+    for i in range(n):
+        if merged[i]:
+            continue
+
+        # 底边落在 [y1 - max_gap, y1] 内的候选树冠
+        lo = np.searchsorted(bottoms, y1[i] - max_gap, side='left')
+        hi = np.searchsorted(bottoms, y1[i], side='right')
+        cand = order[lo:hi]
+        cand = cand[(cand != i) & ~merged[cand]]
+        if len(cand) == 0:
+            continue
+
+        ok = (
+            # 树冠通常比树干大
+            (areas[cand] >= areas[i] * 0.8)
+            # 水平中心应该对齐
+            & (np.abs(cx[i] - cx[cand]) <= np.maximum(widths[i], widths[cand]) * 0.5)
+            # 树干宽度不应该比树冠宽太多
+            & (widths[i] <= widths[cand] * 1.5)
+        )
+        cand = cand[ok]
+        if len(cand) == 0:
+            continue
+
+        gaps = y1[i] - y2[cand]
+        best = cand[np.lexsort((cand, gaps))[0]]
+        merged[i] = True
+        pairs.append((i, int(best)))
+
+    return pairs
+
+
+def merge_groups(boxes, areas, max_gap=15):
+    """返回合并后的分组: 根区域下标 -> 成员下标列表"""
+    uf = UnionFind(len(areas))
+    for trunk, crown in trunk_crown_pairs(boxes, areas, max_gap):
+        uf.union(trunk, crown)
+    return uf.groups()
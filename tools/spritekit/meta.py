@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+图像元数据索引
+==============
+
+- 文件头: 只读 PNG 签名和各数据块头（跳过数据本身），得到尺寸、颜色类型、
+  位深和是否带 tRNS 透明块，不解码像素
+- 派生信息: 需要解码才能得到的结果（不透明边界框、像素数、贴边标记、
+  分类特征等）按 kind 分别缓存
+- 失效: 以 (大小, mtime) 判断文件是否变化；mtime 变了但内容哈希相同
+  （如仅被 touch 或重新检出）时继续沿用缓存
+
+索引保存为一个 JSON 文件，重复审计 assets/ 时只有变化的文件会被重新解码。
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .cache import DEFAULT_CACHE_DIR, file_digest
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+INDEX_VERSION = 1
+DEFAULT_MAX_ENTRIES = 20000
+
+# IHDR 颜色类型
+COLOR_TYPES = {
+    0: 'L',
+    2: 'RGB',
+    3: 'P',
+    4: 'LA',
+    6: 'RGBA',
+}
+
+
+def read_png_header(path):
+    """
+    只读取 PNG 数据块头，不解码像素
+
+    Returns:
+        {'width', 'height', 'bit_depth', 'color_type', 'mode', 'has_alpha'}；
+        不是 PNG 时返回 None
+    """
+    with open(path, 'rb') as f:
+        if f.read(8) != PNG_SIGNATURE:
+            return None
+
+        length, chunk = struct.unpack('>I4s', f.read(8))
+        if chunk != b'IHDR':
+            return None
+        width, height, bit_depth, color_type = struct.unpack('>IIBB', f.read(10))
+        f.seek(length - 10 + 4, os.SEEK_CUR)  # IHDR 剩余字段 + CRC
+
+        # 扫描到第一个 IDAT 为止，只看是否有 tRNS
+        has_trns = False
+        while True:
+            head = f.read(8)
+            if len(head) < 8:
+                break
+            length, chunk = struct.unpack('>I4s', head)
+            if chunk in (b'IDAT', b'IEND'):
+                break
+            if chunk == b'tRNS':
+                has_trns = True
+            f.seek(length + 4, os.SEEK_CUR)
+
+    return {
+        'width': width,
+        'height': height,
+        'bit_depth': bit_depth,
+        'color_type': color_type,
+        'mode': COLOR_TYPES.get(color_type, 'unknown'),
+        'has_alpha': color_type in (4, 6) or has_trns,
+    }
+
+
+def image_header(path):
+    """PNG 读文件头；其他格式退回 PIL 的惰性打开（同样不解码像素）"""
+    header = read_png_header(path)
+    if header is not None:
+        return header
+    with Image.open(path) as img:
+        return {
+            'width': img.size[0],
+            'height': img.size[1],
+            'bit_depth': None,
+            'color_type': None,
+            'mode': img.mode,
+            'has_alpha': img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info,
+        }
+
+
+def alpha_facts(alpha, threshold=0):
+    """
+    Alpha 平面的派生信息
+
+    Args:
+        alpha: (H, W) Alpha 平面
+        threshold: Alpha 大于该值视为不透明
+
+    Returns:
+        {'bbox': [x0, y0, x1, y1]（含端点，全透明为 None）, 'pixels',
+         'edges': {'top', 'bottom', 'left', 'right'} 四条图像边上是否有不透明像素}
+    """
+    opaque = np.asarray(alpha) > threshold
+    rows = np.flatnonzero(opaque.any(axis=1))
+    cols = np.flatnonzero(opaque.any(axis=0))
+    bbox = None
+    if len(rows):
+        bbox = [int(cols[0]), int(rows[0]), int(cols[-1]), int(rows[-1])]
+
+    return {
+        'bbox': bbox,
+        'pixels': int(np.count_nonzero(opaque)),
+        'edges': {
+            'top': bool(opaque[0].any()),
+            'bottom': bool(opaque[-1].any()),
+            'left': bool(opaque[:, 0].any()),
+            'right': bool(opaque[:, -1].any()),
+        },
+    }
+
+
+class MetadataIndex:
+    """
+    按文件缓存的图像元数据
+
+    保存时删除已不存在的文件的条目；条目按最近使用排序，超过 max_entries
+    时删除最久未用的（与 RegionCache 的 LRU 上限相同）。
+
+    Args:
+        path: 索引文件路径，None 使用 ~/.cache/spritekit/metadata.json
+        max_entries: 条目数上限
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = Path(path) if path else DEFAULT_CACHE_DIR / 'metadata.json'
+        self.max_entries = max_entries
+        self.entries = {}
+        self.dirty = False
+
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            pass
+
+    def _entry(self, path):
+        """取文件对应的条目；文件内容变化时清空旧的派生信息"""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        # 重新插入到末尾，保持最近使用顺序
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.entries[key] = entry
+
+        if entry is not None and entry['size'] == stat.st_size:
+            if entry['mtime_ns'] == stat.st_mtime_ns:
+                return entry
+            # mtime 变化但内容相同
+            if entry['sha256'] == file_digest(key):
+                entry['mtime_ns'] = stat.st_mtime_ns
+                self.dirty = True
+                return entry
+
+        entry = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_digest(key),
+            'facts': {},
+        }
+        self.entries[key] = entry
+        self.dirty = True
+        return entry
+
+    def get(self, path, kind):
+        """已缓存的派生信息，没有或文件已变化时返回 None"""
+        return self._entry(path)['facts'].get(kind)
+
+    def put(self, path, kind, value):
+        """缓存派生信息（须可 JSON 序列化）"""
+        self._entry(path)['facts'][kind] = value
+        self.dirty = True
+
+    def header(self, path):
+        """文件头信息（尺寸、颜色类型、位深）"""
+        value = self.get(path, 'header')
+        if value is None:
+            value = image_header(path)
+            self.put(path, 'header', value)
+        return value
+
+    def alpha(self, path, threshold=0):
+        """不透明边界框、像素数和贴边标记（需要时才解码）"""
+        kind = f'alpha>{threshold}'
+        value = self.get(path, kind)
+        if value is None:
+            with Image.open(path) as img:
+                value = alpha_facts(np.asarray(img.convert('RGBA'))[:, :, 3], threshold)
+            self.put(path, kind, value)
+        return value
+
+    def prune(self):
+        """删除已不存在的文件的条目，并按最近使用顺序截断到 max_entries"""
+        missing = [key for key in self.entries if not os.path.isfile(key)]
+        for key in missing:
+            del self.entries[key]
+        excess = len(self.entries) - self.max_entries
+        for key in list(self.entries)[:max(0, excess)]:
+            del self.entries[key]
+        if missing or excess > 0:
+            self.dirty = True
+
+    def save(self):
+        """清理失效条目后写入索引（有变化时）"""
+        self.prune()
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': INDEX_VERSION, 'entries': self.entries}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self.dirty = False
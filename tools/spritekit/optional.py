@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+可选依赖探测
+============
+
+用 importlib.util.find_spec 只查找模块是否已安装，不执行导入
+（torch、ultralytics 等导入一次需要数秒），结果在进程内缓存。
+真正的导入留到选定的后端加载模型时再做，不需要模型的调用不受影响，
+某个实现未安装时也不必先付出其它实现的导入代价。
+"""
+
+import importlib.util
+from functools import lru_cache
+
+
+# SAM 加载方式 -> 所需模块，按优先顺序
+SAM_LOADERS = {
+    'ultralytics': ('ultralytics',),
+    'native': ('sam2', 'torch'),
+    'transformers': ('transformers', 'torch'),
+}
+
+
+@lru_cache(maxsize=None)
+def has_module(name):
+    """模块是否可导入（不执行导入）"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        # 父包缺失或 __spec__ 异常
+        return False
+
+
+def missing_modules(names):
+    """返回未安装的模块名列表"""
+    return [name for name in names if not has_module(name)]
+
+
+def available_sam_loaders():
+    """已安装全部依赖的 SAM 加载方式，按优先顺序"""
+    return [loader for loader, modules in SAM_LOADERS.items() if not missing_modules(modules)]
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+多进程批处理
+============
+
+把逐图像的处理函数分发到进程池。每个进程先运行一次 initializer
+（例如加载一次模型），之后处理分到的图像；结果按输入顺序返回
+（map_images）或按输入顺序流式产出（iter_images），
+输出命名与顺序执行完全一致。
+
+启用 instrument 时，工作进程记录的阶段随结果一起传回主进程。
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from . import instrument
+
+
+def resolve_workers(workers):
+    """0 或 None 表示使用全部 CPU 核心"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+def iter_images(func, items, workers=1, initializer=None, initargs=(), chunksize=1):
+    """
+    对每个输入调用 func，按输入顺序逐个产出结果
+
+    结果就绪即产出（前面的结果未完成时后面的会等待），
+    调用方可以边处理边写出，不必等全部完成。
+
+    Args:
+        func: 模块级函数（需要可被 pickle）
+        items: 输入列表（通常是图像路径）
+        workers: 进程数，1 在当前进程内顺序执行，0 使用全部核心
+        initializer: 每个进程启动时调用一次
+        initargs: initializer 的参数
+        chunksize: 每次发给工作进程的输入个数（大量小文件时调大可减少进程间通信）
+    """
+    items = list(items)
+    if not items:
+        return
+    workers = min(resolve_workers(workers), len(items))
+
+    if workers == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        for item in items:
+            yield func(item)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer,
+                             initargs=initargs) as pool:
+        if not instrument.enabled():
+            yield from pool.map(func, items, chunksize=chunksize)
+            return
+        call = partial(instrument.run_profiled, func, instrument.memory_enabled())
+        for result, events in pool.map(call, items, chunksize=chunksize):
+            instrument.merge(events)
+            yield result
+
+
+def map_images(func, items, workers=1, initializer=None, initargs=()):
+    """
+    对每个输入调用 func，按输入顺序返回结果列表
+
+    参数见 iter_images。
+
+    Returns:
+        结果列表，与 items 一一对应
+    """
+    return list(iter_images(func, items, workers, initializer, initargs))
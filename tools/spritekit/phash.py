@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+感知哈希去重
+============
+
+重叠的精灵表会被多个提取器各自裁出一份，文件字节不同但画面相同。
+
+- 精确哈希: 先裁掉透明边，再对预乘 Alpha 的像素取 sha256；
+  只是留白、文件编码或全透明像素下的颜色不同的精灵哈希相同
+- 感知哈希: 预乘 Alpha 后的灰度图缩到 8x8 / 9x8，
+  aHash（与均值比较）和 dHash（相邻像素比较）拼成 128 位
+- 颜色: 灰度哈希分不出同一形状的换色版本（如 trees-green / trees-brown），
+  候选还需平均颜色接近
+- 索引: 感知哈希放进 BK 树（汉明距离满足三角不等式），
+  查询只访问距离区间内的子树，整体远少于两两比较
+
+分组采用先到先得: 每个精灵与已有代表比较，足够接近则归入该组，
+否则自己成为新代表。
+"""
+
+import hashlib
+
+import numpy as np
+from PIL import Image
+
+from .trim import trim_sprite
+
+
+HASH_SIZE = 8
+
+
+def premultiplied_gray(rgba):
+    """预乘 Alpha 的亮度图（全透明像素为 0，与其 RGB 无关）"""
+    rgb = rgba[:, :, :3].astype(np.float32) * (rgba[:, :, 3:4].astype(np.float32) / 255.0)
+    gray = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return gray.astype(np.uint8)
+
+
+def _bits_to_int(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), 'big')
+
+
+def average_hash(gray, size=HASH_SIZE):
+    """aHash: 缩到 size x size，高于均值的位为 1"""
+    small = np.asarray(Image.fromarray(gray).resize((size, size), Image.BOX), dtype=np.float32)
+    return _bits_to_int(small > small.mean())
+
+
+def difference_hash(gray, size=HASH_SIZE):
+    """dHash: 缩到 (size+1) x size，每行左边比右边亮的位为 1"""
+    small = np.asarray(Image.fromarray(gray).resize((size + 1, size), Image.BOX), dtype=np.float32)
+    return _bits_to_int(small[:, :-1] > small[:, 1:])
+
+
+def sprite_hashes(rgba):
+    """
+    精灵的精确哈希和感知哈希
+
+    Returns:
+        {'exact': sha256 十六进制, 'phash': 128 位感知哈希（十六进制）,
+         'size': [w, h]（裁掉透明边后）, 'color': 不透明像素的平均 [R, G, B]}
+    """
+    cropped, (_, _, w, h) = trim_sprite(rgba)
+    premul = cropped.copy()
+    premul[:, :, :3] = (cropped[:, :, :3].astype(np.uint16) * cropped[:, :, 3:4] // 255).astype(np.uint8)
+
+    digest = hashlib.sha256()
+    digest.update(f"{w}x{h}".encode())
+    digest.update(premul.tobytes())
+
+    opaque = cropped[:, :, 3] > 0
+    color = cropped[opaque][:, :3].mean(axis=0) if opaque.any() else np.zeros(3)
+
+    gray = premultiplied_gray(cropped)
+    phash = (average_hash(gray) << (HASH_SIZE * HASH_SIZE)) | difference_hash(gray)
+    return {
+        'exact': digest.hexdigest(),
+        'phash': f"{phash:032x}",
+        'size': [int(w), int(h)],
+        'color': [round(float(c), 1) for c in color],
+    }
+
+
+def hamming(a, b):
+    """两个整数哈希的汉明距离"""
+    return bin(a ^ b).count('1')
+
+
+class BKTree:
+    """
+    汉明距离 BK 树
+
+    每个节点的子节点按与该节点的距离分桶；查询距离 d 以内时，
+    只需进入距离在 [dist - d, dist + d] 内的子树。
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, key, item):
+        """加入哈希 key（整数）及其附带对象"""
+        self.size += 1
+        if self.root is None:
+            self.root = (key, [item], {})
+            return
+        node = self.root
+        while True:
+            node_key, items, children = node
+            dist = hamming(key, node_key)
+            if dist == 0:
+                items.append(item)
+                return
+            child = children.get(dist)
+            if child is None:
+                children[dist] = (key, [item], {})
+                return
+            node = child
+
+    def query(self, key, max_distance):
+        """
+        距离 key 不超过 max_distance 的所有条目
+
+        Returns:
+            [(距离, item), ...]，按距离从小到大
+        """
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_key, items, children = stack.pop()
+            dist = hamming(key, node_key)
+            if dist <= max_distance:
+                found.extend((dist, item) for item in items)
+            for child_dist, child in children.items():
+                if dist - max_distance <= child_dist <= dist + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+def _similar(a, b, size_tolerance, color_tolerance):
+    if not all(abs(x - y) <= max(2, size_tolerance * max(x, y)) for x, y in zip(a['size'], b['size'])):
+        return False
+    return all(abs(x - y) <= color_tolerance for x, y in zip(a['color'], b['color']))
+
+
+def group_duplicates(items, max_distance=6, size_tolerance=0.1, color_tolerance=6):
+    """
+    把重复的精灵分组
+
+    Args:
+        items: [(key, hashes), ...]，hashes 见 sprite_hashes；
+               先出现的作为组内保留的代表
+        max_distance: 128 位感知哈希的最大汉明距离，0 只合并精确/感知哈希完全相同的
+        size_tolerance: 裁剪后宽高的最大相对差（缩略哈希对尺寸不敏感，需要另外限制）
+        color_tolerance: 平均颜色各通道的最大差
+
+    Returns:
+        [[代表 key, 重复 key, ...], ...]，只包含有重复的组，按代表出现顺序
+    """
+    exact = {}
+    tree = BKTree()
+    groups = {}
+    order = []
+
+    for key, hashes in items:
+        leader = exact.get(hashes['exact'])
+        phash = int(hashes['phash'], 16)
+        if leader is None:
+            for _, (candidate, other) in tree.query(phash, max_distance):
+                if _similar(other, hashes, size_tolerance, color_tolerance):
+                    leader = candidate
+                    break
+
+        if leader is None:
+            exact[hashes['exact']] = key
+            tree.add(phash, (key, hashes))
+            groups[key] = [key]
+            order.append(key)
+        else:
+            exact.setdefault(hashes['exact'], leader)
+            groups[leader].append(key)
+
+    return [groups[key] for key in order if len(groups[key]) > 1]
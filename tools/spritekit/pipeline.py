@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+区域提取流水线
+==============
+
+load -> segment(后端) -> filter/sort -> pad/crop -> [trim] -> save/[encode]
+
+各入口脚本只需选择后端和参数，裁剪、透明化、保存逻辑都在这里。
+各阶段用 instrument.stage 包裹，--profile 时统计耗时和内存。
+"""
+
+import io
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+from .regions import filter_regions, pad_bbox
+from .localmask import paste
+from .encode import encode_png
+from .instrument import stage
+from .trim import TRIM_SIDECAR, trim_sprite, trim_info, write_trim_sidecar
+
+
+def load_rgba(image_path):
+    """读取图像为 (H, W, 4) uint8 RGBA 数组"""
+    with stage('load'):
+        return np.array(Image.open(image_path).convert('RGBA'))
+
+
+def cut_sprite(image, region, padding=0, alpha=None):
+    """
+    按区域边界框（加填充）裁剪出 RGBA 精灵
+
+    Args:
+        image: (H, W, 4) RGBA 数组
+        region: 区域 dict，带 'mask'（边界框内的局部遮罩）时区域外像素置为透明
+        padding: 边界填充像素
+        alpha: 后端给出的全图 Alpha 平面，None 则沿用原图 Alpha
+
+    Returns:
+        (rgba, bbox) 裁剪结果和填充后的 (x, y, w, h)
+    """
+    height, width = image.shape[:2]
+    x, y, w, h = pad_bbox(region['bbox'], padding, width, height)
+
+    rgba = image[y:y+h, x:x+w].copy()
+    if alpha is not None:
+        rgba[:, :, 3] = alpha[y:y+h, x:x+w]
+    if 'mask' in region:
+        rgba[:, :, 3] = np.where(paste(region, (x, y, w, h)), rgba[:, :, 3], 0)
+
+    return rgba, (x, y, w, h)
+
+
+def extract_sprites(image, backend, image_path=None, min_area=0, min_size=0,
+                    padding=0, max_objects=None, order=None):
+    """
+    运行分割后端并裁剪出所有精灵
+
+    Args:
+        image: (H, W, 4) RGBA 数组
+        backend: 分割后端
+        min_area: 最小区域面积
+        min_size: 最小区域宽/高
+        padding: 边界填充像素
+        max_objects: 最多保留的区域数
+        order: None 保持后端顺序；'area' 按面积从大到小
+
+    Returns:
+        精灵列表，每项为 {'region', 'image', 'bbox'}
+    """
+    with stage('segment', backend=backend.name):
+        regions, alpha = backend.segment(image, image_path, min_area, min_size)
+    regions = filter_regions(regions, min_area, min_size)
+
+    if order == 'area':
+        regions = sorted(regions, key=lambda r: r['area'], reverse=True)
+    if max_objects is not None:
+        regions = regions[:max_objects]
+
+    sprites = []
+    with stage('crop'):
+        for region in regions:
+            rgba, bbox = cut_sprite(image, region, padding, alpha)
+            sprites.append({'region': region, 'image': rgba, 'bbox': bbox})
+    return sprites
+
+
+def save_sprite(rgba, path, optimize=False):
+    """保存 RGBA 数组为 PNG（optimize: 调色板/多种过滤压缩，见 encode.py）"""
+    with stage('encode'):
+        if optimize:
+            data = encode_png(rgba)
+        else:
+            buffer = io.BytesIO()
+            Image.fromarray(rgba, 'RGBA').save(buffer, 'PNG')
+            data = buffer.getvalue()
+    with stage('write'):
+        Path(path).write_bytes(data)
+
+
+def save_sprites(sprites, output_dir, name_format, trim=False, optimize=False, **fields):
+    """
+    保存精灵并返回元数据
+
+    Args:
+        name_format: 文件名模板，可使用 {index}、区域字段（如 {row}/{col}）及 fields
+        trim: 裁掉透明边，裁剪信息写入输出目录的 trim.json 并放在元数据 'trim' 中
+        optimize: 用 encode_png 写出更小的 PNG
+        fields: 额外的模板字段，如 stem
+
+    Returns:
+        元数据列表 {'filename', 'filepath', 'area', 'bbox', 'index', ...}
+    """
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    extracted = []
+    trimmed = {}
+    for idx, sprite in enumerate(sprites):
+        region = sprite['region']
+        filename = name_format.format(index=idx, **region, **fields)
+        filepath = output_path / filename
+        rgba = sprite['image']
+        if trim:
+            height, width = rgba.shape[:2]
+            with stage('crop'):
+                rgba, rect = trim_sprite(rgba)
+            trimmed[filename] = trim_info(rect, (width, height))
+        else:
+            trimmed[filename] = None
+        save_sprite(rgba, filepath, optimize)
+
+        info = {
+            'filename': filename,
+            'filepath': str(filepath),
+            'area': region['area'],
+            'bbox': sprite['bbox'],
+            'index': idx,
+        }
+        for key in ('row', 'col'):
+            if key in region:
+                info[key] = region[key]
+        if trimmed[filename] is not None:
+            info['trim'] = trimmed[filename]
+        extracted.append(info)
+
+    # 未裁剪时也要清掉同名文件的旧裁剪信息
+    if trim or (output_path / TRIM_SIDECAR).exists():
+        write_trim_sidecar(output_path, trimmed)
+    return extracted
+
+
+def extract_to_dir(image_path, output_dir, backend, name_format, min_area=0,
+                   min_size=0, padding=0, max_objects=None, order=None, trim=False,
+                   optimize=False):
+    """读取图像、提取精灵并保存到目录（trim/optimize 见 save_sprites），返回元数据列表"""
+    image = load_rgba(image_path)
+    sprites = extract_sprites(image, backend, image_path=str(image_path),
+                              min_area=min_area, min_size=min_size, padding=padding,
+                              max_objects=max_objects, order=order)
+    return save_sprites(sprites, output_dir, name_format, trim=trim, optimize=optimize,
+                        stem=Path(image_path).stem)
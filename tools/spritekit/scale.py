@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+像素画缩小
+==========
+
+构建时把素材缩小到游戏实际绘制的尺寸，浏览器不必每帧缩放大图。
+
+- area:    面积平均（预乘 Alpha 后做盒式滤波），半透明边缘不会出现黑边
+- nearest: 最近邻，保留硬边像素，适合整数倍缩小的像素画
+
+只缩小不放大: 目标不小于原图时返回原图。
+"""
+
+import math
+
+import numpy as np
+from PIL import Image
+
+
+FILTERS = ('area', 'nearest')
+
+
+def fit_size(size, max_edge):
+    """
+    等比缩放到长边不超过 max_edge
+
+    Args:
+        size: 原尺寸 (w, h)
+        max_edge: 长边上限（可为小数，向上取整）
+
+    Returns:
+        (w, h)，不大于原尺寸，每边至少 1
+    """
+    width, height = size
+    scale = min(1.0, math.ceil(max_edge) / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def downscale(rgba, size, filter='area'):
+    """
+    缩小 RGBA 精灵
+
+    Args:
+        rgba: (H, W, 4) uint8
+        size: 目标 (w, h)
+        filter: 'area' 或 'nearest'
+
+    Returns:
+        (h, w, 4) uint8；目标不小于原图时原样返回
+    """
+    height, width = rgba.shape[:2]
+    if size[0] >= width and size[1] >= height:
+        return rgba
+    if filter not in FILTERS:
+        raise ValueError(f"未知缩放方式: {filter}")
+
+    img = Image.fromarray(rgba, 'RGBA')
+    if filter == 'nearest':
+        return np.asarray(img.resize(size, Image.NEAREST))
+    # RGBa 为预乘 Alpha 模式，透明像素的颜色不参与平均
+    return np.asarray(img.convert('RGBa').resize(size, Image.BOX).convert('RGBA'))
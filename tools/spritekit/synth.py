@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+合成精灵表
+==========
+
+生成尺寸、对象数可配置的测试精灵表，供基准测试使用，结果可复现（固定随机种子）。
+
+- colorkey: 纯色（品红）背景，对象之间留有间隔
+- alpha:    透明背景
+- grid:     透明背景，每个网格单元至多一个对象（部分单元为空）
+
+对象为像素画风格的树/灌木/树桩: 椭圆树冠 + 矩形树干，少量调色板颜色，
+带描边和高光，尺寸随机。
+"""
+
+import math
+
+import numpy as np
+
+
+BACKGROUND = (255, 0, 255)
+
+# 调色板: (描边, 主色, 高光)
+PALETTES = [
+    ((20, 60, 20), (40, 120, 40), (90, 170, 70)),     # 绿
+    ((60, 80, 20), (110, 150, 40), (170, 200, 80)),   # 黄绿
+    ((70, 40, 20), (130, 80, 40), (180, 120, 70)),    # 棕
+    ((80, 30, 20), (170, 70, 40), (220, 120, 70)),    # 橙
+]
+TRUNK = ((50, 30, 15), (100, 65, 35))
+
+
+def draw_object(rng, width, height):
+    """
+    画一个对象
+
+    Returns:
+        (height, width, 4) RGBA，对象外透明
+    """
+    sprite = np.zeros((height, width, 4), dtype=np.uint8)
+    yy, xx = np.mgrid[0:height, 0:width]
+    outline, body, light = PALETTES[rng.integers(len(PALETTES))]
+
+    kind = rng.choice(['tree', 'bush', 'stump'], p=[0.5, 0.3, 0.2])
+    if kind == 'stump':
+        crown_h = 0
+        trunk_w = max(2, width // 2)
+    elif kind == 'bush':
+        crown_h = height
+        trunk_w = 0
+    else:
+        crown_h = max(2, int(height * rng.uniform(0.6, 0.8)))
+        trunk_w = max(2, width // 5)
+
+    if trunk_w:
+        x0 = (width - trunk_w) // 2
+        top = max(0, crown_h - 2)
+        sprite[top:, x0:x0 + trunk_w, :3] = TRUNK[1]
+        sprite[top:, x0:x0 + trunk_w, 3] = 255
+        sprite[top:, x0, :3] = TRUNK[0]
+        sprite[top:, x0 + trunk_w - 1, :3] = TRUNK[0]
+
+    if crown_h:
+        cx, cy = (width - 1) / 2, (crown_h - 1) / 2
+        rx, ry = max(width / 2, 1), max(crown_h / 2, 1)
+        d = ((xx - cx) / rx) ** 2 + ((yy - cy) / ry) ** 2
+        crown = d <= 1.0
+        sprite[crown, :3] = body
+        sprite[crown & (d > 0.75), :3] = outline
+        spot = (((xx - cx + rx / 3) / (rx / 3)) ** 2 + ((yy - cy + ry / 3) / (ry / 3)) ** 2) <= 1.0
+        sprite[crown & spot, :3] = light
+        sprite[crown, 3] = 255
+
+    return sprite
+
+
+def synth_sheet(width=1024, height=1024, count=64, kind='alpha', cell=None, seed=0,
+                min_size=16, max_size=None):
+    """
+    生成合成精灵表
+
+    Args:
+        width, height: 精灵表尺寸
+        count: 对象数（grid 模式下为非空单元数上限）
+        kind: 'colorkey' / 'alpha' / 'grid'
+        cell: grid 模式的单元尺寸 (w, h)，默认 (64, 64)
+        seed: 随机种子
+        min_size, max_size: 对象最小/最大边长，max_size 默认取槽位大小
+
+    Returns:
+        (rgba, boxes): (H, W, 4) uint8 精灵表，对象边界框 [(x, y, w, h), ...]
+    """
+    rng = np.random.default_rng(seed)
+    sheet = np.zeros((height, width, 4), dtype=np.uint8)
+    if kind == 'colorkey':
+        sheet[:, :, :3] = BACKGROUND
+        sheet[:, :, 3] = 255
+
+    if kind == 'grid':
+        cell_w, cell_h = cell or (64, 64)
+        cols, rows = width // cell_w, height // cell_h
+        slots = [(c * cell_w, r * cell_h, cell_w, cell_h) for r in range(rows) for c in range(cols)]
+        filled = sorted(rng.permutation(len(slots))[:min(count, len(slots))])
+        slots = [slots[i] for i in filled]
+        margin = 2
+    else:
+        # 均匀槽位 + 随机尺寸与偏移，槽位间留间隔保证对象互不相连
+        side = math.ceil(math.sqrt(count))
+        slot_w, slot_h = width // side, height // side
+        slots = [(c * slot_w, r * slot_h, slot_w, slot_h)
+                 for r in range(side) for c in range(side)][:count]
+        margin = 3
+
+    boxes = []
+    for sx, sy, sw, sh in slots:
+        limit_w = sw - 2 * margin
+        limit_h = sh - 2 * margin
+        if max_size:
+            limit_w, limit_h = min(limit_w, max_size), min(limit_h, max_size)
+        if limit_w < min_size or limit_h < min_size:
+            continue
+        w = int(rng.integers(min_size, limit_w + 1))
+        h = int(rng.integers(min_size, limit_h + 1))
+        x = sx + margin + int(rng.integers(0, limit_w - w + 1))
+        y = sy + margin + int(rng.integers(0, limit_h - h + 1))
+
+        sprite = draw_object(rng, w, h)
+        opaque = sprite[:, :, 3] > 0
+        sheet[y:y + h, x:x + w][opaque] = sprite[opaque]
+        boxes.append((x, y, w, h))
+
+    return sheet, boxes
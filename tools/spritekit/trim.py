@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+透明边裁剪
+==========
+
+把精灵裁到不透明像素的边界框，并在输出目录的 trim.json 中记录裁剪前的
+尺寸和裁剪区域的位置（字段与图集帧信息一致）:
+
+    {
+      "version": 1,
+      "frames": {
+        "<文件名>": {"spriteSourceSize": {"x", "y", "w", "h"}, "sourceSize": {"w", "h"}}
+      }
+    }
+
+绘制时把裁剪后的图像画在 (x, y) 偏移处、按 sourceSize 计算缩放，
+结果与未裁剪时逐像素一致。
+"""
+
+import json
+import os
+from pathlib import Path
+
+from .meta import alpha_facts
+
+
+TRIM_SIDECAR = 'trim.json'
+TRIM_VERSION = 1
+
+
+def trim_sprite(rgba, threshold=0):
+    """
+    裁掉四周的透明边
+
+    Returns:
+        (cropped, (x, y, w, h)) 裁剪结果及其在原图中的位置；
+        全透明时保留 1x1 像素
+    """
+    bbox = alpha_facts(rgba[:, :, 3], threshold)['bbox']
+    if bbox is None:
+        return rgba[:1, :1].copy(), (0, 0, 1, 1)
+    x0, y0, x1, y1 = bbox
+    return rgba[y0:y1 + 1, x0:x1 + 1].copy(), (x0, y0, x1 - x0 + 1, y1 - y0 + 1)
+
+
+def trim_info(rect, source_size):
+    """裁剪区域 (x, y, w, h) 与原尺寸 (w, h) 的帧信息"""
+    x, y, w, h = rect
+    return {
+        'spriteSourceSize': {'x': int(x), 'y': int(y), 'w': int(w), 'h': int(h)},
+        'sourceSize': {'w': int(source_size[0]), 'h': int(source_size[1])},
+    }
+
+
+def read_trim_sidecar(output_dir):
+    """读取目录下的裁剪信息 {文件名: 帧信息}，没有时返回空字典"""
+    try:
+        with open(Path(output_dir) / TRIM_SIDECAR, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get('version') != TRIM_VERSION:
+        return {}
+    return data.get('frames', {})
+
+
+def write_trim_sidecar(output_dir, frames):
+    """
+    合并写入目录下的 trim.json
+
+    已不存在的文件对应的条目一并删除（例如重新提取后数量变少）。
+
+    Args:
+        frames: {文件名: 帧信息}，帧信息为 None 表示该文件未裁剪
+    """
+    output_dir = Path(output_dir)
+    merged = read_trim_sidecar(output_dir)
+    for filename, info in frames.items():
+        if info is None:
+            merged.pop(filename, None)
+        else:
+            merged[filename] = info
+    merged = {name: info for name, info in merged.items() if (output_dir / name).exists()}
+
+    path = output_dir / TRIM_SIDECAR
+    if not merged:
+        if path.exists():
+            path.unlink()
+        return
+
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': TRIM_VERSION, 'frames': merged}, f,
+                  ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""
+投影切分（XY-cut）
+==================
+
+按空白行/列切分精灵表。投影是对前景遮罩的一次归约（any），
+占用向量用 np.diff 找出连续段，不逐像素判断。
+
+递归 XY-cut 交替沿行、列切分: 先按空白行切成行带，每条行带再按空白列
+切开，每块再按空白行切……某块连续两次投影都无法切分（只有一段且覆盖
+整块）时即为叶子，此时它已紧贴内容。
+
+切分路径 path 记录每一层所在段的下标，path[0] 为行号、path[1] 为行内
+序号，与按行分组的旧逻辑一致。
+
+区间统一为闭区间 (start, end)，与 integral.py 一致。
+"""
+
+import numpy as np
+
+
+def runs(occupancy, min_gap=1):
+    """
+    占用向量中连续 True 段
+
+    Args:
+        occupancy: 1D bool 数组
+        min_gap: 短于该长度的空白不切开（并入相邻段）
+
+    Returns:
+        [(start, end), ...] 闭区间
+    """
+    edges = np.diff(np.concatenate(([0], np.asarray(occupancy, dtype=np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+    if min_gap > 1 and len(starts) > 1:
+        keep = starts[1:] - ends[:-1] - 1 >= min_gap
+        starts = starts[np.concatenate(([True], keep))]
+        ends = ends[np.concatenate((keep, [True]))]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def row_runs(mask, min_gap=1):
+    """有前景的行段"""
+    return runs(mask.any(axis=1), min_gap)
+
+
+def column_runs(mask, min_gap=1):
+    """有前景的列段"""
+    return runs(mask.any(axis=0), min_gap)
+
+
+def xy_cut(mask, max_depth=None, min_gap=1):
+    """
+    递归 XY-cut
+
+    Args:
+        mask: (H, W) bool 前景遮罩
+        max_depth: 最多切几层（第 1 层按行），None 切到不能再切；
+                   2 即旧的"行带 -> 列"切分，叶子高度为所在行带高度
+        min_gap: 短于该宽度的空白行/列不切开
+
+    Returns:
+        [{'bbox': (x, y, w, h), 'path': (i0, i1, ...)}, ...] 按切分顺序
+    """
+    leaves = []
+
+    def cut(y0, y1, x0, x1, axis, path, idle):
+        if max_depth is not None and len(path) >= max_depth:
+            leaves.append({'bbox': (x0, y0, x1 - x0 + 1, y1 - y0 + 1), 'path': path})
+            return
+        block = mask[y0:y1 + 1, x0:x1 + 1]
+        if axis == 0:
+            segments, extent = row_runs(block, min_gap), y1 - y0
+        else:
+            segments, extent = column_runs(block, min_gap), x1 - x0
+        if not segments:
+            return
+
+        unsplit = segments == [(0, extent)]
+        if unsplit and idle and max_depth is None:
+            leaves.append({'bbox': (x0, y0, x1 - x0 + 1, y1 - y0 + 1), 'path': path})
+            return
+        for index, (start, end) in enumerate(segments):
+            if axis == 0:
+                cut(y0 + start, y0 + end, x0, x1, 1, path + (index,), unsplit)
+            else:
+                cut(y0, y1, x0 + start, x0 + end, 0, path + (index,), unsplit)
+
+    height, width = mask.shape
+    if height and width:
+        cut(0, height - 1, 0, width - 1, 0, (), False)
+    return leaves